@@ -0,0 +1,84 @@
+"""
+Bulk matching of every buyer against the available inventory.
+
+Running match_client once per buyer scans the listings once per buyer. The
+bulk matcher instead groups buyers by their bedroom requirement (a handful
+of distinct values) and, per group, sorts the qualifying listings by price
+once. Each buyer's matches are then a prefix of that order, found by binary
+search on their budget, and each listing's interested-buyer count is the
+number of the group's budgets at or above its price, found the same way.
+The cost is a few sorts and searches per group rather than buyers x listings.
+
+Criteria follow match_client: listings whose status mentions "sold" are
+skipped, and a missing budget or bedroom requirement does not restrict.
+Further criteria can be added as more buyer columns and group keys.
+
+Each buyer's top matches are ranked with match_client's scorer over the
+buyer's matching slice, so both tools agree. Scoring is per buyer, so it
+can be limited to the buyers a caller will actually show.
+"""
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from listing_index import ListingIndex
+from match_scoring import BuyerProfile, rank_rows
+
+
+class BulkMatch:
+    """Result of matching a list of buyers against one listing index."""
+
+    __slots__ = ("top_rows", "match_counts", "interested_counts")
+
+    def __init__(self, top_rows: List[np.ndarray], match_counts: np.ndarray, interested_counts: np.ndarray):
+        # Per buyer: best matching row ids (highest match score first) and match count
+        self.top_rows = top_rows
+        self.match_counts = match_counts
+        # Per listing row: number of buyers it matches
+        self.interested_counts = interested_counts
+
+
+def buyer_criteria(buyers: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """(budgets, minimum bedrooms) columns for buyers; no budget is +inf, no minimum is 0."""
+    budgets = np.array([buyer.get("budget_max") or np.inf for buyer in buyers], dtype=np.float64)
+    min_bedrooms = np.array([buyer.get("min_bedrooms") or 0 for buyer in buyers], dtype=np.int64)
+    return budgets, min_bedrooms
+
+
+def match_buyers(
+    index: ListingIndex,
+    buyers: List[Dict[str, Any]],
+    per_buyer: int = 3,
+    ranked: Optional[int] = None
+) -> BulkMatch:
+    """
+    Match every buyer against the unsold listings in one pass per bedroom
+    group. The first ``ranked`` buyers (all if None) also get their
+    ``per_buyer`` best matches by match score, as match_client ranks them.
+    """
+    budgets, min_bedrooms = buyer_criteria(buyers)
+    available = np.flatnonzero(~index.sold)
+    top_rows: List[np.ndarray] = [np.zeros(0, dtype=np.int64)] * len(buyers)
+    match_counts = np.zeros(len(buyers), dtype=np.int64)
+    interested_counts = np.zeros(index.size, dtype=np.int64)
+
+    for bedrooms in np.unique(min_bedrooms).tolist():
+        group = np.flatnonzero(min_bedrooms == bedrooms)
+        rows = available[index.bedrooms[available] >= bedrooms]
+        rows = rows[np.argsort(index.price[rows], kind="stable")]
+        prices = index.price[rows]
+
+        # A buyer matches the prefix of rows priced within their budget
+        ends = np.searchsorted(prices, budgets[group], side="right")
+        match_counts[group] = ends
+        if per_buyer > 0:
+            for buyer, end in zip(group.tolist(), ends.tolist()):
+                if ranked is None or buyer < ranked:
+                    ranked_rows = rank_rows(index, BuyerProfile(buyers[buyer], index), rows[:end], per_buyer)
+                    top_rows[buyer] = np.array([row for row, _ in ranked_rows], dtype=np.int64)
+
+        # A listing interests every buyer in the group whose budget covers it
+        group_budgets = np.sort(budgets[group])
+        interested_counts[rows] += len(group_budgets) - np.searchsorted(group_budgets, prices, side="left")
+
+    return BulkMatch(top_rows, match_counts, interested_counts)
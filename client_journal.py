@@ -0,0 +1,236 @@
+"""
+Append-only journal for client records.
+
+Every CRM mutation is appended to a journal file and fsync'd, so a write costs
+one line of I/O however many clients exist. Appends made inside ``batch()``
+are group-committed: buffered, then written with a single fsync on exit. On startup the journal is replayed
+over the last snapshot (clients.jsonl). Once the journal grows past a
+threshold a background thread compacts it into a fresh snapshot, written to a
+temp file and atomically renamed into place.
+
+Journal records:
+    {"op": "add", "client": {...}}
+    {"op": "update", "client_id": "C0001", "updates": {...}}
+
+Replay is idempotent (add is an upsert, update is a dict merge), so a crash at
+any point during compaction never duplicates or loses a record.
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterator, Optional
+
+# Number of journal records that triggers a background compaction
+COMPACT_AFTER = 200
+
+
+def write_jsonl_atomic(filepath: str, lines: List[str]) -> None:
+    """Write pre-serialized JSON lines to ``filepath`` via temp file + fsync + rename."""
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, "w") as f:
+        for line in lines:
+            f.write(line + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, filepath)
+
+
+def _read_records(filepath: str) -> List[Dict[str, Any]]:
+    """Read journal records, skipping a torn or invalid line (e.g. after a crash)."""
+    records = []
+    try:
+        with open(filepath, "r") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    print(f"Warning: Skipping invalid journal line: {line[:50]}...")
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def apply_record(
+    clients: List[Dict[str, Any]],
+    positions: Dict[str, int],
+    record: Dict[str, Any],
+) -> None:
+    """Apply one journal record to a client list, keeping ``positions`` (client_id -> index) in step."""
+    op = record.get("op")
+    if op == "add":
+        client = record["client"]
+        client_id = client.get("client_id")
+        if client_id in positions:
+            clients[positions[client_id]] = client
+        else:
+            positions[client_id] = len(clients)
+            clients.append(client)
+    elif op == "update":
+        position = positions.get(record.get("client_id"))
+        if position is not None:
+            clients[position].update(record.get("updates", {}))
+
+
+class ClientJournal:
+    """Journaled persistence for the client list: snapshot + append-only log."""
+
+    def __init__(self, snapshot_path: str, journal_path: str, compact_after: int = COMPACT_AFTER):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.compacting_path = f"{journal_path}.compacting"
+        self.compact_after = compact_after
+        self.pending = 0  # records appended since the last compaction
+        self._lock = threading.Lock()
+        self._compaction: Optional[threading.Thread] = None
+        self._file = None
+        # Lines buffered by an open batch, and the thread that owns it
+        self._batch: Optional[List[str]] = None
+        self._batch_owner: Optional[int] = None
+
+    def replay(self, clients: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Replay journal records (including any interrupted compaction) over the snapshot."""
+        positions = {client.get("client_id"): i for i, client in enumerate(clients)}
+        replayed = 0
+        for path in (self.compacting_path, self.journal_path):
+            for record in _read_records(path):
+                apply_record(clients, positions, record)
+                replayed += 1
+        if replayed:
+            print(f"✅ Replayed {replayed} journal records from {self.journal_path}")
+        self.pending = replayed
+        return clients
+
+    def append(self, record: Dict[str, Any]) -> bool:
+        """
+        Durably append one mutation record (write + fsync). Inside this
+        thread's ``batch()`` the record is buffered and made durable when the
+        batch commits.
+        """
+        line = json.dumps(record) + "\n"
+        try:
+            with self._lock:
+                if self._batch is not None and self._batch_owner == threading.get_ident():
+                    self._batch.append(line)
+                else:
+                    self._write(line)
+                self.pending += 1
+            return True
+        except Exception as e:
+            print(f"❌ Error appending to {self.journal_path}: {e}")
+            return False
+
+    def _write(self, data: str) -> None:
+        """Write and fsync (caller holds the lock)."""
+        if self._file is None:
+            self._file = open(self.journal_path, "a")
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Group-commit the appends this thread makes inside the block: they are
+        written with one fsync on exit, and an OSError is raised if that
+        write fails. Batches do not nest.
+        """
+        with self._lock:
+            self._batch = []
+            self._batch_owner = threading.get_ident()
+        try:
+            yield
+        finally:
+            with self._lock:
+                lines, self._batch, self._batch_owner = self._batch, None, None
+                if lines:
+                    start = None
+                    try:
+                        if self._file is None:
+                            self._file = open(self.journal_path, "a")
+                        start = self._file.tell()
+                        self._write("".join(lines))
+                    except OSError as e:
+                        print(f"❌ Error committing {len(lines)} records to {self.journal_path}: {e}")
+                        self._discard_from(start)
+                        raise
+
+    def _discard_from(self, offset: Optional[int]) -> None:
+        """Close the journal and cut off a partly written batch (caller holds the lock)."""
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+        if offset is not None:
+            try:
+                os.truncate(self.journal_path, offset)
+            except OSError:
+                pass
+
+    def maybe_compact(self, clients: List[Dict[str, Any]]) -> None:
+        """
+        Start a background compaction once enough records have accumulated.
+        Skipped while a batch is open: its changes are not committed yet.
+        """
+        if self.pending >= self.compact_after and self._batch is None:
+            self.compact(clients, background=True)
+
+    def compact(self, clients: List[Dict[str, Any]], background: bool = False) -> None:
+        """
+        Fold the journal into a fresh snapshot.
+
+        The current clients are serialized and the journal rotated aside under
+        the lock, so new appends go to a fresh journal while the snapshot is
+        written. The rotated journal is removed only after the snapshot rename;
+        if an earlier compaction left one behind, the live journal is appended
+        to it rather than replacing it.
+        """
+        with self._lock:
+            if self._compaction is not None and self._compaction.is_alive():
+                return
+            lines = [json.dumps(client) for client in clients]
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if os.path.exists(self.journal_path):
+                if os.path.exists(self.compacting_path):
+                    # A previous compaction never wrote its snapshot: keep its
+                    # records and append the live journal after them, so they
+                    # stay on disk until this snapshot's rename succeeds.
+                    self._append_file(self.journal_path, self.compacting_path)
+                    os.remove(self.journal_path)
+                else:
+                    os.replace(self.journal_path, self.compacting_path)
+            self.pending = 0
+            if background:
+                self._compaction = threading.Thread(
+                    target=self._write_snapshot, args=(lines,), daemon=True
+                )
+                self._compaction.start()
+                return
+
+        self._write_snapshot(lines)
+
+    @staticmethod
+    def _append_file(source: str, target: str) -> None:
+        """Append ``source`` to ``target`` and fsync (replay tolerates both existing after a crash)."""
+        with open(source, "r") as src, open(target, "a") as dst:
+            dst.write(src.read())
+            dst.flush()
+            os.fsync(dst.fileno())
+
+    def _write_snapshot(self, lines: List[str]) -> None:
+        try:
+            write_jsonl_atomic(self.snapshot_path, lines)
+            if os.path.exists(self.compacting_path):
+                os.remove(self.compacting_path)
+            print(f"✅ Compacted {len(lines)} records into {self.snapshot_path}")
+        except Exception as e:
+            print(f"❌ Error compacting {self.journal_path}: {e}")
+
+    def wait(self) -> None:
+        """Block until any background compaction has finished."""
+        if self._compaction is not None:
+            self._compaction.join()
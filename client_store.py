@@ -0,0 +1,273 @@
+"""
+SQLite storage for client records (optional backend, ``CLIENTS_BACKEND=sqlite``).
+
+The database runs in WAL mode, so any number of worker processes can read
+while one writes, and writers serialize on SQLite's write lock rather than
+clobbering a shared JSONL file. Each client is stored as its JSON document
+(the source of truth, returned exactly as saved) plus indexed columns and
+child rows for contacts and viewings, kept in step in the same transaction:
+
+    clients    client_id PK, role, stage, full_name, lead_source, created_at,
+               budget_max, min_bedrooms, selling_property_id, asking_price, record
+    contacts   client_id PK -> clients, email, mobile
+    viewings   (client_id, viewing_id) PK -> clients, property_id, starts_at, status, notes
+    sequences  name PK, value   (client / viewing ID high-water marks; seed()
+                                 and next() mirror id_sequence.SequenceAllocator;
+                                 plus the shared clients version)
+
+``PRAGMA data_version`` changes whenever another connection commits, which
+lets each process notice writes made by the others and reload. The clients
+version row is bumped in the same transaction as every client write, so all
+processes agree on which version a set of clients belongs to (pagination
+cursors and cached results issued by one worker stay valid on another).
+
+Import / export between the database and JSONL:
+
+    python client_store.py import data/clients.jsonl [--db data/clients.db]
+    python client_store.py export data/clients.jsonl [--db data/clients.db]
+"""
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS clients (
+    client_id TEXT PRIMARY KEY,
+    role TEXT,
+    stage TEXT,
+    full_name TEXT,
+    lead_source TEXT,
+    created_at TEXT,
+    budget_max INTEGER,
+    min_bedrooms INTEGER,
+    selling_property_id TEXT,
+    asking_price INTEGER,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS clients_role_stage ON clients (role, stage);
+CREATE INDEX IF NOT EXISTS clients_created_at ON clients (created_at);
+CREATE INDEX IF NOT EXISTS clients_selling_property ON clients (selling_property_id);
+
+CREATE TABLE IF NOT EXISTS contacts (
+    client_id TEXT PRIMARY KEY REFERENCES clients (client_id) ON DELETE CASCADE,
+    email TEXT,
+    mobile TEXT
+);
+CREATE INDEX IF NOT EXISTS contacts_email ON contacts (email);
+
+CREATE TABLE IF NOT EXISTS viewings (
+    client_id TEXT NOT NULL REFERENCES clients (client_id) ON DELETE CASCADE,
+    viewing_id TEXT NOT NULL,
+    property_id TEXT,
+    starts_at TEXT,
+    status TEXT,
+    notes TEXT,
+    PRIMARY KEY (client_id, viewing_id)
+);
+CREATE INDEX IF NOT EXISTS viewings_property ON viewings (property_id, starts_at);
+
+CREATE TABLE IF NOT EXISTS sequences (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+# Row of the sequences table holding the shared clients version
+CLIENTS_VERSION = "clients_version"
+
+
+class ClientStore:
+    """Client records in a WAL-mode SQLite database."""
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        # One connection per process, shared by the worker threads under a
+        # lock, so this process's own commits never look like outside writes
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._lock = threading.RLock()
+        self._depth = 0
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=FULL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(SCHEMA)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Hold the database write lock for the block and commit once on exit
+        (rolled back on error). Nested blocks run as savepoints of the outer
+        transaction, so a failed inner block leaves no partial rows.
+        """
+        with self._lock:
+            savepoint = f"sp{self._depth}"
+            self._conn.execute("BEGIN IMMEDIATE" if self._depth == 0 else f"SAVEPOINT {savepoint}")
+            self._depth += 1
+            try:
+                yield
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._conn.execute("ROLLBACK")
+                else:
+                    self._conn.execute(f"ROLLBACK TO {savepoint}")
+                    self._conn.execute(f"RELEASE {savepoint}")
+                raise
+            self._depth -= 1
+            self._conn.execute("COMMIT" if self._depth == 0 else f"RELEASE {savepoint}")
+
+    def data_version(self, wait: bool = True) -> Optional[int]:
+        """
+        Counter that changes when another connection commits. With
+        ``wait=False`` returns None instead of waiting while another thread
+        of this process is using the connection (e.g. mid-transaction, when
+        no other process can commit anyway).
+        """
+        if not self._lock.acquire(blocking=wait):
+            return None
+        try:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+        finally:
+            self._lock.release()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM clients").fetchone()[0]
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        """All client records, in insertion order."""
+        with self._lock:
+            rows = self._conn.execute("SELECT record FROM clients ORDER BY rowid").fetchall()
+        return [json.loads(record) for (record,) in rows]
+
+    def clients_version(self) -> int:
+        """Shared version of the client records, bumped by every put()."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM sequences WHERE name = ?", (CLIENTS_VERSION,)).fetchone()
+        return row[0] if row else 0
+
+    def load_versioned(self) -> Tuple[List[Dict[str, Any]], int]:
+        """All client records and the clients version, read from one consistent snapshot."""
+        with self._lock:
+            outer = self._depth == 0
+            if outer:
+                self._conn.execute("BEGIN")
+            try:
+                return self.load_all(), self.clients_version()
+            finally:
+                if outer:
+                    self._conn.execute("COMMIT")
+
+    def put(self, client: Dict[str, Any]) -> int:
+        """
+        Insert or replace a client record with its contact and viewing rows,
+        and return the bumped clients version (committed with the record).
+        """
+        client_id = client.get("client_id")
+        contact = client.get("contact") or {}
+        with self.transaction():
+            self._conn.execute(
+                """
+                INSERT INTO clients (client_id, role, stage, full_name, lead_source, created_at,
+                                     budget_max, min_bedrooms, selling_property_id, asking_price, record)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (client_id) DO UPDATE SET
+                    role = excluded.role, stage = excluded.stage, full_name = excluded.full_name,
+                    lead_source = excluded.lead_source, created_at = excluded.created_at,
+                    budget_max = excluded.budget_max, min_bedrooms = excluded.min_bedrooms,
+                    selling_property_id = excluded.selling_property_id,
+                    asking_price = excluded.asking_price, record = excluded.record
+                """,
+                (
+                    client_id, client.get("role"), client.get("stage"), client.get("full_name"),
+                    client.get("lead_source"), client.get("created_at"), client.get("budget_max"),
+                    client.get("min_bedrooms"), client.get("selling_property_id"),
+                    client.get("asking_price"), json.dumps(client),
+                ),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO contacts (client_id, email, mobile) VALUES (?, ?, ?)",
+                (client_id, contact.get("email"), contact.get("mobile")),
+            )
+            self._conn.execute("DELETE FROM viewings WHERE client_id = ?", (client_id,))
+            self._conn.executemany(
+                """
+                INSERT OR REPLACE INTO viewings (client_id, viewing_id, property_id, starts_at, status, notes)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (client_id, v.get("viewing_id"), v.get("property_id"), v.get("datetime"),
+                     v.get("status"), v.get("notes"))
+                    for v in client.get("viewings", [])
+                ],
+            )
+            return self._conn.execute(
+                """
+                INSERT INTO sequences (name, value) VALUES (?, 1)
+                ON CONFLICT (name) DO UPDATE SET value = value + 1
+                RETURNING value
+                """,
+                (CLIENTS_VERSION,),
+            ).fetchone()[0]
+
+    def import_clients(self, clients: Iterable[Dict[str, Any]]) -> int:
+        """Upsert many client records in one transaction; returns how many."""
+        imported = 0
+        with self.transaction():
+            for client in clients:
+                self.put(client)
+                imported += 1
+        return imported
+
+    def seed(self, name: str, value: int) -> None:
+        """Raise a sequence to at least ``value`` (never lowers it)."""
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO sequences (name, value) VALUES (?, ?)
+                ON CONFLICT (name) DO UPDATE SET value = max(value, excluded.value)
+                """,
+                (name, value),
+            )
+
+    def next(self, name: str) -> int:
+        """Atomically advance a sequence across every process sharing the database."""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                INSERT INTO sequences (name, value) VALUES (?, 1)
+                ON CONFLICT (name) DO UPDATE SET value = value + 1
+                RETURNING value
+                """,
+                (name,),
+            ).fetchone()
+        return row[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import or export client records between SQLite and JSONL")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("jsonl", help="JSONL file to read (import) or write (export)")
+    parser.add_argument("--db", default="data/clients.db", help="SQLite database (default: data/clients.db)")
+    args = parser.parse_args()
+
+    store = ClientStore(args.db)
+    if args.command == "import":
+        with open(args.jsonl, "r") as f:
+            count = store.import_clients(json.loads(line) for line in f if line.strip())
+        print(f"✅ Imported {count} clients from {args.jsonl} into {args.db}")
+    else:
+        from client_journal import write_jsonl_atomic
+
+        clients = store.load_all()
+        write_jsonl_atomic(args.jsonl, [json.dumps(client) for client in clients])
+        print(f"✅ Exported {len(clients)} clients from {args.db} to {args.jsonl}")
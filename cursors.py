@@ -0,0 +1,48 @@
+"""
+Opaque pagination cursors.
+
+A cursor records where the previous page stopped (a position in the result
+order) together with the data version and a fingerprint of the query it came
+from. A follow-up call resumes from that position. A cursor is rejected once
+the data it was issued against has changed, or if it is replayed with
+different filters, so pages never skip or repeat results.
+"""
+import base64
+import hashlib
+import json
+from typing import Dict, Any
+
+
+def _fingerprint(params: Dict[str, Any]) -> str:
+    """Short stable hash of the query parameters a cursor belongs to."""
+    encoded = json.dumps(params, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()[:12]
+
+
+def encode_cursor(kind: str, version: int, params: Dict[str, Any], position: int) -> str:
+    """Build an opaque cursor for resuming ``kind`` results at ``position``."""
+    payload = {"k": kind, "v": version, "f": _fingerprint(params), "p": position}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, kind: str, version: int, params: Dict[str, Any]) -> int:
+    """
+    Return the resume position stored in ``cursor``.
+
+    Raises ValueError if the cursor is malformed, belongs to another tool or
+    query, or was issued against an older data version.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        position = int(payload["p"])
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor")
+    if position < 0:
+        raise ValueError("Invalid cursor")
+    if payload.get("k") != kind or payload.get("f") != _fingerprint(params):
+        raise ValueError("Cursor does not match this search - repeat the search without a cursor")
+    if payload.get("v") != version:
+        raise ValueError("Cursor expired because the data has changed - repeat the search without a cursor")
+    return position
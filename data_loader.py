@@ -1,11 +1,32 @@
 import json
-from typing import List, Dict, Any, Optional
+import os
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import List, Dict, Any, Callable, Iterator, Optional
 from datetime import datetime
 from pathlib import Path
+from listing_index import ListingIndex
+from price_cube import PriceCube
+from listings_snapshot import ListingsSnapshot, FileWatcher, file_signature
+from listings_cache import intern_strings, load_listings_cache, source_version, write_listings_cache
+from client_journal import ClientJournal, write_jsonl_atomic
+from client_store import ClientStore
+from id_sequence import SequenceAllocator, max_id_number
+from viewing_calendar import ViewingCalendar
 
 # Data file paths
 LISTINGS_FILE = "data/listings.jsonl"
 CLIENTS_FILE = "data/clients.jsonl"
+CLIENTS_JOURNAL_FILE = "data/clients.journal.jsonl"
+SEQUENCES_FILE = "data/sequences.json"
+CLIENTS_DB_FILE = "data/clients.db"
+LISTINGS_CACHE_DIR = "data/.listings-cache"
+
+# Client storage: "jsonl" (snapshot + journal, one process) or "sqlite" (WAL
+# database in CLIENTS_DB_FILE, safe to share between worker processes)
+CLIENTS_BACKEND = os.getenv("CLIENTS_BACKEND", "jsonl")
 
 def load_jsonl(filepath: str) -> List[Dict[str, Any]]:
     """
@@ -29,82 +50,432 @@ def load_jsonl(filepath: str) -> List[Dict[str, Any]]:
 
 def save_jsonl(filepath: str, data: List[Dict[str, Any]]) -> bool:
     """
-    Save data to JSONL file (overwrites existing file).
+    Save data to JSONL file (atomically replaces existing file).
     """
     try:
-        with open(filepath, 'w') as f:
-            for record in data:
-                f.write(json.dumps(record) + '\n')
+        write_jsonl_atomic(filepath, [json.dumps(record) for record in data])
         print(f"✅ Saved {len(data)} records to {filepath}")
         return True
     except Exception as e:
         print(f"❌ Error saving to {filepath}: {e}")
         return False
 
+def _load_listings_snapshot(previous: Optional[ListingsSnapshot] = None) -> ListingsSnapshot:
+    """
+    Load listings.jsonl with its indexes, from the compiled cache when it is
+    current, otherwise by parsing the file (and refreshing the cache). On a
+    reload the price cube is carried over from ``previous`` and updated with
+    the listings that changed. The file signature is taken first, so a write
+    that lands mid-read is picked up by the next reload.
+
+    The version comes from the file's contents rather than a local counter,
+    so every worker process serving the same file agrees on it (a cursor or
+    cache tag from one worker is valid on another).
+    """
+    signature = file_signature(LISTINGS_FILE)
+    cached = load_listings_cache(LISTINGS_CACHE_DIR, LISTINGS_FILE, signature)
+    version = source_version(LISTINGS_CACHE_DIR, LISTINGS_FILE, signature)
+    if cached is not None:
+        listings, index, cube, text = cached
+        print(f"✅ Loaded {len(listings)} listings from cache {LISTINGS_CACHE_DIR}")
+        return ListingsSnapshot(version, listings, signature, index, cube, text)
+    listings = intern_strings(load_jsonl(LISTINGS_FILE))
+    cube = previous.cube.updated(previous.listings, listings) if previous is not None else None
+    snapshot = ListingsSnapshot(version, listings, signature, cube=cube)
+    write_listings_cache(
+        LISTINGS_CACHE_DIR, LISTINGS_FILE, signature, snapshot.listings, snapshot.index, snapshot.cube,
+        snapshot.text_index
+    )
+    return snapshot
+
 # --- Load data ONCE when server starts ---
-listings_data = load_jsonl(LISTINGS_FILE)
-clients_data = load_jsonl(CLIENTS_FILE)
+# Listings (with their columnar index, price cube and full-text index) live in an immutable
+# snapshot that a hot reload replaces wholesale
+listings_snapshot = _load_listings_snapshot()
+# Clients: last snapshot plus any mutations journaled since, or the SQLite
+# database (seeded from the JSONL files the first time it is opened)
+client_journal = ClientJournal(CLIENTS_FILE, CLIENTS_JOURNAL_FILE)
+client_store: Optional[ClientStore] = None
+_store_version: Optional[int] = None  # database data_version the clients were loaded at
+_shared_clients_version = 0  # the database's clients version the clients were loaded at
+if CLIENTS_BACKEND == "sqlite":
+    client_store = ClientStore(CLIENTS_DB_FILE)
+    if client_store.count() == 0:
+        imported = client_store.import_clients(client_journal.replay(load_jsonl(CLIENTS_FILE)))
+        print(f"✅ Imported {imported} clients into {CLIENTS_DB_FILE}")
+    _store_version = client_store.data_version()
+    clients_data, _shared_clients_version = client_store.load_versioned()
+    print(f"✅ Loaded {len(clients_data)} clients from {CLIENTS_DB_FILE}")
+else:
+    clients_data = client_journal.replay(load_jsonl(CLIENTS_FILE))
+
+# --- Data versions: bumped whenever the listings or clients change, so
+# pagination cursors (and anything else derived from the data) can tell.
+# The listings version lives on the listings snapshot. With SQLite the
+# clients version is the database's shared clients version shifted left, so
+# every worker agrees on it; the low bits number this process's own writes
+# until they commit, never reused so a rolled-back write's version is never
+# handed out again. ---
+_LOCAL_VERSION_BITS = 20
+_local_writes = 0
+# Client IDs written (and the shared version each put returned) inside the
+# open SQLite write_batch; applied to the versions once the batch commits
+_pending_versions: Optional[Dict[str, int]] = None
+
+def _committed_version(shared: int) -> int:
+    """clients_version for a shared database clients version."""
+    return shared << _LOCAL_VERSION_BITS
+
+clients_version = 1 if client_store is None else _committed_version(_shared_clients_version)
+# Version of each client record (the clients_version of its last change), so
+# results derived from one client are only invalidated when that client changes
+client_versions: Dict[str, int] = {}
+
+# --- Hash indexes for O(1) lookups by ID ---
+clients_by_id: Dict[str, Dict[str, Any]] = {}
+sellers_by_property_id: Dict[str, Dict[str, Any]] = {}
+
+# --- Viewing calendars (parsed start times) per property and per buyer ---
+property_calendar = ViewingCalendar()
+buyer_calendar = ViewingCalendar()
+
+def _add_to_indexes(
+    client: Dict[str, Any],
+    by_id: Dict[str, Dict[str, Any]],
+    sellers: Dict[str, Dict[str, Any]],
+    properties: ViewingCalendar,
+    buyers: ViewingCalendar
+) -> None:
+    """Register a client and its viewings in the given indexes (first seller of a property wins)."""
+    by_id[client.get("client_id")] = client
+    if client.get("role") == "seller" and client.get("selling_property_id"):
+        sellers.setdefault(client["selling_property_id"], client)
+    for viewing in client.get("viewings", []):
+        properties.add(viewing.get("property_id"), viewing)
+        if client.get("role") == "buyer":
+            buyers.add(client.get("client_id"), viewing)
+
+def _index_client(client: Dict[str, Any]) -> None:
+    """Register a client and its viewings in the live indexes."""
+    _add_to_indexes(client, clients_by_id, sellers_by_property_id, property_calendar, buyer_calendar)
+
+def _unindex_seller(client: Dict[str, Any]) -> None:
+    """Drop a seller's property mapping, falling back to any other seller of that property."""
+    property_id = client.get("selling_property_id")
+    if sellers_by_property_id.get(property_id) is not client:
+        return
+    del sellers_by_property_id[property_id]
+    for other in clients_data:
+        if other is not client and other.get("role") == "seller" and other.get("selling_property_id") == property_id:
+            sellers_by_property_id[property_id] = other
+            break
+
+for _client in clients_data:
+    _index_client(_client)
+
+# --- ID sequences, seeded from the highest IDs already in use (kept in the
+# database with the SQLite backend, so every process draws from one counter) ---
+id_sequences = client_store if client_store is not None else SequenceAllocator(SEQUENCES_FILE)
+id_sequences.seed("client", max_id_number((c.get("client_id", "") for c in clients_data), "C"))
+id_sequences.seed("viewing", max_id_number(
+    (v.get("viewing_id", "") for c in clients_data for v in c.get("viewings", [])), "V", default=1000
+))
+
+# --- Writes by other processes (SQLite backend) ---
+_sync_lock = threading.Lock()
+
+def _sync_from_store() -> None:
+    """
+    Reload the clients if another process has committed to the database
+    since the last load, rebuilding the indexes and bumping the version of
+    every client that changed. No-op with the JSONL backend.
+    """
+    global _store_version
+    if client_store is None or client_store.data_version(wait=False) in (None, _store_version):
+        return
+    with _sync_lock:
+        version = client_store.data_version()
+        if version == _store_version:
+            return
+        _replace_clients(*client_store.load_versioned())
+        _store_version = version
+
+def _replace_clients(clients: List[Dict[str, Any]], shared: Optional[int] = None) -> None:
+    """
+    Swap in a freshly loaded client list, rebuilding the indexes and moving
+    every client that changed to the new version: the committed ``shared``
+    database version, or the next local one (caller holds _sync_lock).
+    """
+    global clients_data, clients_version
+    global clients_by_id, sellers_by_property_id, property_calendar, buyer_calendar
+    previous = dict(clients_by_id)
+    by_id, sellers = {}, {}
+    properties, buyers = ViewingCalendar(), ViewingCalendar()
+    for client in clients:
+        _add_to_indexes(client, by_id, sellers, properties, buyers)
+
+    clients_version = clients_version + 1 if shared is None else _committed_version(shared)
+    for client_id in set(previous) | set(by_id):
+        if previous.get(client_id) != by_id.get(client_id):
+            client_versions[client_id] = clients_version
+    clients_data = clients
+    clients_by_id, sellers_by_property_id = by_id, sellers
+    property_calendar, buyer_calendar = properties, buyers
+
+def _reload_clients() -> None:
+    """
+    Discard in-memory client changes that were never committed: reload the
+    clients from the database, or from the snapshot plus journal.
+    """
+    global _store_version
+    with _sync_lock:
+        if client_store is not None:
+            _replace_clients(*client_store.load_versioned())
+            _store_version = client_store.data_version()
+        else:
+            client_journal.wait()
+            _replace_clients(client_journal.replay(load_jsonl(CLIENTS_FILE)))
+    print(f"✅ Reloaded {len(clients_data)} clients after a failed commit")
+
+# --- Hot reload: a watcher rebuilds the snapshot off the request path ---
+_reload_lock = threading.Lock()
+_listings_watcher: Optional[FileWatcher] = None
+# Called with (previous, new) snapshot after each successful reload
+_reload_listeners: List[Callable[[ListingsSnapshot, ListingsSnapshot], Any]] = []
+
+def on_listings_reload(callback: Callable[[ListingsSnapshot, ListingsSnapshot], Any]) -> None:
+    """Register ``callback(previous, current)`` to run after every successful listings reload."""
+    _reload_listeners.append(callback)
+
+def reload_listings() -> bool:
+    """
+    Reload listings.jsonl into a new snapshot and swap it in.
+
+    Everything is built before the swap, so requests keep using the previous
+    snapshot until the new one is complete. An empty reload of a non-empty
+    dataset (e.g. a truncated file) is rejected.
+    """
+    global listings_snapshot
+    with _reload_lock:
+        previous = listings_snapshot
+        snapshot = _load_listings_snapshot(previous)
+        if not snapshot.listings and previous.listings:
+            print(f"❌ Ignoring reload of {LISTINGS_FILE}: no listings loaded, keeping version {previous.version}")
+            return False
+        listings_snapshot = snapshot
+        print(f"✅ Listings reloaded: {len(snapshot.listings)} listings (version {snapshot.version})")
+        # Still under the lock, so listeners see reloads one at a time and in order
+        for callback in _reload_listeners:
+            try:
+                callback(previous, snapshot)
+            except Exception as e:
+                print(f"❌ Error in listings reload listener {getattr(callback, '__name__', callback)}: {e}")
+    return True
+
+def start_listings_watcher(interval: float = 5.0) -> None:
+    """Poll listings.jsonl every ``interval`` seconds and hot-reload it when it changes."""
+    global _listings_watcher
+    if _listings_watcher is None and interval > 0:
+        _listings_watcher = FileWatcher(
+            LISTINGS_FILE, reload_listings, interval, listings_snapshot.source_signature
+        )
+        _listings_watcher.start()
+
+def get_listings_snapshot() -> ListingsSnapshot:
+    """Get the current listings snapshot (listings, indexes and version together)."""
+    return listings_snapshot
 
 def get_listings_data() -> List[Dict[str, Any]]:
     """Get all property listings."""
-    return listings_data
+    return listings_snapshot.listings
+
+def get_listing_index() -> ListingIndex:
+    """Get the columnar index over all property listings."""
+    return listings_snapshot.index
+
+def get_price_cube() -> PriceCube:
+    """Get the precomputed price aggregates over all property listings."""
+    return listings_snapshot.cube
+
+def get_listing_by_id(property_id: str) -> Optional[Dict[str, Any]]:
+    """Find a listing by property ID."""
+    return listings_snapshot.index.get_by_property_id(property_id)
+
+def get_listings_version() -> int:
+    """Current version of the listings data."""
+    return listings_snapshot.version
+
+def get_clients_version() -> int:
+    """Current version of the client data."""
+    _sync_from_store()
+    return clients_version
+
+def get_client_version(client_id: str) -> int:
+    """Version of one client record (0 if it has never existed)."""
+    _sync_from_store()
+    return client_versions.get(client_id, 0)
 
 def get_clients_data() -> List[Dict[str, Any]]:
     """Get all client records."""
+    _sync_from_store()
     return clients_data
 
+# Clients newest-first and (role, stage) counts, rebuilt lazily after any client change
+_clients_by_recency: List[Dict[str, Any]] = []
+_client_counts: Counter = Counter()
+_client_views_version = 0
+
+def _refresh_client_views() -> None:
+    global _clients_by_recency, _client_counts, _client_views_version
+    _sync_from_store()
+    version = clients_version
+    if _client_views_version != version:
+        # Work on a copy: writes may append to clients_data from the writer thread
+        clients = list(clients_data)
+        _clients_by_recency = sorted(clients, key=lambda c: c.get("created_at", ""), reverse=True)
+        _client_counts = Counter((c.get("role"), c.get("stage")) for c in clients)
+        _client_views_version = version
+
+def get_clients_by_recency() -> List[Dict[str, Any]]:
+    """Get all client records sorted by created_at (newest first)."""
+    _refresh_client_views()
+    return _clients_by_recency
+
+def get_client_counts() -> Counter:
+    """Get the number of clients per (role, stage) pair."""
+    _refresh_client_views()
+    return _client_counts
+
+def _bump_clients_version(client_id: Optional[str]) -> None:
+    """Give a client changed in memory (and the client list) a new, not yet committed version."""
+    global clients_version, _local_writes
+    if client_store is None:
+        clients_version += 1
+    else:
+        _local_writes += 1
+        local = _local_writes % ((1 << _LOCAL_VERSION_BITS) - 1) + 1
+        clients_version = (clients_version >> _LOCAL_VERSION_BITS << _LOCAL_VERSION_BITS) + local
+    client_versions[client_id] = clients_version
+
+def _apply_committed_versions(versions: Dict[str, int]) -> None:
+    """Move clients whose writes committed (client ID -> shared version) to the shared versions."""
+    global clients_version
+    if not versions:
+        return
+    clients_version = max(clients_version, _committed_version(max(versions.values())))
+    for client_id, shared in versions.items():
+        client_versions[client_id] = _committed_version(shared)
+
+def _persist_client(client: Dict[str, Any], record: Dict[str, Any]) -> bool:
+    """Save a changed client: upsert it into the database, or append ``record`` to the journal."""
+    if client_store is not None:
+        try:
+            shared = client_store.put(client)
+            if _pending_versions is not None:
+                _pending_versions[client.get("client_id")] = shared
+            else:
+                _apply_committed_versions({client.get("client_id"): shared})
+            return True
+        except sqlite3.Error as e:
+            print(f"❌ Error saving client {client.get('client_id')} to {CLIENTS_DB_FILE}: {e}")
+            return False
+    success = client_journal.append(record)
+    client_journal.maybe_compact(clients_data)
+    return success
+
 def add_client(client: Dict[str, Any]) -> bool:
-    """Add a new client record and persist to file."""
+    """Add a new client record and persist it."""
+    _sync_from_store()
     clients_data.append(client)
-    return save_jsonl(CLIENTS_FILE, clients_data)
+    _bump_clients_version(client.get("client_id"))
+    _index_client(client)
+    return _persist_client(client, {"op": "add", "client": client})
 
 def update_client(client_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    """Update an existing client record and persist to file."""
-    for i, client in enumerate(clients_data):
-        if client.get("client_id") == client_id:
-            clients_data[i].update(updates)
-            save_jsonl(CLIENTS_FILE, clients_data)
-            return clients_data[i]
-    return None
+    """Update an existing client record and persist the change."""
+    _sync_from_store()
+    client = clients_by_id.get(client_id)
+    if client is None:
+        return None
+    _bump_clients_version(client_id)
+    if "role" in updates or "selling_property_id" in updates:
+        _unindex_seller(client)
+    client.update(updates)
+    _index_client(client)
+    _persist_client(client, {"op": "update", "client_id": client_id, "updates": updates})
+    return client
+
+@contextmanager
+def write_batch() -> Iterator[None]:
+    """
+    Group-commit the client mutations made inside the block, raising if the
+    commit fails. With the JSONL backend, journal records are made durable
+    with one fsync on exit and ID sequence state is persisted once after
+    them. With SQLite, the block is one transaction holding the database
+    write lock, started by catching up on other processes' writes, so a
+    read-modify-write inside it cannot lose a concurrent update.
+
+    If the commit fails, the block's in-memory changes (clients, indexes,
+    calendars and ID sequences) are undone by reloading the committed state,
+    so reads never see a write that was reported as failed. Clients written
+    with SQLite only take the shared versions their writes committed at once
+    the transaction commits.
+    """
+    global _pending_versions
+    if client_store is not None:
+        try:
+            with client_store.transaction():
+                _sync_from_store()
+                _pending_versions = {}
+                yield
+                committed = _pending_versions
+        except Exception:
+            _reload_clients()
+            raise
+        finally:
+            _pending_versions = None
+        _apply_committed_versions(committed)
+        return
+    with id_sequences.deferred():
+        sequences = id_sequences.snapshot()
+        try:
+            with client_journal.batch():
+                yield
+        except Exception:
+            id_sequences.restore(sequences)
+            _reload_clients()
+            raise
+    client_journal.maybe_compact(clients_data)
 
 def get_client_by_id(client_id: str) -> Optional[Dict[str, Any]]:
     """Find a client by ID."""
-    for client in clients_data:
-        if client.get("client_id") == client_id:
-            return client
+    _sync_from_store()
+    return clients_by_id.get(client_id)
+
+def get_seller_by_property_id(property_id: str) -> Optional[Dict[str, Any]]:
+    """Find the seller client for a property."""
+    _sync_from_store()
+    return sellers_by_property_id.get(property_id)
+
+def find_viewing_conflict(property_id: str, buyer_client_id: str, when: datetime) -> Optional[Dict[str, Any]]:
+    """
+    Find a booked viewing that clashes with ``when``, either on the same property
+    or for the same buyer. Returns the clashing viewing plus a "conflict_with"
+    key ("property" or "buyer"), or None.
+    """
+    _sync_from_store()
+    existing = property_calendar.find_conflict(property_id, when)
+    if existing is not None:
+        return {**existing, "conflict_with": "property"}
+    existing = buyer_calendar.find_conflict(buyer_client_id, when)
+    if existing is not None:
+        return {**existing, "conflict_with": "buyer"}
     return None
 
 def get_next_client_id() -> str:
-    """Generate next client ID (C0001, C0002, etc.)."""
-    if not clients_data:
-        return "C0001"
-    
-    # Extract numeric part from existing IDs
-    max_num = 0
-    for client in clients_data:
-        client_id = client.get("client_id", "")
-        if client_id.startswith("C"):
-            try:
-                num = int(client_id[1:])
-                max_num = max(max_num, num)
-            except ValueError:
-                continue
-    
-    return f"C{max_num + 1:04d}"
+    """Allocate the next client ID (C0001, C0002, etc.)."""
+    return f"C{id_sequences.next('client'):04d}"
 
 def get_next_viewing_id() -> str:
-    """Generate next viewing ID (V1001, V1002, etc.)."""
-    max_num = 1000
-    
-    # Check all viewings across all clients
-    for client in clients_data:
-        for viewing in client.get("viewings", []):
-            viewing_id = viewing.get("viewing_id", "")
-            if viewing_id.startswith("V"):
-                try:
-                    num = int(viewing_id[1:])
-                    max_num = max(max_num, num)
-                except ValueError:
-                    continue
-    
-    return f"V{max_num + 1}"
\ No newline at end of file
+    """Allocate the next viewing ID (V1001, V1002, etc.)."""
+    return f"V{id_sequences.next('viewing')}"
@@ -0,0 +1,159 @@
+"""
+Spatial grid over listing coordinates.
+
+The listing index parses each listing's lat/lng strings into float columns
+(NaN where a listing has none). The grid buckets every located row into
+fixed-size lat/lng cells and keeps the rows sorted by cell key. Keys are
+row-major (cell row * stride + cell column), so the cells of one grid row
+that overlap a query rectangle form one contiguous slice, found by binary
+search. A radius search gathers candidates from the cells covering the
+circle's bounding box and computes great-circle distance for those rows
+only, never for the whole dataset.
+
+Longitudes are not wrapped at the antimeridian (the listings are all in the UK).
+"""
+import math
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_MILES = 3958.8
+
+# Cell edge in degrees: about 1.4 miles north-south, 0.85 miles east-west in the Midlands
+DEFAULT_CELL_DEGREES = 0.02
+
+# Radius used when ``near`` does not give one
+DEFAULT_RADIUS_MILES = 2.0
+MAX_RADIUS_MILES = 100.0
+
+# Cell indices are shifted by _OFFSET so keys stay non-negative
+_OFFSET = 1 << 24
+_STRIDE = 1 << 26
+
+
+def haversine_miles(lat1: float, lng1: float, lat2: np.ndarray, lng2: np.ndarray) -> np.ndarray:
+    """Great-circle distance in miles from one point to arrays of points."""
+    lat1, lng1 = math.radians(lat1), math.radians(lng1)
+    lat2, lng2 = np.radians(lat2), np.radians(lng2)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def parse_coordinate(value: Any) -> float:
+    """A listing's lat or lng as a float, NaN if missing or unparseable."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def parse_near(near: Dict[str, Any]) -> Tuple[float, float, float]:
+    """
+    Validate a ``near`` argument ({"lat", "lng", optional "radius_miles"}) and
+    return (lat, lng, radius_miles). Raises ValueError if it is malformed.
+    """
+    if not isinstance(near, dict) or "lat" not in near or "lng" not in near:
+        raise ValueError("near must be an object with 'lat' and 'lng' (and optionally 'radius_miles')")
+    radius = near.get("radius_miles")
+    try:
+        lat, lng = float(near["lat"]), float(near["lng"])
+        radius = DEFAULT_RADIUS_MILES if radius is None else float(radius)
+    except (TypeError, ValueError):
+        raise ValueError("near lat, lng and radius_miles must be numbers")
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError("near lat must be within -90..90 and lng within -180..180")
+    if not 0 < radius <= MAX_RADIUS_MILES:
+        raise ValueError(f"near radius_miles must be greater than 0 and at most {MAX_RADIUS_MILES:g}")
+    return lat, lng, radius
+
+
+def parse_bbox(bbox: List[Any]) -> Tuple[float, float, float, float]:
+    """
+    Validate a ``bbox`` argument ([south, west, north, east]) and return it
+    as floats. Raises ValueError if it is malformed.
+    """
+    try:
+        south, west, north, east = (float(value) for value in bbox)
+    except (TypeError, ValueError):
+        raise ValueError("bbox must be four numbers: [south, west, north, east]")
+    if not (-90 <= south <= 90 and -90 <= north <= 90 and -180 <= west <= 180 and -180 <= east <= 180):
+        raise ValueError("bbox latitudes must be within -90..90 and longitudes within -180..180")
+    if south > north or west > east:
+        raise ValueError("bbox must be [south, west, north, east] with south <= north and west <= east")
+    return south, west, north, east
+
+
+class GeoGrid:
+    """Uniform lat/lng grid over the located rows of a listing index."""
+
+    def __init__(self, lat: np.ndarray, lng: np.ndarray, cell_degrees: float = DEFAULT_CELL_DEGREES):
+        self.lat = lat
+        self.lng = lng
+        self.size = len(lat)
+        self.cell_degrees = cell_degrees
+        located = np.flatnonzero(np.isfinite(lat) & np.isfinite(lng))
+        keys = self._key(self._cell(lat[located]), self._cell(lng[located]))
+        order = np.argsort(keys, kind="stable")
+        self.rows = located[order]
+        self.keys = keys[order]
+        # Extent of the populated cells, so a box query never walks empty grid rows
+        if len(located):
+            cell_lat, cell_lng = self._cell(lat[located]), self._cell(lng[located])
+            self.cell_bounds = (int(cell_lat.min()), int(cell_lng.min()), int(cell_lat.max()), int(cell_lng.max()))
+        else:
+            self.cell_bounds = None
+
+    def _cell(self, degrees):
+        return np.floor(np.asarray(degrees) / self.cell_degrees).astype(np.int64)
+
+    @staticmethod
+    def _key(cell_lat, cell_lng):
+        return (cell_lat + _OFFSET) * _STRIDE + (cell_lng + _OFFSET)
+
+    def rows_in_box(self, south: float, west: float, north: float, east: float) -> np.ndarray:
+        """Row ids (ascending) located inside the box, edges included."""
+        if self.cell_bounds is None:
+            return np.zeros(0, dtype=np.int64)
+        min_lat, min_lng, max_lat, max_lng = self.cell_bounds
+        cell_rows = np.arange(max(int(self._cell(south)), min_lat), min(int(self._cell(north)), max_lat) + 1)
+        west_cell = max(int(self._cell(west)), min_lng)
+        east_cell = min(int(self._cell(east)), max_lng)
+        if west_cell > east_cell:
+            return np.zeros(0, dtype=np.int64)
+        starts = np.searchsorted(self.keys, self._key(cell_rows, west_cell), side="left")
+        ends = np.searchsorted(self.keys, self._key(cell_rows, east_cell), side="right")
+        slices = [self.rows[lo:hi] for lo, hi in zip(starts.tolist(), ends.tolist()) if hi > lo]
+        if not slices:
+            return np.zeros(0, dtype=np.int64)
+        candidates = np.concatenate(slices)
+        lat, lng = self.lat[candidates], self.lng[candidates]
+        inside = (lat >= south) & (lat <= north) & (lng >= west) & (lng <= east)
+        return np.sort(candidates[inside])
+
+    def bbox_mask(self, south: float, west: float, north: float, east: float) -> np.ndarray:
+        """Boolean mask of rows located inside the box."""
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.rows_in_box(south, west, north, east)] = True
+        return mask
+
+    def near(
+        self,
+        lat: float,
+        lng: float,
+        radius_miles: float,
+        mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Row ids within ``radius_miles`` of (lat, lng), allowed by ``mask``,
+        nearest first (ties in row order), with their distances in miles.
+        """
+        dlat = math.degrees(radius_miles / EARTH_RADIUS_MILES)
+        dlng = math.degrees(radius_miles / (EARTH_RADIUS_MILES * max(math.cos(math.radians(lat)), 1e-6)))
+        candidates = self.rows_in_box(lat - dlat, lng - min(dlng, 180.0), lat + dlat, lng + min(dlng, 180.0))
+        if mask is not None:
+            candidates = candidates[mask[candidates]]
+        distances = haversine_miles(lat, lng, self.lat[candidates], self.lng[candidates])
+        within = distances <= radius_miles
+        candidates, distances = candidates[within], distances[within]
+        order = np.lexsort((candidates, distances))
+        return candidates[order], distances[order]
@@ -0,0 +1,104 @@
+"""
+Monotonic ID sequences for client and viewing IDs.
+
+Each named counter is seeded from the highest ID already present in the data
+at startup and advanced under a lock, so allocating an ID is O(1) and two
+requests in flight never receive the same one. The high-water marks are
+persisted on every allocation, so an ID handed out for a saved record is
+never reissued after a restart. Inside ``deferred()`` the state is persisted
+once on exit instead, alongside a group commit; if that commit fails,
+``restore()`` rewinds the counters, so the IDs of the records it never saved
+are handed out again.
+"""
+import json
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional
+
+from client_journal import write_jsonl_atomic
+
+
+def max_id_number(ids: Iterable[str], prefix: str, default: int = 0) -> int:
+    """Highest numeric suffix among IDs like "C0012" with the given prefix."""
+    highest = default
+    for value in ids:
+        if value and value.startswith(prefix):
+            try:
+                highest = max(highest, int(value[len(prefix):]))
+            except ValueError:
+                continue
+    return highest
+
+
+class SequenceAllocator:
+    """Named monotonic counters persisted to a small JSON state file."""
+
+    def __init__(self, state_path: str):
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self.values: Dict[str, int] = {}
+        # Thread whose allocations are persisted at the end of deferred()
+        self._defer_owner: Optional[int] = None
+        self._dirty = False
+        try:
+            with open(state_path, "r") as f:
+                self.values = {name: int(value) for name, value in json.load(f).items()}
+        except FileNotFoundError:
+            pass
+        except (ValueError, AttributeError):
+            print(f"Warning: Ignoring unreadable sequence state in {state_path}")
+
+    def seed(self, name: str, value: int) -> None:
+        """Raise a counter to at least ``value`` (never lowers it)."""
+        with self._lock:
+            self.values[name] = max(self.values.get(name, 0), value)
+
+    def next(self, name: str) -> int:
+        """Atomically advance a counter and return the new value."""
+        with self._lock:
+            value = self.values.get(name, 0) + 1
+            self.values[name] = value
+            if self._defer_owner == threading.get_ident():
+                self._dirty = True
+            else:
+                self._persist()
+            return value
+
+    def _persist(self) -> None:
+        """Write the high-water marks (caller holds the lock)."""
+        try:
+            write_jsonl_atomic(self.state_path, [json.dumps(self.values)])
+        except OSError as e:
+            print(f"❌ Error saving sequence state to {self.state_path}: {e}")
+
+    def snapshot(self) -> Dict[str, int]:
+        """Current counter values, for ``restore``."""
+        with self._lock:
+            return dict(self.values)
+
+    def restore(self, values: Dict[str, int]) -> None:
+        """
+        Set the counters back to a ``snapshot`` (undoing allocations whose
+        records were never committed).
+        """
+        with self._lock:
+            self.values = dict(values)
+            if self._defer_owner == threading.get_ident():
+                self._dirty = True
+            else:
+                self._persist()
+
+    @contextmanager
+    def deferred(self) -> Iterator[None]:
+        """Persist this thread's allocations inside the block once, on exit."""
+        with self._lock:
+            self._defer_owner = threading.get_ident()
+            self._dirty = False
+        try:
+            yield
+        finally:
+            with self._lock:
+                if self._dirty:
+                    self._persist()
+                self._defer_owner = None
+                self._dirty = False
@@ -0,0 +1,89 @@
+"""
+JSON encoding for tool responses.
+
+Uses orjson or msgspec when one is installed and falls back to the stdlib
+encoder otherwise. Output is compact (no indentation or spaces after
+separators) unless ``indent`` is asked for. NumPy scalars and arrays are
+encoded as plain numbers and lists.
+
+``EncodedCache`` keeps encoded text for responses that only change with the
+data version (e.g. the schema, or an average-price breakdown), so each is
+serialized once per version rather than once per call.
+"""
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Tuple
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+if orjson is not None:
+    BACKEND = "orjson"
+elif msgspec is not None:
+    BACKEND = "msgspec"
+else:
+    BACKEND = "json"
+
+
+def _default(value: Any) -> Any:
+    """Fallback for types the encoders do not know natively."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+if msgspec is not None:
+    _msgspec_encoder = msgspec.json.Encoder(enc_hook=_default)
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    """Encode ``obj`` as JSON text (compact unless ``indent`` is set)."""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option).decode("utf-8")
+    if msgspec is not None:
+        encoded = _msgspec_encoder.encode(obj)
+        if indent:
+            encoded = msgspec.json.format(encoded, indent=2)
+        return encoded.decode("utf-8")
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=_default)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_default)
+
+
+class EncodedCache:
+    """Encoded JSON text per key, valid for one data version, with LRU eviction."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[Any, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: Any, build: Callable[[], Any]) -> str:
+        """Return the encoded ``build()`` result for ``key`` at ``version``, encoding it only on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1]
+        text = dumps(build())
+        with self._lock:
+            self._entries[key] = (version, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return text
@@ -0,0 +1,173 @@
+"""
+New-listing alerts: which buyers newly match after a listings reload.
+
+Re-running match_client for every buyer after each feed update would scan
+all listings once per buyer. Instead, each reload is diffed against the
+previous snapshot. Only listings that could newly match someone are kept:
+new rows, price drops, and listings back on the market. Each of those is
+looked up in a range index over buyer criteria.
+
+The buyer index groups buyers by minimum bedrooms and sorts each group by
+budget. The buyers matching a listing are then, for every group asking for
+no more bedrooms than it has, the suffix of budgets at or above its price,
+found by binary search. A buyer newly matches when they match the listing
+now but did not match its previous version.
+
+Alerts go to an in-memory feed with increasing ids, so the alerts tool can
+page through them with a ``since`` cursor. The feed is per process and
+bounded; the oldest alerts drop off first.
+"""
+import threading
+from collections import deque
+from datetime import datetime
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+import numpy as np
+
+from listings_snapshot import ListingsSnapshot
+
+
+class BuyerIndex:
+    """Buyers grouped by minimum bedrooms, each group sorted by budget."""
+
+    def __init__(self, buyers: List[Dict[str, Any]]):
+        self.buyers = buyers
+        budgets = np.array([buyer.get("budget_max") or np.inf for buyer in buyers], dtype=np.float64)
+        min_bedrooms = np.array([buyer.get("min_bedrooms") or 0 for buyer in buyers], dtype=np.int64)
+        # (minimum bedrooms, sorted budgets, buyer positions in the same order)
+        self.groups: List[Tuple[int, np.ndarray, np.ndarray]] = []
+        for bedrooms in np.unique(min_bedrooms).tolist():
+            members = np.flatnonzero(min_bedrooms == bedrooms)
+            members = members[np.argsort(budgets[members], kind="stable")]
+            self.groups.append((bedrooms, budgets[members], members))
+
+    def matching(self, price: int, bedrooms: int) -> np.ndarray:
+        """Positions (ascending) of the buyers whose budget and bedroom needs a listing meets."""
+        found = [
+            members[np.searchsorted(budgets, price, side="left"):]
+            for min_bedrooms, budgets, members in self.groups
+            if min_bedrooms <= bedrooms
+        ]
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        return np.sort(np.concatenate(found))
+
+
+def listing_changes(previous: ListingsSnapshot, current: ListingsSnapshot) -> List[Tuple[int, Optional[int], str]]:
+    """
+    (current row, previous row or None, reason) for each listing in
+    ``current`` that is unsold and is new, back on the market, or cheaper.
+    """
+    old, new = previous.index, current.index
+    changes = []
+    for row in np.flatnonzero(~new.sold).tolist():
+        old_row = old.row_by_property_id.get(new.listings[row].get("property_id"))
+        if old_row is None:
+            changes.append((row, None, "new_listing"))
+        elif old.sold[old_row]:
+            changes.append((row, old_row, "back_on_market"))
+        elif new.price[row] < old.price[old_row]:
+            changes.append((row, old_row, "price_drop"))
+    return changes
+
+
+class AlertFeed:
+    """Bounded, append-only feed of alerts with increasing ids."""
+
+    def __init__(self, max_alerts: int = 1000):
+        self._alerts: deque = deque(maxlen=max_alerts)
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def extend(self, alerts: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            for alert in alerts:
+                alert["alert_id"] = self._next_id
+                self._next_id += 1
+                self._alerts.append(alert)
+
+    def query(
+        self,
+        client_id: Optional[str] = None,
+        property_id: Optional[str] = None,
+        since: int = 0,
+        limit: int = 20
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Alerts after ``since`` (oldest first) matching the filters, and the id to resume from."""
+        with self._lock:
+            alerts = list(self._alerts)
+        found = []
+        last_id = since
+        for alert in alerts:
+            if alert["alert_id"] <= since:
+                continue
+            if len(found) == limit:
+                break
+            last_id = alert["alert_id"]
+            if client_id and alert["client_id"] != client_id:
+                continue
+            if property_id and alert["property_id"] != property_id:
+                continue
+            found.append(alert)
+        return found, last_id
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+
+class AlertPipeline:
+    """Turns listings reloads into buyer alerts, reusing the buyer index until clients change."""
+
+    def __init__(
+        self,
+        get_buyers: Callable[[], List[Dict[str, Any]]],
+        get_buyers_version: Callable[[], int],
+        feed: Optional[AlertFeed] = None
+    ):
+        self.get_buyers = get_buyers
+        self.get_buyers_version = get_buyers_version
+        self.feed = feed if feed is not None else AlertFeed()
+        self._buyer_index: Optional[BuyerIndex] = None
+        self._buyers_version: Optional[int] = None
+
+    def buyer_index(self) -> BuyerIndex:
+        version = self.get_buyers_version()
+        if self._buyer_index is None or version != self._buyers_version:
+            self._buyer_index = BuyerIndex(self.get_buyers())
+            self._buyers_version = version
+        return self._buyer_index
+
+    def process(self, previous: ListingsSnapshot, current: ListingsSnapshot) -> int:
+        """Alert every buyer who newly matches a changed listing; returns how many alerts."""
+        changes = listing_changes(previous, current)
+        if not changes:
+            return 0
+        buyers = self.buyer_index()
+        old, new = previous.index, current.index
+        created_at = datetime.utcnow().isoformat() + "Z"
+        alerts = []
+        for row, old_row, reason in changes:
+            price, bedrooms = int(new.price[row]), int(new.bedrooms[row])
+            matched = buyers.matching(price, bedrooms)
+            if reason == "price_drop":
+                # Buyers who already matched at the old price were alerted before
+                before = buyers.matching(int(old.price[old_row]), int(old.bedrooms[old_row]))
+                matched = np.setdiff1d(matched, before, assume_unique=True)
+            listing = new.listings[row]
+            for position in matched.tolist():
+                buyer = buyers.buyers[position]
+                alerts.append({
+                    "created_at": created_at,
+                    "reason": reason,
+                    "client_id": buyer.get("client_id"),
+                    "client_name": buyer.get("full_name"),
+                    "property_id": listing.get("property_id"),
+                    "ld_name": listing.get("ld_name"),
+                    "postcode": listing.get("postcode"),
+                    "price_amount": price,
+                    "previous_price": None if old_row is None else int(old.price[old_row]),
+                    "bedrooms": bedrooms,
+                    "listings_version": current.version,
+                })
+        self.feed.extend(alerts)
+        return len(alerts)
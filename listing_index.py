@@ -0,0 +1,397 @@
+"""
+Columnar listings store.
+
+Built once when the listings are loaded. Numeric and boolean fields are held
+as typed NumPy arrays and string fields as encoded categories, so search
+filters run as vectorized boolean masks instead of a per-row Python loop.
+"""
+from typing import List, Dict, Any, Optional, Set, Tuple
+import bisect
+import re
+import numpy as np
+
+from geo_index import parse_coordinate
+
+# Sentinel for a missing boolean value (garden/parking not recorded)
+MISSING_FLAG = -1
+
+# Columns query results can be ordered by
+SORT_FIELDS = ("price_amount", "bedrooms", "scraped_at")
+
+# Listing fields returned per result profile. "card" is what the property
+# widget renders; "full" (None) returns the listing exactly as loaded.
+CARD_FIELDS = (
+    "property_id", "detail_url", "ld_name", "ld_image", "street_address",
+    "price_text", "price_amount", "bedrooms", "bathrooms", "property_type",
+    "postcode", "garden", "parking", "status", "lat", "lng",
+)
+PROFILES = {"card": CARD_FIELDS, "full": None}
+
+# Rows examined per step when collecting the first k matches in sorted order
+_TOP_K_CHUNK = 256
+
+# Plain column arrays of an index (see ListingIndex.to_state)
+_ARRAY_COLUMNS = (
+    "price", "has_price", "bedrooms", "bathrooms", "garden", "parking", "scraped_at_rank",
+    "postcode_codes", "postcode_rows_sorted", "postcode_bounds", "type_codes", "lat", "lng",
+    "sold",
+)
+
+# A complete UK postcode written without its space, e.g. "DY47LG"
+_FULL_POSTCODE = re.compile(r"^[A-Z]{1,2}[0-9][A-Z0-9]?[0-9][A-Z]{2}$")
+
+
+def normalize_postcode(value: str) -> str:
+    """
+    Normalize a full or partial UK postcode for prefix matching.
+
+    Upper-cases, collapses whitespace to a single space and restores the
+    space before the inward code of a complete postcode ("dy47lg" -> "DY4 7LG").
+    A space after an outward code alone is kept, so "LE1 " stays a whole
+    district and does not also match LE10, LE12, ...
+    """
+    text = value or ""
+    parts = text.upper().split()
+    if len(parts) == 1 and _FULL_POSTCODE.match(parts[0]):
+        return f"{parts[0][:-3]} {parts[0][-3:]}"
+    if len(parts) == 1 and text[-1].isspace():
+        return parts[0] + " "
+    return " ".join(parts)
+
+
+# Multi-word property type phrases folded into a single token before splitting
+_TYPE_PHRASES = [
+    (re.compile(r"semi[\s-]*detached"), "semidetached"),
+    (re.compile(r"town\s+house"), "townhouse"),
+]
+
+# Token -> canonical family terms it is indexed (and searched) under
+_TYPE_FAMILIES = {
+    "apartment": ("flat",),
+    "flat": ("flat",),
+    "semi": ("semi",),
+    "semidetached": ("semi",),
+    "terrace": ("terraced",),
+    "terraced": ("terraced",),
+    "townhouse": ("townhouse", "house"),
+    "coachhouse": ("coachhouse", "house"),
+}
+
+
+def property_type_terms(value: str) -> Set[str]:
+    """
+    Tokenize a property type into canonical family terms.
+
+    "Apartment - First Floor" -> {"flat", "first", "floor"},
+    "House - Semi-Detached" -> {"house", "semi"}.
+    """
+    text = (value or "").lower()
+    for pattern, replacement in _TYPE_PHRASES:
+        text = pattern.sub(replacement, text)
+    terms = set()
+    for token in re.findall(r"[a-z0-9]+", text):
+        terms.update(_TYPE_FAMILIES.get(token, (token,)))
+    return terms
+
+
+def project_listing(listing: Dict[str, Any], fields: Optional[Tuple[str, ...]]) -> Dict[str, Any]:
+    """Subset of a listing's fields (``fields=None`` returns the listing itself)."""
+    if fields is None:
+        return listing
+    return {field: listing[field] for field in fields if field in listing}
+
+
+def resolve_fields(profile: str = "card", fields: Optional[List[str]] = None) -> Optional[Tuple[str, ...]]:
+    """
+    Fields to return for a profile, or an explicit field list (property_id is
+    always included). Raises ValueError for an unknown profile.
+    """
+    if fields:
+        return ("property_id",) + tuple(f for f in fields if f != "property_id")
+    if profile not in PROFILES:
+        raise ValueError(f"profile must be one of: {', '.join(PROFILES)}")
+    return PROFILES[profile]
+
+
+def _flag(value: Any) -> int:
+    """Encode a boolean field as 1/0, or MISSING_FLAG when not a bool."""
+    if value is True:
+        return 1
+    if value is False:
+        return 0
+    return MISSING_FLAG
+
+
+class ListingIndex:
+    """
+    Column-oriented view over a list of listing dicts.
+
+    Row ``i`` of every column describes ``listings[i]``; the original dicts are
+    kept so matches can be returned exactly as loaded.
+    """
+
+    def __init__(self, listings: List[Dict[str, Any]]):
+        self.listings = listings
+        self.size = len(listings)
+        # Card projections, built on first use per row
+        self._cards: List[Optional[Dict[str, Any]]] = [None] * self.size
+
+        # property_id -> row id (first occurrence wins)
+        self.row_by_property_id: Dict[str, int] = {}
+        for row, listing in enumerate(listings):
+            self.row_by_property_id.setdefault(listing.get("property_id"), row)
+
+        self.price = np.array([l.get("price_amount") or 0 for l in listings], dtype=np.int64)
+        self.has_price = np.array(["price_amount" in l for l in listings], dtype=bool)
+        self.bedrooms = np.array([l.get("bedrooms") or 0 for l in listings], dtype=np.int64)
+        self.bathrooms = np.array([l.get("bathrooms") or 0 for l in listings], dtype=np.int64)
+        self.garden = np.array([_flag(l.get("garden")) for l in listings], dtype=np.int8)
+        self.parking = np.array([_flag(l.get("parking")) for l in listings], dtype=np.int8)
+        _, self.scraped_at_rank = self._encode([l.get("scraped_at") or "" for l in listings])
+        # Sold or under offer ("Sold Subject to Contract"), never offered to buyers
+        self.sold = np.array(["sold" in (l.get("status") or "").lower() for l in listings], dtype=bool)
+        # Coordinates are stored as strings in the feed; NaN where missing
+        self.lat = np.array([parse_coordinate(l.get("lat")) for l in listings], dtype=np.float64)
+        self.lng = np.array([parse_coordinate(l.get("lng")) for l in listings], dtype=np.float64)
+
+        # Presorted permutations per sort field: (ascending, descending), both
+        # stable so ties keep file order
+        self.sort_orders: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for field, column in (
+            ("price_amount", self.price),
+            ("bedrooms", self.bedrooms),
+            ("scraped_at", self.scraped_at_rank.astype(np.int64)),
+        ):
+            self.sort_orders[field] = (
+                np.argsort(column, kind="stable"),
+                np.argsort(-column, kind="stable"),
+            )
+
+        # Categorical columns: one code per row, one label per distinct value.
+        # Labels come back sorted, so a postcode prefix maps to a contiguous
+        # range of codes.
+        self.postcode_labels, self.postcode_codes = self._encode(
+            [normalize_postcode(l.get("postcode", "")) for l in listings]
+        )
+        # Row ids grouped by postcode code; rows for codes [lo, hi) are
+        # postcode_rows_sorted[postcode_bounds[lo]:postcode_bounds[hi]]
+        self.postcode_rows_sorted = np.argsort(self.postcode_codes, kind="stable")
+        self.postcode_bounds = np.searchsorted(
+            self.postcode_codes[self.postcode_rows_sorted],
+            np.arange(len(self.postcode_labels) + 1),
+        )
+        self.type_labels, self.type_codes = self._encode(
+            [l.get("property_type", "") or "" for l in listings]
+        )
+        # Inverted index: canonical type term -> row ids (ascending)
+        label_terms = [property_type_terms(label) for label in self.type_labels]
+        postings: Dict[str, List[int]] = {}
+        for row, code in enumerate(self.type_codes.tolist()):
+            for term in label_terms[code]:
+                postings.setdefault(term, []).append(row)
+        self.type_postings = {
+            term: np.array(rows, dtype=np.int64) for term, rows in postings.items()
+        }
+
+    def to_state(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Split the index into named NumPy arrays and plain Python state, for caching."""
+        arrays = {name: getattr(self, name) for name in _ARRAY_COLUMNS}
+        for field, (ascending, descending) in self.sort_orders.items():
+            arrays[f"sort.{field}.asc"] = ascending
+            arrays[f"sort.{field}.desc"] = descending
+        for term, rows in self.type_postings.items():
+            arrays[f"type.{term}"] = rows
+        state = {
+            "postcode_labels": self.postcode_labels,
+            "type_labels": self.type_labels,
+            "row_by_property_id": self.row_by_property_id,
+        }
+        return arrays, state
+
+    @classmethod
+    def from_state(
+        cls,
+        listings: List[Dict[str, Any]],
+        arrays: Dict[str, np.ndarray],
+        state: Dict[str, Any]
+    ) -> "ListingIndex":
+        """Rebuild an index over ``listings`` from the output of ``to_state`` without recomputing it."""
+        index = cls.__new__(cls)
+        index.listings = listings
+        index.size = len(listings)
+        index._cards = [None] * index.size
+        for name in _ARRAY_COLUMNS:
+            setattr(index, name, arrays[name])
+        index.sort_orders = {
+            field: (arrays[f"sort.{field}.asc"], arrays[f"sort.{field}.desc"]) for field in SORT_FIELDS
+        }
+        index.type_postings = {
+            name[len("type."):]: rows for name, rows in arrays.items() if name.startswith("type.")
+        }
+        index.postcode_labels = state["postcode_labels"]
+        index.type_labels = state["type_labels"]
+        index.row_by_property_id = state["row_by_property_id"]
+        return index
+
+    @staticmethod
+    def _encode(values: List[str]):
+        """Encode strings as (labels, codes) so that labels[codes[i]] == values[i]."""
+        if not values:
+            return [], np.zeros(0, dtype=np.int32)
+        labels, codes = np.unique(np.array(values, dtype=object), return_inverse=True)
+        return list(labels), codes.astype(np.int32)
+
+    def postcode_code_range(self, postcode: str) -> Tuple[int, int]:
+        """Range [lo, hi) of postcode codes whose label starts with ``postcode`` (bisect)."""
+        prefix = normalize_postcode(postcode)
+        lo = bisect.bisect_left(self.postcode_labels, prefix)
+        hi = bisect.bisect_left(self.postcode_labels, prefix + "\uffff", lo)
+        return lo, hi
+
+    def postcode_rows(self, postcode: str) -> np.ndarray:
+        """Row ids (in file order) whose postcode starts with ``postcode``."""
+        lo, hi = self.postcode_code_range(postcode)
+        if lo >= hi:
+            return np.zeros(0, dtype=np.int64)
+        rows = self.postcode_rows_sorted[self.postcode_bounds[lo]:self.postcode_bounds[hi]]
+        return np.sort(rows)
+
+    def type_terms(self) -> List[str]:
+        """All searchable property type terms, sorted."""
+        return sorted(self.type_postings)
+
+    def type_rows(self, property_type: str) -> np.ndarray:
+        """
+        Row ids (in file order) whose property type contains every term of ``property_type``.
+
+        Each term is a posting-list lookup; a term that is not a whole indexed
+        word (e.g. "bung", "apart") falls back to the rows whose indexed words
+        or raw type label contain it, so partial words match as a substring
+        search over the label would.
+        """
+        terms = property_type_terms(property_type)
+        if not terms:
+            return np.arange(self.size, dtype=np.int64)
+        rows = None
+        for term in terms:
+            if term in self.type_postings:
+                term_rows = self.type_postings[term]
+            else:
+                partial = [r for t, r in self.type_postings.items() if term in t]
+                # Raw label words too: "apartment" is indexed as "flat"
+                codes = [code for code, label in enumerate(self.type_labels) if term in label.lower()]
+                if codes:
+                    partial.append(np.flatnonzero(np.isin(self.type_codes, codes)))
+                term_rows = np.unique(np.concatenate(partial)) if partial else np.zeros(0, dtype=np.int64)
+            rows = term_rows if rows is None else np.intersect1d(rows, term_rows, assume_unique=True)
+        return rows
+
+    def filter_mask(
+        self,
+        postcode: Optional[str] = None,
+        property_type: Optional[str] = None,
+        max_price: Optional[int] = None,
+        min_bedrooms: Optional[int] = None,
+        has_garden: Optional[bool] = None,
+        has_parking: Optional[bool] = None,
+        min_price: Optional[int] = None,
+        max_bedrooms: Optional[int] = None,
+    ) -> np.ndarray:
+        """Boolean mask of rows matching every supplied filter (same rules as query_listings)."""
+        mask = np.ones(self.size, dtype=bool)
+
+        if min_price is not None:
+            mask &= self.price >= min_price
+        if max_price is not None:
+            mask &= self.price <= max_price
+        if min_bedrooms is not None:
+            mask &= self.bedrooms >= min_bedrooms
+        if max_bedrooms is not None:
+            mask &= self.bedrooms <= max_bedrooms
+        if has_garden is not None:
+            mask &= self.garden == int(has_garden)
+        if has_parking is not None:
+            mask &= self.parking == int(has_parking)
+
+        if postcode is not None:
+            lo, hi = self.postcode_code_range(postcode)
+            mask &= (self.postcode_codes >= lo) & (self.postcode_codes < hi)
+        if property_type is not None:
+            type_mask = np.zeros(self.size, dtype=bool)
+            type_mask[self.type_rows(property_type)] = True
+            mask &= type_mask
+
+        return mask
+
+    def top_k(
+        self,
+        mask: np.ndarray,
+        k: int,
+        sort_by: Optional[str] = None,
+        descending: bool = False,
+    ) -> np.ndarray:
+        """First ``k`` matching row ids, in ``sort_by`` order (file order if None)."""
+        return self.scan(mask, k, sort_by=sort_by, descending=descending)[0]
+
+    def scan(
+        self,
+        mask: np.ndarray,
+        k: int,
+        sort_by: Optional[str] = None,
+        descending: bool = False,
+        start: int = 0,
+    ) -> Tuple[np.ndarray, int]:
+        """
+        Up to ``k`` matching row ids in ``sort_by`` order, starting at position
+        ``start`` of that order, plus the position to resume from.
+
+        Walks the presorted permutation in chunks and stops as soon as ``k``
+        matches are found, so no full sort or full materialization is needed.
+        The resume position equals ``self.size`` once the order is exhausted.
+        """
+        if sort_by is None:
+            order = None
+        else:
+            ascending_order, descending_order = self.sort_orders[sort_by]
+            order = descending_order if descending else ascending_order
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), start
+
+        found = []
+        remaining = k
+        position = self.size
+        for chunk_start in range(start, self.size, _TOP_K_CHUNK):
+            chunk_end = min(chunk_start + _TOP_K_CHUNK, self.size)
+            if order is None:
+                block = np.arange(chunk_start, chunk_end)
+            else:
+                block = order[chunk_start:chunk_end]
+            offsets = np.flatnonzero(mask[block])[:remaining]
+            found.append(block[offsets])
+            remaining -= len(offsets)
+            if remaining == 0:
+                position = chunk_start + int(offsets[-1]) + 1
+                break
+        rows = np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+        return rows, position
+
+    def get_by_property_id(self, property_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a listing dict by property ID."""
+        row = self.row_by_property_id.get(property_id)
+        return None if row is None else self.listings[row]
+
+    def rows(self, row_ids: np.ndarray) -> List[Dict[str, Any]]:
+        """Materialize listing dicts for the given row ids, in order."""
+        return [self.listings[i] for i in row_ids.tolist()]
+
+    def project(self, row_ids: np.ndarray, fields: Optional[Tuple[str, ...]] = CARD_FIELDS) -> List[Dict[str, Any]]:
+        """Listing dicts for the given row ids restricted to ``fields`` (card projections are cached)."""
+        if fields is not CARD_FIELDS:
+            return [project_listing(self.listings[i], fields) for i in row_ids.tolist()]
+        cards = []
+        for i in row_ids.tolist():
+            card = self._cards[i]
+            if card is None:
+                card = self._cards[i] = project_listing(self.listings[i], CARD_FIELDS)
+            cards.append(card)
+        return cards
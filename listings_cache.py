@@ -0,0 +1,256 @@
+"""
+Compiled listings cache for fast cold start.
+
+Parsing listings.jsonl line by line and rebuilding every index dominates
+startup. After a parse, the records and their built indexes are written to a
+cache directory next to the source: every NumPy column (including the
+full-text postings) as its own .npy file, memory-mapped on the next start,
+plus one pickle holding the records, the price cube and the remaining index
+state. The records stay pickled rather than mapped: tools return them as
+dicts, so a mapped layout would only move the same object construction to
+first access, and unpickling them is far cheaper than parsing JSON lines.
+Short strings are interned before the index is built, so each distinct
+postcode, type or status is stored and loaded once.
+
+Cache entries are keyed by a hash of the source file and of the code that
+builds the indexes, so an edited feed or a changed index layout is never
+served from a stale entry. The source's (mtime, size) is recorded alongside,
+letting an untouched file skip even the hash.
+
+    data/.listings-cache/current.json   signature + key of the live entry
+    data/.listings-cache/<key>/         meta.json, records.pickle, 0.npy, 1.npy, ...
+    data/.listings-cache/.tmp-*/        an entry being written (renamed to <key> when complete)
+
+Several workers may start at once against one cache directory, so a writer
+only removes completed entries other than its own, never another process's
+staging directory (unless it has been abandoned for a long time).
+"""
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+import geo_index
+import listing_index
+import price_cube
+import text_index
+from client_journal import write_jsonl_atomic
+from listing_index import ListingIndex
+from listings_snapshot import file_signature
+from price_cube import PriceCube
+from text_index import TextIndex
+
+# Bump when the cache layout itself changes
+CACHE_FORMAT = 1
+
+# Strings up to this length are interned (postcodes, types, statuses, URLs)
+_INTERN_MAX_LENGTH = 64
+
+_POINTER_FILE = "current.json"
+
+# Array-name prefix separating the full-text index columns from the listing index's
+_TEXT_PREFIX = "text."
+
+_STAGING_PREFIX = ".tmp-"
+
+# A staging directory untouched for this long belongs to a writer that died
+_ABANDONED_STAGING_SECONDS = 3600
+
+
+def intern_strings(listings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Return the listings with keys and short string values interned."""
+    interned = []
+    for listing in listings:
+        interned.append({
+            sys.intern(key): sys.intern(value) if isinstance(value, str) and len(value) <= _INTERN_MAX_LENGTH else value
+            for key, value in listing.items()
+        })
+    return interned
+
+
+def _sha1_file(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _code_fingerprint() -> str:
+    """Hash of the modules whose output is cached, so code changes invalidate entries."""
+    digest = hashlib.sha1(str(CACHE_FORMAT).encode("ascii"))
+    for module in (geo_index, listing_index, price_cube, text_index, sys.modules[__name__]):
+        with open(module.__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _entry_key(source_sha1: str, code: str) -> str:
+    return hashlib.sha1(f"{source_sha1}:{code}".encode("ascii")).hexdigest()[:20]
+
+
+def _read_pointer(cache_dir: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(cache_dir, _POINTER_FILE), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_pointer(cache_dir: str, key: str, code: str, signature: Tuple[int, int]) -> None:
+    pointer = {"key": key, "code": code, "signature": list(signature)}
+    write_jsonl_atomic(os.path.join(cache_dir, _POINTER_FILE), [json.dumps(pointer)])
+
+
+def _live_key(cache_dir: str, source_path: str, signature: Tuple[int, int], code: str) -> str:
+    """Entry key for the source's current contents, skipping the hash when the pointer's signature matches."""
+    pointer = _read_pointer(cache_dir)
+    if pointer.get("signature") == list(signature) and pointer.get("code") == code:
+        return pointer["key"]
+    # File touched (e.g. copied into a new image): fall back to its hash
+    return _entry_key(_sha1_file(source_path), code)
+
+
+def source_version(cache_dir: str, source_path: str, signature: Optional[Tuple[int, int]]) -> int:
+    """
+    Data version of the source's current contents: derived from the entry
+    key (contents hash + index code), so every worker reading the same file
+    with the same code agrees on it, and it changes whenever either does.
+    0 if the source does not exist.
+    """
+    if signature is None:
+        return 0
+    try:
+        return int(_live_key(cache_dir, source_path, signature, _code_fingerprint())[:13], 16)
+    except OSError:
+        return 0
+
+
+def _load_array(path: str) -> np.ndarray:
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:
+        # Empty arrays cannot be memory-mapped
+        return np.load(path)
+
+
+def load_listings_cache(
+    cache_dir: str,
+    source_path: str,
+    signature: Optional[Tuple[int, int]]
+) -> Optional[Tuple[List[Dict[str, Any]], ListingIndex, PriceCube, TextIndex]]:
+    """
+    Load the cached (listings, index, cube, text index) for ``source_path``, or None if
+    there is no valid entry for its current contents.
+    """
+    if signature is None:
+        return None
+    try:
+        code = _code_fingerprint()
+        pointer = _read_pointer(cache_dir)
+        key = _live_key(cache_dir, source_path, signature, code)
+        entry = os.path.join(cache_dir, key)
+        if not os.path.isdir(entry):
+            return None
+
+        with open(os.path.join(entry, "meta.json"), "r") as f:
+            meta = json.load(f)
+        if meta.get("format") != CACHE_FORMAT:
+            return None
+        arrays = {
+            name: _load_array(os.path.join(entry, f"{i}.npy")) for i, name in enumerate(meta["arrays"])
+        }
+        with open(os.path.join(entry, "records.pickle"), "rb") as f:
+            payload = pickle.load(f)
+        text_arrays = {
+            name[len(_TEXT_PREFIX):]: array for name, array in arrays.items() if name.startswith(_TEXT_PREFIX)
+        }
+        index = ListingIndex.from_state(payload["listings"], arrays, payload["index_state"])
+        text = TextIndex.from_state(text_arrays, payload["text_state"])
+
+        if pointer.get("key") != key or pointer.get("signature") != list(signature):
+            _write_pointer(cache_dir, key, code, signature)
+        return payload["listings"], index, payload["cube"], text
+    except Exception as e:
+        print(f"Warning: Ignoring unreadable listings cache in {cache_dir}: {e}")
+        return None
+
+
+def _remove_stale_entries(cache_dir: str, key: str) -> None:
+    """
+    Remove completed entries other than ``key``, and staging directories
+    abandoned by a writer that died; another writer's staging is left alone.
+    """
+    now = time.time()
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name == key or not os.path.isdir(path):
+            continue
+        try:
+            if name.startswith(_STAGING_PREFIX):
+                if now - os.path.getmtime(path) < _ABANDONED_STAGING_SECONDS:
+                    continue
+            elif not os.path.exists(os.path.join(path, "meta.json")):
+                continue
+        except OSError:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def write_listings_cache(
+    cache_dir: str,
+    source_path: str,
+    signature: Optional[Tuple[int, int]],
+    listings: List[Dict[str, Any]],
+    index: ListingIndex,
+    cube: PriceCube,
+    text: TextIndex
+) -> bool:
+    """
+    Write a cache entry for listings parsed from ``source_path`` at
+    ``signature`` and make it the live one. Skipped if the source changed
+    since it was read. Older entries are removed.
+    """
+    if signature is None or not listings or file_signature(source_path) != signature:
+        return False
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        code = _code_fingerprint()
+        key = _entry_key(_sha1_file(source_path), code)
+        entry = os.path.join(cache_dir, key)
+
+        if not os.path.isdir(entry):
+            staging = tempfile.mkdtemp(prefix=_STAGING_PREFIX, dir=cache_dir)
+            arrays, index_state = index.to_state()
+            text_arrays, text_state = text.to_state()
+            arrays.update((_TEXT_PREFIX + name, array) for name, array in text_arrays.items())
+            names = list(arrays)
+            for i, name in enumerate(names):
+                np.save(os.path.join(staging, f"{i}.npy"), np.ascontiguousarray(arrays[name]))
+            with open(os.path.join(staging, "records.pickle"), "wb") as f:
+                pickle.dump(
+                    {"listings": listings, "index_state": index_state, "cube": cube, "text_state": text_state},
+                    f, protocol=pickle.HIGHEST_PROTOCOL
+                )
+            with open(os.path.join(staging, "meta.json"), "w") as f:
+                json.dump({"format": CACHE_FORMAT, "count": len(listings), "arrays": names}, f)
+            try:
+                os.rename(staging, entry)
+            except OSError:
+                # Another process published the same entry first
+                shutil.rmtree(staging, ignore_errors=True)
+
+        _write_pointer(cache_dir, key, code, signature)
+        _remove_stale_entries(cache_dir, key)
+        print(f"✅ Wrote listings cache {entry}")
+        return True
+    except Exception as e:
+        print(f"❌ Error writing listings cache to {cache_dir}: {e}")
+        return False
@@ -0,0 +1,111 @@
+"""
+Immutable listings snapshots and a file watcher for hot reload.
+
+A snapshot bundles one load of listings.jsonl with every index built from it
+(columnar index, price cube, full-text index, spatial grid, map clusters)
+and the data version they belong to. Snapshots are never modified after
+construction: a reload builds a complete new one in the background and
+publishes it by swapping a single reference, so a reader holding a snapshot
+always sees one consistent dataset.
+"""
+import os
+import threading
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+from geo_index import GeoGrid
+from listing_index import ListingIndex
+from map_clusters import MapClusters
+from price_cube import PriceCube
+from text_index import TextIndex
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of a file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class ListingsSnapshot:
+    """One version of the listings together with the indexes built from it."""
+
+    __slots__ = ("version", "listings", "index", "cube", "text_index", "geo", "clusters", "source_signature")
+
+    def __init__(
+        self,
+        version: int,
+        listings: List[Dict[str, Any]],
+        source_signature: Optional[Tuple[int, int]] = None,
+        index: Optional[ListingIndex] = None,
+        cube: Optional[PriceCube] = None,
+        text_index: Optional[TextIndex] = None
+    ):
+        """Build the indexes for ``listings``, unless prebuilt ones (e.g. from the cache) are given."""
+        self.version = version
+        self.listings = listings
+        self.index = index if index is not None else ListingIndex(listings)
+        self.cube = cube if cube is not None else PriceCube(listings)
+        self.text_index = text_index if text_index is not None else TextIndex(listings)
+        # Cheap to rebuild from the (possibly memory-mapped) coordinate columns
+        self.geo = GeoGrid(self.index.lat, self.index.lng)
+        # Cluster tables are built per zoom precision on first request
+        self.clusters = MapClusters(self.index)
+        self.source_signature = source_signature
+
+
+class FileWatcher:
+    """
+    Poll a file's signature and call ``on_change`` once it has changed and
+    then stayed the same for one poll interval, so a file that is still
+    being written is not picked up half-way.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        on_change: Callable[[], Any],
+        interval: float = 5.0,
+        signature: Optional[Tuple[int, int]] = None
+    ):
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self.signature = signature
+        self._pending: Optional[Tuple[int, int]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def poll_once(self) -> bool:
+        """Check the file once; returns True if ``on_change`` was called."""
+        current = file_signature(self.path)
+        if current is None or current == self.signature:
+            self._pending = None
+            return False
+        if current != self._pending:
+            # Changed since the last poll - wait for it to settle
+            self._pending = current
+            return False
+        self.signature = current
+        self._pending = None
+        try:
+            self.on_change()
+        except Exception as e:
+            print(f"❌ Error reloading {self.path}: {e}")
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.poll_once()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"watch:{self.path}", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,166 @@
+"""
+Map clusters: listings aggregated per geohash cell.
+
+A zoomed-out map cannot usefully draw hundreds of pins, and sending every
+listing to the browser just to count them is wasteful. Instead each located
+listing is assigned a geohash cell at the precision that suits the zoom
+level, and each cell is summarized as one cluster: listing count, centroid
+and price min / median / max.
+
+Geohashes are computed as integers (interleaved longitude / latitude bits)
+with NumPy for all rows at once. The cluster table for a precision is built
+on first use and kept on the listings snapshot, so it is computed once per
+data version; a request only selects the cells overlapping its bounding box.
+"""
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from listing_index import ListingIndex
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+MAX_ZOOM = 22
+
+# Web-map zoom level (0 = whole world) -> geohash precision, so a map tile
+# shows a handful of clusters across at every zoom
+_ZOOM_PRECISION = (1, 1, 1, 2, 2, 2, 3, 3, 4, 4, 4, 5, 5, 6, 6, 6, 7, 7, 8)
+
+
+def zoom_to_precision(zoom: int) -> int:
+    """Geohash precision (1-8) for a map zoom level."""
+    return _ZOOM_PRECISION[min(max(int(zoom), 0), len(_ZOOM_PRECISION) - 1)]
+
+
+def _bit_counts(precision: int) -> Tuple[int, int]:
+    """(longitude bits, latitude bits) of a geohash; longitude gets the odd bit."""
+    bits = 5 * precision
+    return (bits + 1) // 2, bits // 2
+
+
+def _quantize(values: np.ndarray, low: float, span: float, bits: int) -> np.ndarray:
+    cells = np.floor((values - low) / span * (1 << bits)).astype(np.int64)
+    return np.clip(cells, 0, (1 << bits) - 1)
+
+
+def geohash_codes(lat: np.ndarray, lng: np.ndarray, precision: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Integer geohashes of points at ``precision``, plus the latitude and
+    longitude cell index of each point (used for the cell bounds).
+    """
+    lng_bits, lat_bits = _bit_counts(precision)
+    lat_cells = _quantize(lat, -90.0, 180.0, lat_bits)
+    lng_cells = _quantize(lng, -180.0, 360.0, lng_bits)
+    codes = np.zeros(len(lat), dtype=np.int64)
+    # Bits alternate longitude, latitude, ... from the most significant end
+    for i in range(5 * precision):
+        if i % 2 == 0:
+            bit = (lng_cells >> (lng_bits - 1 - i // 2)) & 1
+        else:
+            bit = (lat_cells >> (lat_bits - 1 - i // 2)) & 1
+        codes = (codes << 1) | bit
+    return codes, lat_cells, lng_cells
+
+
+def geohash_string(code: int, precision: int) -> str:
+    """Base-32 text of an integer geohash ("gcqd" etc.)."""
+    chars = []
+    for shift in range(5 * (precision - 1), -1, -5):
+        chars.append(GEOHASH_ALPHABET[(code >> shift) & 31])
+    return "".join(chars)
+
+
+class _ClusterLevel:
+    """Clusters at one geohash precision, with each cell's bounds for box queries."""
+
+    __slots__ = ("precision", "records", "south", "west", "north", "east")
+
+    def __init__(
+        self,
+        precision: int,
+        lat: np.ndarray,
+        lng: np.ndarray,
+        price: np.ndarray,
+        has_price: np.ndarray,
+        listings: List[Dict[str, Any]]
+    ):
+        self.precision = precision
+        located = np.flatnonzero(np.isfinite(lat) & np.isfinite(lng))
+        codes, lat_cells, lng_cells = geohash_codes(lat[located], lng[located], precision)
+        order = np.argsort(codes, kind="stable")
+        located, codes = located[order], codes[order]
+        lat_cells, lng_cells = lat_cells[order], lng_cells[order]
+        cell_codes, starts, counts = np.unique(codes, return_index=True, return_counts=True)
+        groups = np.repeat(np.arange(len(cell_codes)), counts)
+        lat_sum = np.bincount(groups, weights=lat[located], minlength=len(cell_codes))
+        lng_sum = np.bincount(groups, weights=lng[located], minlength=len(cell_codes))
+
+        # Price stats over the priced rows of each cell: sort by (cell, price)
+        # and read min / median / max straight from each group's slice
+        priced = has_price[located]
+        priced_groups = groups[priced]
+        prices = price[located][priced]
+        by_price = np.lexsort((prices, priced_groups))
+        priced_groups, prices = priced_groups[by_price], prices[by_price]
+        priced_counts = np.bincount(priced_groups, minlength=len(cell_codes))
+        priced_starts = np.concatenate(([0], np.cumsum(priced_counts)[:-1])).astype(np.int64)
+
+        lng_bits, lat_bits = _bit_counts(precision)
+        lat_step, lng_step = 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+        self.south = -90.0 + lat_cells[starts] * lat_step
+        self.west = -180.0 + lng_cells[starts] * lng_step
+        self.north = self.south + lat_step
+        self.east = self.west + lng_step
+
+        self.records: List[Dict[str, Any]] = []
+        for g, (code, start, count) in enumerate(zip(cell_codes.tolist(), starts.tolist(), counts.tolist())):
+            record = {
+                "geohash": geohash_string(code, precision),
+                "count": count,
+                "lat": round(float(lat_sum[g]) / count, 5),
+                "lng": round(float(lng_sum[g]) / count, 5),
+                "price_min": None,
+                "price_median": None,
+                "price_max": None,
+            }
+            n = int(priced_counts[g])
+            if n:
+                lo = int(priced_starts[g])
+                record["price_min"] = int(prices[lo])
+                record["price_median"] = int(round((prices[lo + (n - 1) // 2] + prices[lo + n // 2]) / 2))
+                record["price_max"] = int(prices[lo + n - 1])
+            if count == 1:
+                # A single listing is drawn as its own pin
+                record["property_id"] = listings[int(located[start])].get("property_id")
+            self.records.append(record)
+
+    def query(self, bbox: Optional[Tuple[float, float, float, float]] = None) -> List[Dict[str, Any]]:
+        """Clusters whose cell overlaps ``bbox`` ([south, west, north, east]), or all of them."""
+        if bbox is None:
+            return list(self.records)
+        south, west, north, east = bbox
+        visible = (self.south <= north) & (self.north >= south) & (self.west <= east) & (self.east >= west)
+        return [self.records[i] for i in np.flatnonzero(visible).tolist()]
+
+
+class MapClusters:
+    """Per-precision cluster tables for one listings snapshot, built on first use."""
+
+    def __init__(self, index: ListingIndex):
+        self._columns = (index.lat, index.lng, index.price, index.has_price, index.listings)
+        self._levels: Dict[int, _ClusterLevel] = {}
+        self._lock = threading.Lock()
+
+    def level(self, precision: int) -> _ClusterLevel:
+        level = self._levels.get(precision)
+        if level is None:
+            with self._lock:
+                level = self._levels.get(precision)
+                if level is None:
+                    level = self._levels[precision] = _ClusterLevel(precision, *self._columns)
+        return level
+
+    def query(self, zoom: int, bbox: Optional[Tuple[float, float, float, float]] = None) -> Tuple[int, List[Dict[str, Any]]]:
+        """(geohash precision, clusters) for a map zoom level and optional bounding box."""
+        precision = zoom_to_precision(zoom)
+        return precision, self.level(precision).query(bbox)
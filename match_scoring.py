@@ -0,0 +1,144 @@
+"""
+Ranked buyer-to-listing match scoring.
+
+match_client first narrows the inventory to the listings a buyer can
+actually consider (unsold, within budget, enough bedrooms) with vectorized
+masks, then scores only those candidates and keeps the best ``k`` with a
+bounded heap. The score is a weighted sum of components in [0, 1]:
+
+    budget      price / budget: listings that use the budget rank above
+                ones far below it
+    bedrooms    1 for the minimum or one more, then decaying with each
+                surplus bedroom
+    similarity  same postcode district and / or property type family
+                (as query_listings matches types: an apartment is a flat)
+                as the listings the buyer has shown interest in
+    features    garden / parking in line with the buyer's interested
+                listings (share of them that have one)
+
+A component the buyer gives no information for scores a neutral 0.5, so it
+does not reorder candidates.
+"""
+import heapq
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from listing_index import ListingIndex
+from price_cube import property_type_family
+
+WEIGHTS = {"budget": 0.4, "bedrooms": 0.25, "similarity": 0.25, "features": 0.1}
+
+# Similarity credit for sharing the postcode district vs. the property type
+DISTRICT_SIMILARITY = 0.6
+TYPE_SIMILARITY = 0.4
+
+NEUTRAL = 0.5
+
+
+class BuyerProfile:
+    """A buyer's criteria and inferred preferences, resolved against one listing index."""
+
+    def __init__(self, client: Dict[str, Any], index: ListingIndex):
+        self.budget = client.get("budget_max") or None
+        self.min_bedrooms = client.get("min_bedrooms") or None
+        rows = [index.row_by_property_id.get(pid) for pid in client.get("interested_property_ids") or []]
+        self.interested_rows = np.array([row for row in rows if row is not None], dtype=np.int64)
+        interested = self.interested_rows
+        if len(interested):
+            labels = index.postcode_labels
+            self.districts = {labels[code].split(" ")[0] for code in index.postcode_codes[interested].tolist()}
+            type_labels = index.type_labels
+            self.type_families = {_type_family(type_labels[code]) for code in index.type_codes[interested].tolist()}
+            # Share of interested listings with a garden / parking, over those that record it
+            self.garden_preference = _share(index.garden[interested])
+            self.parking_preference = _share(index.parking[interested])
+        else:
+            self.districts = set()
+            self.type_families = set()
+            self.garden_preference = self.parking_preference = None
+
+
+def _type_family(label: str) -> Tuple[str, ...]:
+    """Type family terms of a label ("Apartment - First Floor" -> ("flat",)); the label itself if it has none."""
+    return property_type_family(label) or (label.lower(),)
+
+
+def _share(flags: np.ndarray) -> Optional[float]:
+    known = flags[flags >= 0]
+    return float(known.mean()) if len(known) else None
+
+
+def candidate_mask(index: ListingIndex, profile: BuyerProfile) -> np.ndarray:
+    """Listings the buyer can consider: unsold, within budget, enough bedrooms."""
+    mask = ~index.sold
+    if profile.budget:
+        mask &= index.price <= profile.budget
+    if profile.min_bedrooms:
+        mask &= index.bedrooms >= profile.min_bedrooms
+    return mask
+
+
+def _feature_fit(flags: np.ndarray, preference: Optional[float]) -> np.ndarray:
+    if preference is None:
+        return np.full(len(flags), NEUTRAL)
+    # Unknown flags count as half a match
+    return np.where(flags == 1, preference, np.where(flags == 0, 1.0 - preference, NEUTRAL))
+
+
+def score_rows(index: ListingIndex, profile: BuyerProfile, rows: np.ndarray) -> np.ndarray:
+    """Match score in [0, 1] of each candidate row for the buyer."""
+    if profile.budget:
+        budget = np.clip(index.price[rows] / profile.budget, 0.0, 1.0)
+    else:
+        budget = np.full(len(rows), NEUTRAL)
+
+    if profile.min_bedrooms:
+        surplus = np.maximum(index.bedrooms[rows] - profile.min_bedrooms - 1, 0)
+        bedrooms = 1.0 / (1.0 + surplus)
+    else:
+        bedrooms = np.full(len(rows), NEUTRAL)
+
+    if len(profile.interested_rows):
+        label_in_district = np.array(
+            [label.split(" ")[0] in profile.districts for label in index.postcode_labels], dtype=bool
+        )
+        label_in_family = np.array(
+            [_type_family(label) in profile.type_families for label in index.type_labels], dtype=bool
+        )
+        similarity = (
+            DISTRICT_SIMILARITY * label_in_district[index.postcode_codes[rows]]
+            + TYPE_SIMILARITY * label_in_family[index.type_codes[rows]]
+        )
+        features = (
+            _feature_fit(index.garden[rows], profile.garden_preference)
+            + _feature_fit(index.parking[rows], profile.parking_preference)
+        ) / 2
+    else:
+        similarity = np.full(len(rows), NEUTRAL)
+        features = np.full(len(rows), NEUTRAL)
+
+    return (
+        WEIGHTS["budget"] * budget
+        + WEIGHTS["bedrooms"] * bedrooms
+        + WEIGHTS["similarity"] * similarity
+        + WEIGHTS["features"] * features
+    )
+
+
+def top_matches(index: ListingIndex, client: Dict[str, Any], k: int) -> Tuple[List[Tuple[int, float]], int]:
+    """
+    The buyer's ``k`` best (row id, score) pairs, best first with ties in
+    file order, and the total number of candidates.
+    """
+    profile = BuyerProfile(client, index)
+    rows = np.flatnonzero(candidate_mask(index, profile))
+    return rank_rows(index, profile, rows, k), len(rows)
+
+
+def rank_rows(index: ListingIndex, profile: BuyerProfile, rows: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    """The ``k`` best (row id, score) pairs among ``rows``, best first with ties in file order."""
+    scores = score_rows(index, profile, rows)
+    # Bounded heap: O(candidates * log k), only k entries are ever sorted
+    best = heapq.nlargest(max(k, 0), zip(scores.tolist(), (-rows).tolist()))
+    return [(-neg_row, score) for score, neg_row in best]
@@ -0,0 +1,237 @@
+"""
+Precomputed price aggregates.
+
+Listing prices are rolled up into cells keyed by postcode (at area, district,
+sector and full-postcode level) x property-type family x bedrooms, each
+holding count, sum and sum of squares. Average-price and group-by questions
+are answered by adding up cells instead of rescanning listings. On a hot
+reload the previous snapshot's cube is copied and only the listings whose
+price, type, bedrooms or postcode changed are removed and re-added.
+
+    area     "LE"       (letters of the outward code)
+    district "LE65"     (outward code)
+    sector   "LE65 1"   (outward code + first digit of the inward code)
+    postcode "LE65 1DA" (full normalized postcode)
+"""
+import bisect
+import math
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+
+from listing_index import normalize_postcode, property_type_terms
+
+LEVELS = ("area", "district", "sector", "postcode")
+
+# Property type terms the cube breaks prices down by
+FAMILY_TERMS = ("bungalow", "cottage", "detached", "flat", "house", "semi", "terraced")
+
+GROUP_BY_OPTIONS = ("bedrooms", "property_type") + LEVELS
+
+
+def postcode_levels(postcode: str) -> Dict[str, str]:
+    """Split a postcode into its area, district, sector and full-postcode keys."""
+    normalized = normalize_postcode(postcode)
+    outward, _, inward = normalized.partition(" ")
+    area = ""
+    for char in outward:
+        if not char.isalpha():
+            break
+        area += char
+    return {
+        "area": area,
+        "district": outward,
+        "sector": f"{outward} {inward[0]}" if inward else outward,
+        "postcode": normalized,
+    }
+
+
+def property_type_family(property_type: str) -> Tuple[str, ...]:
+    """Family terms of a property type, e.g. "House - Semi-Detached" -> ("house", "semi")."""
+    return tuple(sorted(property_type_terms(property_type) & set(FAMILY_TERMS)))
+
+
+class PriceStats:
+    """Running count / sum / sum of squares for a group of prices."""
+
+    __slots__ = ("count", "total", "total_sq")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.total_sq = 0
+
+    def add(self, price: int, sign: int = 1) -> None:
+        self.count += sign
+        self.total += sign * price
+        self.total_sq += sign * price * price
+
+    def merge(self, other: "PriceStats") -> None:
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.count:
+            return {"count": 0, "average_price": None, "std_dev": None}
+        mean = self.total / self.count
+        variance = max(self.total_sq / self.count - mean * mean, 0.0)
+        return {
+            "count": self.count,
+            "average_price": round(mean, 2),
+            "std_dev": round(math.sqrt(variance), 2),
+        }
+
+
+def _cube_fields(listing: Dict[str, Any]) -> Optional[Tuple[int, str, int, str]]:
+    """(price, property type, bedrooms, postcode) a listing is aggregated by, or None if unpriced."""
+    if "price_amount" not in listing:
+        return None
+    return (
+        listing.get("price_amount") or 0,
+        listing.get("property_type", ""),
+        listing.get("bedrooms") or 0,
+        listing.get("postcode", ""),
+    )
+
+
+def _copy_stats(stats: PriceStats) -> PriceStats:
+    copied = PriceStats()
+    copied.count, copied.total, copied.total_sq = stats.count, stats.total, stats.total_sq
+    return copied
+
+
+class PriceCube:
+    """Price aggregates by postcode level x type family x bedrooms."""
+
+    def __init__(self, listings: List[Dict[str, Any]]):
+        # level -> postcode key -> (family, bedrooms) -> stats
+        self.cells: Dict[str, Dict[str, Dict[Tuple[Tuple[str, ...], int], PriceStats]]] = {
+            level: {} for level in LEVELS
+        }
+        # level -> sorted postcode keys, for prefix range lookups
+        self.keys: Dict[str, List[str]] = {level: [] for level in LEVELS}
+        # family term -> number of priced listings carrying it
+        self.term_counts: Dict[str, int] = {}
+        for listing in listings:
+            self.add_listing(listing)
+
+    def add_listing(self, listing: Dict[str, Any]) -> None:
+        """Add a listing's price to its cells."""
+        self._apply(_cube_fields(listing), 1)
+
+    def remove_listing(self, listing: Dict[str, Any]) -> None:
+        """Remove a previously added listing's price from its cells."""
+        self._apply(_cube_fields(listing), -1)
+
+    def copy(self) -> "PriceCube":
+        """An independent copy, to update without touching this cube."""
+        cube = PriceCube([])
+        for level, level_cells in self.cells.items():
+            copied = cube.cells[level]
+            for postcode_key, cells in level_cells.items():
+                copied[postcode_key] = {cell_key: _copy_stats(stats) for cell_key, stats in cells.items()}
+        cube.keys = {level: list(keys) for level, keys in self.keys.items()}
+        cube.term_counts = dict(self.term_counts)
+        return cube
+
+    def updated(self, old_listings: List[Dict[str, Any]], new_listings: List[Dict[str, Any]]) -> "PriceCube":
+        """
+        A cube for ``new_listings``, given that this one was built from
+        ``old_listings``: a copy with only the changed listings removed and added.
+        """
+        old_fields = Counter(_cube_fields(listing) for listing in old_listings)
+        new_fields = Counter(_cube_fields(listing) for listing in new_listings)
+        cube = self.copy()
+        for fields, times in (old_fields - new_fields).items():
+            for _ in range(times):
+                cube._apply(fields, -1)
+        for fields, times in (new_fields - old_fields).items():
+            for _ in range(times):
+                cube._apply(fields, 1)
+        return cube
+
+    def _apply(self, fields: Optional[Tuple[int, str, int, str]], sign: int) -> None:
+        if fields is None:
+            return
+        price, property_type, bedrooms, postcode = fields
+        family = property_type_family(property_type)
+        cell_key = (family, bedrooms)
+        for level, postcode_key in postcode_levels(postcode).items():
+            level_cells = self.cells[level]
+            if postcode_key not in level_cells:
+                level_cells[postcode_key] = {}
+                bisect.insort(self.keys[level], postcode_key)
+            cells = level_cells[postcode_key]
+            stats = cells.setdefault(cell_key, PriceStats())
+            stats.add(price, sign)
+            if not stats.count:
+                # Drop emptied cells so the cube matches a fresh build
+                del cells[cell_key]
+                if not cells:
+                    del level_cells[postcode_key]
+                    keys = self.keys[level]
+                    del keys[bisect.bisect_left(keys, postcode_key)]
+        for term in family:
+            count = self.term_counts.get(term, 0) + sign
+            if count:
+                self.term_counts[term] = count
+            else:
+                self.term_counts.pop(term, None)
+
+    def _level_for(self, prefix: str) -> str:
+        """
+        Coarsest level whose keys decide a postcode prefix match on their own.
+
+        A level is unusable when one of its keys is a proper prefix of the query
+        (e.g. district "DY4" for "DY4 7LG"), since only some rows under it match.
+        The full-postcode level always decides.
+        """
+        for level in LEVELS[:-1]:
+            level_cells = self.cells[level]
+            if not any(prefix[:n] in level_cells for n in range(len(prefix))):
+                return level
+        return LEVELS[-1]
+
+    def query(
+        self,
+        postcode: Optional[str] = None,
+        property_type: Optional[str] = None,
+        group_by: Optional[str] = None,
+    ) -> Optional[Dict[Any, PriceStats]]:
+        """
+        Aggregate prices for listings matching the filters, optionally grouped.
+
+        Uses the same matching rules as the listing index (postcode prefix,
+        property type terms). Returns None when the type filter is not made
+        of family terms the cube holds (e.g. "cottage conversion" or a partial
+        word), so the caller can fall back to the listing index.
+        """
+        prefix = normalize_postcode(postcode) if postcode is not None else ""
+        level = self._level_for(prefix)
+        if group_by in LEVELS:
+            # Grouping needs keys at least as fine as the group level
+            level = LEVELS[max(LEVELS.index(level), LEVELS.index(group_by))]
+
+        terms = property_type_terms(property_type) if property_type is not None else set()
+        if not terms.issubset(FAMILY_TERMS) or any(not self.term_counts.get(t) for t in terms):
+            return None
+
+        keys = self.keys[level]
+        lo = bisect.bisect_left(keys, prefix)
+        hi = bisect.bisect_left(keys, prefix + "\uffff", lo)
+
+        groups: Dict[Any, PriceStats] = {}
+        for postcode_key in keys[lo:hi]:
+            for (family, bedrooms), stats in self.cells[level][postcode_key].items():
+                if not terms.issubset(family) or not stats.count:
+                    continue
+                if group_by == "bedrooms":
+                    group = bedrooms
+                elif group_by == "property_type":
+                    group = " ".join(family) or "other"
+                elif group_by in LEVELS:
+                    group = postcode_levels(postcode_key)[group_by]
+                else:
+                    group = None
+                groups.setdefault(group, PriceStats()).merge(stats)
+        return groups
@@ -0,0 +1,103 @@
+"""
+Versioned LRU result cache for read-only tools.
+
+Results are keyed on the tool name plus its arguments, bound against the
+function signature so positional/keyword/default spellings of the same call
+share an entry. Each entry records the data versions it was computed from
+(e.g. the listings version, or one client's version); a lookup whose current
+versions differ is a miss, so a write invalidates exactly the entries that
+depended on the data it changed. Entries are also evicted by size (least
+recently used first) and by age.
+"""
+import functools
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class ResultCache:
+    """Thread-safe LRU cache with per-entry version tags and a TTL."""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple, float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, versions: Tuple) -> Tuple[bool, Any]:
+        """Return (True, value) for a fresh entry computed at ``versions``, else (False, None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_versions, expires_at, value = entry
+                if entry_versions == versions and expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                # Stale: the data changed or the entry aged out
+                del self._entries[key]
+                self.evictions += 1
+            self.misses += 1
+            return False, None
+
+    def put(self, key: Hashable, versions: Tuple, value: Any) -> None:
+        """Store a value computed at ``versions``, evicting the least recently used entries."""
+        with self._lock:
+            self._entries[key] = (versions, time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+def cached(cache: ResultCache, versions: Callable[..., Tuple]) -> Callable:
+    """
+    Cache a read-only tool function in ``cache``.
+
+    ``versions`` receives the call's bound arguments (as keywords) and returns
+    the data versions the result depends on.
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = bound.arguments
+            key = (func.__name__, json.dumps(arguments, sort_keys=True, default=str))
+            current = versions(**arguments)
+            hit, value = cache.get(key, current)
+            if hit:
+                return value
+            value = func(*args, **kwargs)
+            cache.put(key, current, value)
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
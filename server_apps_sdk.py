@@ -16,7 +16,9 @@ from typing import Any, Dict, List
 import mcp.types as types
 from mcp.server.fastmcp import FastMCP
 import tools
-import json
+import json_codec
+from widget_bundle import load_widget_bundle
+from tool_executor import ToolExecutor
 import os
 import logging
 import sys
@@ -25,6 +27,13 @@ from datetime import datetime
 # --- Configuration ---
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
 PORT = int(os.getenv("PORT", "8000"))
+# Seconds between checks of data/listings.jsonl for hot reload (0 disables)
+LISTINGS_RELOAD_SECONDS = float(os.getenv("LISTINGS_RELOAD_SECONDS", "5"))
+# Threads available to read-only tool calls
+TOOL_READ_WORKERS = int(os.getenv("TOOL_READ_WORKERS", "4"))
+# Group commit: most CRM writes per durable write, and how long to wait for more
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", "32"))
+WRITE_BATCH_WINDOW_MS = float(os.getenv("WRITE_BATCH_WINDOW_MS", "2"))
 HOST = "0.0.0.0" if ENVIRONMENT == "production" else "127.0.0.1"
 
 # --- Logging Setup ---
@@ -42,34 +51,21 @@ MIME_TYPE = "text/html+skybridge"
 WIDGET_URI = "ui://widget/property-list.html"
 
 # --- Load UI bundle ---
-WIDGET_HTML = ""
+# Assembled, hashed and precompressed once; served from memory afterwards
 widget_path = Path("web/dist/component.js")
 css_path = Path("web/dist/component.css")  # Use built CSS from dist, not source
 
-if widget_path.exists():
-    widget_js = widget_path.read_text(encoding="utf-8")
-    
-    # Load CSS if available
-    widget_css = ""
-    if css_path.exists():
-        widget_css = css_path.read_text(encoding="utf-8")
-        logger.info(f"Widget CSS loaded: {len(widget_css):,} bytes")
-    else:
-        logger.warning(f"Widget CSS not found at {css_path}")
-    
-    WIDGET_HTML = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <style>{widget_css}</style>
-</head>
-<body>
-    <div id="root"></div>
-    <script type="module">{widget_js}</script>
-</body>
-</html>"""
-    logger.info(f"Widget HTML bundle created: {len(WIDGET_HTML):,} bytes")
+if not css_path.exists():
+    logger.warning(f"Widget CSS not found at {css_path}")
+WIDGET_BUNDLE = load_widget_bundle(widget_path, css_path)
+WIDGET_HTML = WIDGET_BUNDLE.html if WIDGET_BUNDLE else ""
+
+if WIDGET_BUNDLE:
+    logger.info(
+        f"Widget HTML bundle created: {len(WIDGET_BUNDLE.body):,} bytes "
+        f"({', '.join(f'{coding} {len(body):,}' for coding, body in WIDGET_BUNDLE.encodings.items())}), "
+        f"hash {WIDGET_BUNDLE.content_hash}"
+    )
 else:
     logger.warning("Widget bundle not found at web/dist/component.js - run: cd web && npm run build")
 
@@ -90,6 +86,13 @@ def _tool_meta() -> Dict[str, Any]:
         "openai/toolInvocation/invoked": "Found properties",
     }
 
+def _resource_meta() -> Dict[str, Any]:
+    """Apps SDK metadata for the widget resource, plus its content hash."""
+    meta = _tool_meta()
+    if WIDGET_BUNDLE:
+        meta["property-server/widgetHash"] = WIDGET_BUNDLE.content_hash
+    return meta
+
 # --- Register Tools with Apps SDK metadata ---
 @mcp._mcp_server.list_tools()
 async def _list_tools() -> List[types.Tool]:
@@ -98,7 +101,7 @@ async def _list_tools() -> List[types.Tool]:
         types.Tool(
             name="query_listings",
             title="Search Property Listings",
-            description="Use this when the user wants to find, search, browse, or view properties for sale in the UK. Searches 475 property listings with filters for location (postcode like 'DY4' or 'LE65'), price range, number of bedrooms, garden availability, parking availability, and property type. Perfect for queries like 'find properties in Ashby', 'show me 2-bed houses under £200k', 'properties with gardens in DY4', or 'flats with parking'. Do not use for property valuations, mortgage calculations, or rental properties.",
+            description="Use this when the user wants to find, search, browse, or view properties for sale in the UK. Searches 475 property listings with filters for location (postcode like 'DY4' or 'LE65'), price range, number of bedrooms, garden availability, parking availability, and property type, and can sort by price, bedrooms or listing date. Perfect for queries like 'find properties in Ashby', 'show me 2-bed houses under £200k', 'properties with gardens in DY4', 'flats with parking', or 'cheapest 3-bed in DY4'. Do not use for property valuations, mortgage calculations, or rental properties.",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -128,8 +131,60 @@ async def _list_tools() -> List[types.Tool]:
                     },
                     "limit": {
                         "type": "integer", 
+                        "minimum": 1,
                         "description": "Maximum number of results to return. Default is 5. Use higher values (10-20) for broader searches.",
                         "default": 5
+                    },
+                    "min_price": {
+                        "type": "integer",
+                        "description": "Minimum price in GBP (British Pounds). Example: 150000 for properties from £150,000. Leave empty for no minimum."
+                    },
+                    "max_bedrooms": {
+                        "type": "integer",
+                        "description": "Maximum number of bedrooms. Example: 3 for up to 3 bedrooms. Leave empty for any number."
+                    },
+                    "sort_by": {
+                        "type": "string",
+                        "enum": ["price_amount", "bedrooms", "scraped_at"],
+                        "description": "Order results by price, bedrooms or listing date ('scraped_at'). Example: 'price_amount' with order 'asc' for the cheapest first. Leave empty for default order."
+                    },
+                    "order": {
+                        "type": "string",
+                        "enum": ["asc", "desc"],
+                        "description": "Sort direction when sort_by is set. 'asc' (default) for lowest first, 'desc' for highest/newest first.",
+                        "default": "asc"
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "The next_cursor value from a previous query_listings call with the same filters, to fetch the next page of results. Leave empty for the first page."
+                    },
+                    "profile": {
+                        "type": "string",
+                        "enum": ["card", "full"],
+                        "description": "'card' (default) returns the fields shown on property cards. Use 'full' only when the user needs descriptions, photos, brochures or floorplans.",
+                        "default": "card"
+                    },
+                    "fields": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Explicit listing fields to return instead of a profile. Example: ['property_id', 'price_text', 'description']."
+                    },
+                    "near": {
+                        "type": "object",
+                        "properties": {
+                            "lat": {"type": "number"},
+                            "lng": {"type": "number"},
+                            "radius_miles": {"type": "number", "default": 2}
+                        },
+                        "required": ["lat", "lng"],
+                        "description": "Only properties within radius_miles (default 2) of a point, nearest first unless sort_by is set. Example: {'lat': 52.529, 'lng': -2.067, 'radius_miles': 2} for 'within 2 miles of Tipton station'. Each result includes distance_miles."
+                    },
+                    "bbox": {
+                        "type": "array",
+                        "items": {"type": "number"},
+                        "minItems": 4,
+                        "maxItems": 4,
+                        "description": "Only properties inside a map box given as [south, west, north, east] in degrees. Example: [52.50, -2.10, 52.56, -2.00]."
                     }
                 }
             },
@@ -140,6 +195,57 @@ async def _list_tools() -> List[types.Tool]:
                 "openWorldHint": False,
             },
         ),
+        types.Tool(
+            name="search_listings_text",
+            title="Search Property Descriptions",
+            description="Use this when the user describes features in words rather than numbers - e.g. 'no upward chain', 'conservatory', 'log burner', 'recently refurbished kitchen', 'close to schools'. Ranks properties by how well their description and key features match the keywords, and can be combined with the same filters as query_listings (postcode, price, bedrooms, garden, parking, property type). Results are shown in the property widget, best match first. Do not use for purely numeric searches - use query_listings instead.",
+            inputSchema={
+                "type": "object",
+                "required": ["query"],
+                "properties": {
+                    "query": {"type": "string", "description": "Keywords to search for in descriptions and key features (e.g., 'no upward chain', 'garage conservatory')"},
+                    "postcode": {"type": "string", "description": "Partial or full UK postcode to filter by (optional, e.g. 'DY4')"},
+                    "property_type": {"type": "string", "description": "Type of property to filter by (optional, e.g. 'Flat', 'Bungalow')"},
+                    "min_price": {"type": "integer", "description": "Minimum price in GBP (optional)"},
+                    "max_price": {"type": "integer", "description": "Maximum price in GBP (optional)"},
+                    "min_bedrooms": {"type": "integer", "description": "Minimum number of bedrooms (optional)"},
+                    "max_bedrooms": {"type": "integer", "description": "Maximum number of bedrooms (optional)"},
+                    "has_garden": {"type": "boolean", "description": "Only properties with a garden (optional)"},
+                    "has_parking": {"type": "boolean", "description": "Only properties with parking (optional)"},
+                    "limit": {"type": "integer", "description": "Maximum number of results (default: 5)", "default": 5},
+                    "profile": {"type": "string", "enum": ["card", "full"], "description": "'card' (default) for property card fields, 'full' for every listing field", "default": "card"},
+                    "fields": {"type": "array", "items": {"type": "string"}, "description": "Explicit listing fields to return instead of a profile (optional)"}
+                }
+            },
+            _meta=_tool_meta(),
+            annotations={
+                "readOnlyHint": True,
+                "destructiveHint": False,
+                "openWorldHint": False,
+            },
+        ),
+        types.Tool(
+            name="get_map_clusters",
+            title="Get Map Clusters",
+            description="Use this to summarize where listings are on a map rather than list them - e.g. 'where are most of the properties?', 'show me a map overview', or to draw a zoomed-out dashboard map. Returns one cluster per map cell (sized for the zoom level) with the number of listings, the centre point and the min / median / max price. Optionally restricted to a visible area. Do not use to find individual properties - use query_listings instead.",
+            inputSchema={
+                "type": "object",
+                "required": ["zoom"],
+                "properties": {
+                    "zoom": {"type": "integer", "minimum": 0, "maximum": 22, "description": "Web-map zoom level: 0 for the whole world, about 6 for England, 10 for a town, 14 for streets"},
+                    "bbox": {
+                        "type": "array",
+                        "items": {"type": "number"},
+                        "minItems": 4,
+                        "maxItems": 4,
+                        "description": "Optional visible area as [south, west, north, east] in degrees (e.g. [52.40, -2.20, 52.70, -1.90])"
+                    }
+                }
+            },
+            annotations={
+                "readOnlyHint": True,
+            },
+        ),
         types.Tool(
             name="get_schema",
             title="Get Property Data Schema",
@@ -155,7 +261,7 @@ async def _list_tools() -> List[types.Tool]:
         types.Tool(
             name="calculate_average_price",
             title="Calculate Average Property Price",
-            description="Use this when the user asks about average prices, typical costs, price trends, or market values in a specific area or for a specific property type. Calculates the average price for properties matching the given postcode or property type. Perfect for queries like 'what's the average price in LE65?', 'how much do flats cost?', 'average property prices in Ashby', or 'typical house prices in DY4'. Do not use for finding specific properties - use query_listings instead.",
+            description="Use this when the user asks about average prices, typical costs, price trends, or market values in a specific area or for a specific property type. Calculates the average price for properties matching the given postcode or property type, optionally broken down by bedrooms, property type or postcode area/district/sector. Perfect for queries like 'what's the average price in LE65?', 'how much do flats cost?', 'average property prices in Ashby', 'typical house prices in DY4', or 'average price by bedrooms in LE65'. Do not use for finding specific properties - use query_listings instead.",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -166,6 +272,11 @@ async def _list_tools() -> List[types.Tool]:
                     "property_type": {
                         "type": "string", 
                         "description": "Type of property to calculate average for. Examples: 'Flat', 'House', 'Bungalow'. Leave empty to calculate across all types."
+                    },
+                    "group_by": {
+                        "type": "string",
+                        "enum": ["bedrooms", "property_type", "area", "district", "sector", "postcode"],
+                        "description": "Optional breakdown of the average. Example: 'bedrooms' with postcode 'LE65' for average price by number of bedrooms in LE65. Leave empty for a single average."
                     }
                 }
             },
@@ -200,13 +311,15 @@ async def _list_tools() -> List[types.Tool]:
         types.Tool(
             name="match_client",
             title="Match Client to Properties",
-            description="Use this when you want to find properties that match a buyer's preferences and budget. Takes a client ID and returns matching properties in the property widget. Perfect for queries like 'show properties for client C0001', 'find matches for Sarah', or 'what properties fit this buyer's needs?'. Only works for buyers, not sellers.",
+            description="Use this when you want to find properties that match a buyer's preferences and budget. Takes a client ID and returns matching properties in the property widget, best match first (ranked by budget fit, bedrooms and similarity to properties they liked). Perfect for queries like 'show properties for client C0001', 'find matches for Sarah', or 'what properties fit this buyer's needs?'. Only works for buyers, not sellers.",
             inputSchema={
                 "type": "object",
                 "required": ["client_id"],
                 "properties": {
                     "client_id": {"type": "string", "description": "The buyer's client ID (e.g., 'C0001')"},
-                    "limit": {"type": "integer", "description": "Maximum number of results (default: 10)", "default": 10}
+                    "limit": {"type": "integer", "description": "Maximum number of results (default: 10)", "default": 10},
+                    "profile": {"type": "string", "enum": ["card", "full"], "description": "'card' (default) for property card fields, 'full' for every listing field", "default": "card"},
+                    "fields": {"type": "array", "items": {"type": "string"}, "description": "Explicit listing fields to return instead of a profile (optional)"}
                 }
             },
             _meta=_tool_meta(),
@@ -214,6 +327,40 @@ async def _list_tools() -> List[types.Tool]:
                 "readOnlyHint": True,
             },
         ),
+        types.Tool(
+            name="match_all_buyers",
+            title="Match All Buyers",
+            description="Use this when an estate agent wants a morning call list across the whole CRM: which buyers have matching properties, and which properties suit the most buyers. Matches every buyer's budget and bedroom requirements against all available listings in one pass. Perfect for queries like 'who should we call today?', 'which buyers have new matches?', or 'which listings have the most interested buyers?'. Internal tool for agents. For one buyer, use match_client instead.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "stage": {"type": "string", "enum": ["hot", "warm", "cold", "instructed", "completed"], "description": "Only buyers at this stage (optional)"},
+                    "per_buyer": {"type": "integer", "description": "Top matches per buyer, best match score first as in match_client (default: 3)", "default": 3},
+                    "limit": {"type": "integer", "description": "Maximum number of buyers to return (default: 50)", "default": 50},
+                    "top_listings": {"type": "integer", "description": "Number of listings with the most interested buyers to return (default: 10)", "default": 10}
+                }
+            },
+            annotations={
+                "readOnlyHint": True,
+            },
+        ),
+        types.Tool(
+            name="view_alerts",
+            title="View New Match Alerts",
+            description="Use this when an estate agent asks which buyers should hear about new or changed listings - e.g. 'any new matches since this morning?', 'which buyers match the new listings?', 'who should I tell about the price drop on 34118645?'. Returns alerts raised when the listings feed updates: a buyer newly matches a listing that is new, back on the market, or reduced in price. Use next_since from a previous call to get only newer alerts. Internal tool for agents.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "client_id": {"type": "string", "description": "Only alerts for this buyer (optional)"},
+                    "property_id": {"type": "string", "description": "Only alerts for this property (optional)"},
+                    "since": {"type": "integer", "description": "next_since from a previous call, to get only newer alerts (default: 0 for all)", "default": 0},
+                    "limit": {"type": "integer", "description": "Maximum number of alerts (default: 20)", "default": 20}
+                }
+            },
+            annotations={
+                "readOnlyHint": True,
+            },
+        ),
         types.Tool(
             name="schedule_viewing",
             title="Schedule Property Viewing",
@@ -241,7 +388,8 @@ async def _list_tools() -> List[types.Tool]:
                 "properties": {
                     "role": {"type": "string", "enum": ["buyer", "seller"], "description": "Filter by 'buyer' or 'seller' (optional)"},
                     "stage": {"type": "string", "enum": ["hot", "warm", "cold", "instructed", "completed"], "description": "Filter by stage (optional)"},
-                    "limit": {"type": "integer", "description": "Maximum number of results (default: 20)", "default": 20}
+                    "limit": {"type": "integer", "minimum": 1, "description": "Maximum number of results (default: 20)", "default": 20},
+                    "cursor": {"type": "string", "description": "The next_cursor value from a previous view_leads call with the same filters, to fetch the next page (optional)"}
                 }
             },
             annotations={
@@ -261,7 +409,7 @@ async def _list_resources() -> List[types.Resource]:
             uri=WIDGET_URI,
             description="Interactive property listing widget with favorites, sorting, and filters",
             mimeType=MIME_TYPE,
-            _meta=_tool_meta(),
+            _meta=_resource_meta(),
         )
     ]
 
@@ -281,42 +429,87 @@ async def _handle_read_resource(req: types.ReadResourceRequest) -> types.ServerR
             uri=WIDGET_URI,
             mimeType=MIME_TYPE,
             text=WIDGET_HTML,
-            _meta=_tool_meta(),
+            _meta=_resource_meta(),
         )
     ]
     
     return types.ServerResult(types.ReadResourceResult(contents=contents))
 
 # --- Custom Tool Handler ---
+# Encoded text of responses that only change with the listings version
+_encoded_responses = json_codec.EncodedCache()
+
+# Tool calls run off the event loop: reads on a bounded pool, writes through
+# a single writer that group-commits them. Limits cap in-flight calls per tool.
+tool_executor = ToolExecutor(
+    read_workers=TOOL_READ_WORKERS,
+    write_batch=tools.write_batch,
+    write_batch_size=WRITE_BATCH_SIZE,
+    write_batch_window=WRITE_BATCH_WINDOW_MS / 1000,
+    limits={
+        "query_listings": 8,
+        "search_listings_text": 8,
+        "get_map_clusters": 8,
+        "calculate_average_price": 4,
+        "match_client": 4,
+        "match_all_buyers": 2,
+        "view_leads": 4,
+        "view_alerts": 4,
+        "get_schema": 8,
+        "capture_lead": 16,
+        "schedule_viewing": 16,
+    },
+)
+
 async def _call_tool_request(req: types.CallToolRequest) -> types.ServerResult:
     """Handle tool calls with Apps SDK format."""
     tool_name = req.params.name
     arguments = req.params.arguments or {}
     
     if tool_name == "get_schema":
-        result = tools.get_schema()
         return types.ServerResult(
             types.CallToolResult(
                 content=[
                     types.TextContent(
                         type="text",
-                        text=json.dumps(result, indent=2),
+                        text=await tool_executor.read(
+                            "get_schema", _encoded_responses.get,
+                            "get_schema", tools.get_listings_version(), tools.get_schema
+                        ),
                     )
                 ],
             )
         )
     
     elif tool_name == "query_listings":
-        result = tools.query_listings(
+        result = await tool_executor.read(
+            "query_listings", tools.query_listings,
             postcode=arguments.get("postcode"),
             property_type=arguments.get("property_type"),
             max_price=arguments.get("max_price"),
             min_bedrooms=arguments.get("min_bedrooms"),
             has_garden=arguments.get("has_garden"),
             has_parking=arguments.get("has_parking"),
-            limit=arguments.get("limit", 5)
+            limit=arguments.get("limit", 5),
+            min_price=arguments.get("min_price"),
+            max_bedrooms=arguments.get("max_bedrooms"),
+            sort_by=arguments.get("sort_by"),
+            order=arguments.get("order", "asc"),
+            cursor=arguments.get("cursor"),
+            profile=arguments.get("profile", "card"),
+            fields=arguments.get("fields"),
+            near=arguments.get("near"),
+            bbox=arguments.get("bbox")
         )
         
+        if "error" in result:
+            return types.ServerResult(
+                types.CallToolResult(
+                    content=[types.TextContent(type="text", text=result["error"])],
+                    isError=True,
+                )
+            )
+        
         # Apps SDK format: content + structuredContent + _meta
         return types.ServerResult(
             types.CallToolResult(
@@ -333,24 +526,101 @@ async def _call_tool_request(req: types.CallToolRequest) -> types.ServerResult:
             )
         )
     
-    elif tool_name == "calculate_average_price":
-        result = tools.calculate_average_price(
+    elif tool_name == "search_listings_text":
+        result = await tool_executor.read(
+            "search_listings_text", tools.search_listings_text,
+            query=arguments.get("query", ""),
             postcode=arguments.get("postcode"),
-            property_type=arguments.get("property_type")
+            property_type=arguments.get("property_type"),
+            max_price=arguments.get("max_price"),
+            min_bedrooms=arguments.get("min_bedrooms"),
+            has_garden=arguments.get("has_garden"),
+            has_parking=arguments.get("has_parking"),
+            limit=arguments.get("limit", 5),
+            min_price=arguments.get("min_price"),
+            max_bedrooms=arguments.get("max_bedrooms"),
+            profile=arguments.get("profile", "card"),
+            fields=arguments.get("fields")
+        )
+
+        if "error" in result:
+            return types.ServerResult(
+                types.CallToolResult(
+                    content=[types.TextContent(type="text", text=result["error"])],
+                    isError=True,
+                )
+            )
+
+        return types.ServerResult(
+            types.CallToolResult(
+                content=[
+                    types.TextContent(
+                        type="text",
+                        text=f"Found {result['total_results']} properties matching '{arguments.get('query', '')}'.",
+                    )
+                ],
+                structuredContent=result.get("structuredContent", result),
+                _meta={
+                    "openai/toolInvocation/invoked": "Found properties",
+                },
+            )
+        )
+    
+    elif tool_name == "get_map_clusters":
+        result = await tool_executor.read(
+            "get_map_clusters", tools.get_map_clusters,
+            zoom=arguments.get("zoom"),
+            bbox=arguments.get("bbox")
+        )
+
+        if "error" in result:
+            return types.ServerResult(
+                types.CallToolResult(
+                    content=[types.TextContent(type="text", text=result["error"])],
+                    isError=True,
+                )
+            )
+
+        return types.ServerResult(
+            types.CallToolResult(
+                content=[
+                    types.TextContent(
+                        type="text",
+                        text=f"{result['cluster_count']} map clusters covering {result['listing_count']} listings.",
+                    )
+                ],
+                structuredContent=result,
+            )
+        )
+    
+    elif tool_name == "calculate_average_price":
+        postcode = arguments.get("postcode")
+        property_type = arguments.get("property_type")
+        group_by = arguments.get("group_by")
+        text = await tool_executor.read(
+            "calculate_average_price", _encoded_responses.get,
+            ("calculate_average_price", json_codec.dumps([postcode, property_type, group_by])),
+            tools.get_listings_version(),
+            lambda: tools.calculate_average_price(
+                postcode=postcode,
+                property_type=property_type,
+                group_by=group_by
+            ),
         )
         return types.ServerResult(
             types.CallToolResult(
                 content=[
                     types.TextContent(
                         type="text",
-                        text=json.dumps(result, indent=2),
+                        text=text,
                     )
                 ],
             )
         )
     
     elif tool_name == "capture_lead":
-        result = tools.capture_lead(
+        result = await tool_executor.write(
+            "capture_lead", tools.capture_lead,
             full_name=arguments.get("full_name"),
             email=arguments.get("email"),
             mobile=arguments.get("mobile"),
@@ -380,9 +650,12 @@ async def _call_tool_request(req: types.CallToolRequest) -> types.ServerResult:
         )
     
     elif tool_name == "match_client":
-        result = tools.match_client(
+        result = await tool_executor.read(
+            "match_client", tools.match_client,
             client_id=arguments.get("client_id"),
-            limit=arguments.get("limit", 10)
+            limit=arguments.get("limit", 10),
+            profile=arguments.get("profile", "card"),
+            fields=arguments.get("fields")
         )
         
         if "error" in result:
@@ -408,7 +681,8 @@ async def _call_tool_request(req: types.CallToolRequest) -> types.ServerResult:
         )
     
     elif tool_name == "schedule_viewing":
-        result = tools.schedule_viewing(
+        result = await tool_executor.write(
+            "schedule_viewing", tools.schedule_viewing,
             property_id=arguments.get("property_id"),
             buyer_client_id=arguments.get("buyer_client_id"),
             datetime_iso=arguments.get("datetime_iso"),
@@ -431,13 +705,57 @@ async def _call_tool_request(req: types.CallToolRequest) -> types.ServerResult:
             )
         )
     
+    elif tool_name == "match_all_buyers":
+        result = await tool_executor.read(
+            "match_all_buyers", tools.match_all_buyers,
+            stage=arguments.get("stage"),
+            per_buyer=arguments.get("per_buyer", 3),
+            limit=arguments.get("limit", 50),
+            top_listings=arguments.get("top_listings", 10)
+        )
+
+        return types.ServerResult(
+            types.CallToolResult(
+                content=[types.TextContent(type="text", text=result["message"])],
+                structuredContent=result,
+                _meta={"openai/toolInvocation/invoked": "Buyers matched"},
+            )
+        )
+    
+    elif tool_name == "view_alerts":
+        result = await tool_executor.read(
+            "view_alerts", tools.view_alerts,
+            client_id=arguments.get("client_id"),
+            property_id=arguments.get("property_id"),
+            since=arguments.get("since", 0),
+            limit=arguments.get("limit", 20)
+        )
+
+        return types.ServerResult(
+            types.CallToolResult(
+                content=[types.TextContent(type="text", text=result["message"])],
+                structuredContent=result,
+                _meta={"openai/toolInvocation/invoked": "Alerts retrieved"},
+            )
+        )
+    
     elif tool_name == "view_leads":
-        result = tools.view_leads(
+        result = await tool_executor.read(
+            "view_leads", tools.view_leads,
             role=arguments.get("role"),
             stage=arguments.get("stage"),
-            limit=arguments.get("limit", 20)
+            limit=arguments.get("limit", 20),
+            cursor=arguments.get("cursor")
         )
         
+        if "error" in result:
+            return types.ServerResult(
+                types.CallToolResult(
+                    content=[types.TextContent(type="text", text=result["error"])],
+                    isError=True,
+                )
+            )
+        
         return types.ServerResult(
             types.CallToolResult(
                 content=[types.TextContent(type="text", text=result["message"])],
@@ -466,29 +784,63 @@ mcp._mcp_server.request_handlers[types.ReadResourceRequest] = _handle_read_resou
 # --- Create Streamable HTTP App ---
 app = mcp.streamable_http_app()
 
+# --- Hot-reload listings when the feed file changes ---
+tools.start_listings_watcher(LISTINGS_RELOAD_SECONDS)
+
 # --- Add Test Endpoints ---
-from starlette.responses import HTMLResponse, JSONResponse
+from starlette.responses import HTMLResponse, JSONResponse, Response
 from starlette.routing import Route
 
+class FastJSONResponse(JSONResponse):
+    """Compact JSON response using the fastest available encoder."""
+
+    def render(self, content: Any) -> bytes:
+        return json_codec.dumps(content).encode("utf-8")
+
 async def serve_widget_test(request):
     """Serve the widget HTML for browser testing."""
-    if not WIDGET_HTML:
+    if not WIDGET_BUNDLE:
         return HTMLResponse("<h1>Widget not loaded</h1><p>Run: cd web && npm run build</p>", status_code=404)
-    return HTMLResponse(WIDGET_HTML)
+    headers = {
+        "ETag": WIDGET_BUNDLE.etag,
+        # Same URL for every build, so always revalidate - a 304 costs no body
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if WIDGET_BUNDLE.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    body, encoding = WIDGET_BUNDLE.negotiate(request.headers.get("accept-encoding"))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type="text/html; charset=utf-8", headers=headers)
 
 async def serve_test_data(request):
     """Serve test data to simulate tool output."""
-    result = tools.query_listings(postcode="DY4", max_price=100000, limit=5)
-    return JSONResponse(result)
+    result = await tool_executor.read("query_listings", tools.query_listings, postcode="DY4", max_price=100000, limit=5)
+    return FastJSONResponse(result)
+
+async def serve_clusters(request):
+    """Map clusters for a dashboard map: /clusters?zoom=8&bbox=south,west,north,east"""
+    try:
+        zoom = int(request.query_params.get("zoom", "6"))
+        bbox = request.query_params.get("bbox")
+        bbox = [float(value) for value in bbox.split(",")] if bbox else None
+    except ValueError:
+        return FastJSONResponse({"error": "zoom must be an integer and bbox four comma-separated numbers"}, status_code=400)
+    result = await tool_executor.read("get_map_clusters", tools.get_map_clusters, zoom=zoom, bbox=bbox)
+    return FastJSONResponse(result, status_code=400 if "error" in result else 200)
 
 async def serve_health(request):
     """Health check endpoint for monitoring."""
     from datetime import datetime
-    return JSONResponse({
+    return FastJSONResponse({
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat() + "Z",
         "environment": ENVIRONMENT,
-        "widget_loaded": bool(WIDGET_HTML)
+        "widget_loaded": bool(WIDGET_HTML),
+        "listings_version": tools.get_listings_version(),
+        "result_cache": tools.result_cache.stats(),
+        "tool_executor": tool_executor.stats()
     })
 
 async def serve_index(request):
@@ -552,6 +904,7 @@ app.routes.extend([
     Route("/health", serve_health),
     Route("/widget", serve_widget_test),
     Route("/test-data", serve_test_data),
+    Route("/clusters", serve_clusters),
 ])
 
 # --- Add CORS for ChatGPT ---
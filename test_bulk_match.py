@@ -0,0 +1,59 @@
+"""
+Tests for bulk buyer matching
+"""
+import random
+
+from bulk_match import match_buyers
+from listing_index import ListingIndex
+from match_scoring import top_matches
+
+
+def _brute_force(listings, buyer):
+    return [
+        row for row, listing in enumerate(listings)
+        if "sold" not in listing.get("status", "").lower()
+        and not (buyer.get("budget_max") and listing.get("price_amount", 0) > buyer["budget_max"])
+        and not (buyer.get("min_bedrooms") and listing.get("bedrooms", 0) < buyer["min_bedrooms"])
+    ]
+
+
+def test_matches_agree_with_a_per_buyer_scan():
+    rng = random.Random(7)
+    listings = [
+        {
+            "price_amount": rng.choice([90000, 150000, 150000, 240000, 400000]),
+            "bedrooms": rng.randint(1, 4),
+            "status": rng.choice(["For Sale", "Sold Subject to Contract"]),
+        }
+        for _ in range(200)
+    ]
+    buyers = [
+        {"budget_max": rng.choice([None, 100000, 150000, 300000]), "min_bedrooms": rng.choice([None, 1, 2, 3])}
+        for _ in range(60)
+    ]
+    index = ListingIndex(listings)
+    result = match_buyers(index, buyers, per_buyer=2)
+
+    interested = [0] * len(listings)
+    for buyer, top, count in zip(buyers, result.top_rows, result.match_counts.tolist()):
+        expected = _brute_force(listings, buyer)
+        assert count == len(expected)
+        for row in expected:
+            interested[row] += 1
+        # Ranked as match_client ranks them
+        assert top.tolist() == [row for row, _ in top_matches(index, buyer, 2)[0]]
+    assert result.interested_counts.tolist() == interested
+
+
+def test_no_buyers_or_no_top_matches():
+    index = ListingIndex([{"price_amount": 100000, "bedrooms": 2, "status": "For Sale"}])
+    assert match_buyers(index, []).interested_counts.tolist() == [0]
+    result = match_buyers(index, [{"budget_max": 100000}], per_buyer=0)
+    assert result.match_counts.tolist() == [1] and result.top_rows[0].tolist() == []
+
+
+def test_only_the_first_ranked_buyers_get_top_matches():
+    index = ListingIndex([{"price_amount": 100000, "bedrooms": 2, "status": "For Sale"}])
+    result = match_buyers(index, [{"budget_max": 100000}, {"budget_max": 200000}], ranked=1)
+    assert result.match_counts.tolist() == [1, 1]
+    assert [rows.tolist() for rows in result.top_rows] == [[0], []]
@@ -0,0 +1,130 @@
+"""
+Tests for the append-only client journal
+"""
+import json
+
+import client_journal
+from client_journal import ClientJournal
+
+
+def _write_snapshot(path, clients):
+    path.write_text("".join(json.dumps(c) + "\n" for c in clients))
+
+
+def _read_snapshot(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_replay_applies_journal_over_snapshot(tmp_path):
+    snapshot = tmp_path / "clients.jsonl"
+    journal_path = tmp_path / "clients.journal.jsonl"
+    _write_snapshot(snapshot, [{"client_id": "C0001", "stage": "warm"}])
+
+    journal = ClientJournal(str(snapshot), str(journal_path))
+    clients = journal.replay(_read_snapshot(snapshot))
+    journal.append({"op": "add", "client": {"client_id": "C0002", "stage": "hot"}})
+    journal.append({"op": "update", "client_id": "C0001", "updates": {"stage": "cold"}})
+
+    # Snapshot untouched; a fresh process sees the mutations via replay
+    assert _read_snapshot(snapshot) == [{"client_id": "C0001", "stage": "warm"}]
+    restarted = ClientJournal(str(snapshot), str(journal_path)).replay(_read_snapshot(snapshot))
+    assert restarted == [
+        {"client_id": "C0001", "stage": "cold"},
+        {"client_id": "C0002", "stage": "hot"},
+    ]
+
+
+def test_replay_skips_torn_last_line(tmp_path):
+    snapshot = tmp_path / "clients.jsonl"
+    journal_path = tmp_path / "clients.journal.jsonl"
+    _write_snapshot(snapshot, [])
+    journal_path.write_text(
+        json.dumps({"op": "add", "client": {"client_id": "C0001"}}) + "\n" + '{"op": "add", "cli'
+    )
+    clients = ClientJournal(str(snapshot), str(journal_path)).replay([])
+    assert clients == [{"client_id": "C0001"}]
+
+
+def test_compaction_writes_snapshot_and_clears_journal(tmp_path):
+    snapshot = tmp_path / "clients.jsonl"
+    journal_path = tmp_path / "clients.journal.jsonl"
+    _write_snapshot(snapshot, [])
+
+    journal = ClientJournal(str(snapshot), str(journal_path), compact_after=3)
+    clients = journal.replay([])
+    for n in range(1, 4):
+        client = {"client_id": f"C{n:04d}"}
+        clients.append(client)
+        journal.append({"op": "add", "client": client})
+        journal.maybe_compact(clients)
+    journal.wait()
+
+    assert [c["client_id"] for c in _read_snapshot(snapshot)] == ["C0001", "C0002", "C0003"]
+    assert not journal_path.exists()
+    assert not (tmp_path / "clients.journal.jsonl.compacting").exists()
+
+    # Appends after compaction land in a fresh journal and replay on restart
+    journal.append({"op": "update", "client_id": "C0002", "updates": {"stage": "hot"}})
+    restarted = ClientJournal(str(snapshot), str(journal_path)).replay(_read_snapshot(snapshot))
+    assert restarted[1] == {"client_id": "C0002", "stage": "hot"}
+
+
+def test_replay_is_idempotent_after_interrupted_compaction(tmp_path):
+    snapshot = tmp_path / "clients.jsonl"
+    journal_path = tmp_path / "clients.journal.jsonl"
+    # Snapshot already contains C0001, but the rotated journal was not removed
+    _write_snapshot(snapshot, [{"client_id": "C0001", "viewings": ["V1001"]}])
+    (tmp_path / "clients.journal.jsonl.compacting").write_text(
+        json.dumps({"op": "add", "client": {"client_id": "C0001", "viewings": []}}) + "\n"
+        + json.dumps({"op": "update", "client_id": "C0001", "updates": {"viewings": ["V1001"]}}) + "\n"
+    )
+    clients = ClientJournal(str(snapshot), str(journal_path)).replay(_read_snapshot(snapshot))
+    assert clients == [{"client_id": "C0001", "viewings": ["V1001"]}]
+
+
+def test_failed_snapshot_keeps_rotated_journal_for_next_compaction(tmp_path, monkeypatch):
+    snapshot = tmp_path / "clients.jsonl"
+    journal_path = tmp_path / "clients.journal.jsonl"
+    _write_snapshot(snapshot, [])
+    journal = ClientJournal(str(snapshot), str(journal_path))
+    clients = journal.replay([])
+
+    def fail(filepath, lines):
+        raise OSError("disk full")
+
+    clients.append({"client_id": "C0001"})
+    journal.append({"op": "add", "client": clients[0]})
+    with monkeypatch.context() as m:
+        m.setattr(client_journal, "write_jsonl_atomic", fail)
+        journal.compact(clients)
+    assert (tmp_path / "clients.journal.jsonl.compacting").exists()
+
+    # A second compaction runs after more appends but fails too: nothing is lost
+    clients.append({"client_id": "C0002"})
+    journal.append({"op": "add", "client": clients[1]})
+    with monkeypatch.context() as m:
+        m.setattr(client_journal, "write_jsonl_atomic", fail)
+        journal.compact(clients)
+    restarted = ClientJournal(str(snapshot), str(journal_path)).replay(_read_snapshot(snapshot))
+    assert [c["client_id"] for c in restarted] == ["C0001", "C0002"]
+
+    # Once a snapshot is written, the rotated journal is cleared
+    journal.compact(clients)
+    assert [c["client_id"] for c in _read_snapshot(snapshot)] == ["C0001", "C0002"]
+    assert not (tmp_path / "clients.journal.jsonl.compacting").exists()
+    assert not journal_path.exists()
+
+
+def test_batch_group_commits_on_exit(tmp_path):
+    snapshot = tmp_path / "clients.jsonl"
+    journal_path = tmp_path / "clients.journal.jsonl"
+    journal = ClientJournal(str(snapshot), str(journal_path))
+    with journal.batch():
+        journal.append({"op": "add", "client": {"client_id": "C0001"}})
+        journal.append({"op": "add", "client": {"client_id": "C0002"}})
+        # Buffered until the batch commits
+        assert not journal_path.exists() or journal_path.read_text() == ""
+    assert [json.loads(line)["client"]["client_id"] for line in journal_path.read_text().splitlines()] == [
+        "C0001", "C0002"
+    ]
+    assert journal.pending == 2
@@ -0,0 +1,72 @@
+"""
+Tests for the SQLite client store
+"""
+import sqlite3
+
+import pytest
+
+from client_store import ClientStore
+
+BUYER = {
+    "client_id": "C0001",
+    "role": "buyer",
+    "full_name": "Sarah Mitchell",
+    "contact": {"email": "sarah@example.com", "mobile": "+44 7700 900001"},
+    "stage": "hot",
+    "budget_max": 150000,
+    "viewings": [{"viewing_id": "V1001", "property_id": "32926983", "datetime": "2025-11-20T14:00:00Z"}],
+    "created_at": "2025-11-01T10:30:00Z",
+}
+
+
+def test_round_trip_keeps_record_and_fills_tables(tmp_path):
+    path = str(tmp_path / "clients.db")
+    store = ClientStore(path)
+    store.import_clients([BUYER, {"client_id": "C0002", "role": "seller", "viewings": []}])
+    store.put({**BUYER, "stage": "cold", "viewings": []})
+
+    assert [c["client_id"] for c in store.load_all()] == ["C0001", "C0002"]
+    assert store.load_all()[0] == {**BUYER, "stage": "cold", "viewings": []}
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT email FROM contacts WHERE client_id = 'C0001'").fetchone() == ("sarah@example.com",)
+    assert conn.execute("SELECT COUNT(*) FROM viewings").fetchone() == (0,)
+    assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+
+
+def test_failed_inner_block_rolls_back_to_savepoint(tmp_path):
+    store = ClientStore(str(tmp_path / "clients.db"))
+    with store.transaction():
+        store.put(BUYER)
+        with pytest.raises(RuntimeError):
+            with store.transaction():
+                store.put({"client_id": "C0002", "viewings": []})
+                raise RuntimeError("boom")
+    assert [c["client_id"] for c in store.load_all()] == ["C0001"]
+
+
+def test_sequences_and_writes_are_shared_between_connections(tmp_path):
+    path = str(tmp_path / "clients.db")
+    first, second = ClientStore(path), ClientStore(path)
+    first.seed("client", 12)
+    second.seed("client", 5)
+    assert [first.next("client"), second.next("client"), first.next("client")] == [13, 14, 15]
+
+    version = second.data_version()
+    first.put(BUYER)
+    assert second.data_version() != version
+    assert second.load_all() == [BUYER]
+
+
+def test_clients_version_is_shared_and_rolls_back_with_the_write(tmp_path):
+    path = str(tmp_path / "clients.db")
+    first, second = ClientStore(path), ClientStore(path)
+    assert second.clients_version() == 0
+    assert first.put(BUYER) == 1
+    assert second.put({"client_id": "C0002", "viewings": []}) == 2
+    with pytest.raises(RuntimeError):
+        with first.transaction():
+            first.put({**BUYER, "stage": "cold"})
+            raise RuntimeError("boom")
+    clients, version = second.load_versioned()
+    assert version == first.clients_version() == 2
+    assert [c["client_id"] for c in clients] == ["C0001", "C0002"]
@@ -0,0 +1,45 @@
+"""
+Tests for opaque pagination cursors
+"""
+import pytest
+from cursors import encode_cursor, decode_cursor
+
+PARAMS = {"postcode": "DY4", "sort_by": "price_amount"}
+
+
+def test_round_trip():
+    cursor = encode_cursor("listings", 3, PARAMS, 42)
+    assert decode_cursor(cursor, "listings", 3, dict(PARAMS)) == 42
+
+
+def test_rejects_other_query_kind_or_version():
+    cursor = encode_cursor("listings", 3, PARAMS, 42)
+    with pytest.raises(ValueError, match="does not match"):
+        decode_cursor(cursor, "listings", 3, {**PARAMS, "postcode": "LE65"})
+    with pytest.raises(ValueError, match="does not match"):
+        decode_cursor(cursor, "leads", 3, PARAMS)
+    with pytest.raises(ValueError, match="expired"):
+        decode_cursor(cursor, "listings", 4, PARAMS)
+
+
+def test_rejects_garbage():
+    for cursor in ("", "not-a-cursor", "W10"):
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            decode_cursor(cursor, "listings", 3, PARAMS)
+
+
+def test_rejects_negative_position():
+    cursor = encode_cursor("leads", 3, PARAMS, -5)
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor, "leads", 3, PARAMS)
+
+
+def test_paged_tools_reject_limits_that_cannot_advance():
+    import tools
+    from data_loader import get_clients_version
+
+    for limit in (0, -1):
+        assert tools.view_leads(limit=limit) == {"error": "limit must be at least 1"}
+        assert tools.query_listings(limit=limit) == {"error": "limit must be at least 1"}
+    forged = encode_cursor("leads", get_clients_version(), {"role": None, "stage": None}, -1)
+    assert tools.view_leads(cursor=forged) == {"error": "Invalid cursor"}
@@ -0,0 +1,70 @@
+"""
+Tests for the spatial grid over listing coordinates
+"""
+import math
+
+import numpy as np
+import pytest
+
+from geo_index import GeoGrid, haversine_miles, parse_bbox, parse_near
+from listing_index import ListingIndex
+
+LISTINGS = [
+    {"property_id": "P0", "lat": "52.5278", "lng": "-2.0472"},   # Tipton
+    {"property_id": "P1", "lat": "52.5120", "lng": "-2.0810"},   # Dudley, ~2 miles away
+    {"property_id": "P2", "lat": "52.7450", "lng": "-1.4740"},   # Ashby, far away
+    {"property_id": "P3"},                                        # no coordinates
+    {"property_id": "P4", "lat": "52.5278", "lng": "-2.0472"},   # same spot as P0
+]
+
+
+def _grid():
+    index = ListingIndex(LISTINGS)
+    return index, GeoGrid(index.lat, index.lng)
+
+
+def test_coordinates_are_parsed_to_floats():
+    index, _ = _grid()
+    assert index.lat[0] == 52.5278 and math.isnan(index.lat[3])
+
+
+def test_near_is_distance_sorted_and_matches_brute_force():
+    index, grid = _grid()
+    rows, distances = grid.near(52.5278, -2.0472, 3.0)
+    assert rows.tolist() == [0, 4, 1]
+    assert distances[0] == 0 and 1.5 < distances[2] < 3.0
+
+    for radius in (0.5, 3.0, 50.0):
+        rows, _ = grid.near(52.6, -1.8, radius)
+        brute = np.flatnonzero(haversine_miles(52.6, -1.8, index.lat, index.lng) <= radius)
+        assert sorted(rows.tolist()) == brute.tolist()
+
+    mask = np.array([False, True, True, True, True])
+    assert grid.near(52.5278, -2.0472, 3.0, mask=mask)[0].tolist() == [4, 1]
+
+
+def test_bbox_and_argument_validation():
+    _, grid = _grid()
+    assert grid.rows_in_box(52.5, -2.1, 52.53, -2.0).tolist() == [0, 1, 4]
+    assert grid.bbox_mask(52.7, -1.5, 52.8, -1.4).tolist() == [False, False, True, False, False]
+
+    assert parse_near({"lat": 52.5, "lng": -2}) == (52.5, -2.0, 2.0)
+    assert parse_bbox(["52.5", -2.1, 52.6, -2.0]) == (52.5, -2.1, 52.6, -2.0)
+    with pytest.raises(ValueError):
+        parse_near({"lat": 52.5})
+    with pytest.raises(ValueError):
+        parse_near({"lat": 52.5, "lng": -2, "radius_miles": 0})
+    with pytest.raises(ValueError):
+        parse_bbox([52.6, -2.1, 52.5, -2.0])
+
+
+def test_out_of_range_bbox_is_rejected_and_box_is_clamped_to_the_grid():
+    _, grid = _grid()
+    for bbox in ([-1e9, -1, 1e9, 1], [52.5, -2.1, 52.6, 200], [float("nan"), -2.1, 52.6, -2.0],
+                 [52.5, float("-inf"), 52.6, -2.0]):
+        with pytest.raises(ValueError):
+            parse_bbox(bbox)
+    # A whole-world box only walks the populated cells
+    assert grid.rows_in_box(-90, -180, 90, 180).tolist() == [0, 1, 2, 4]
+    assert grid.rows_in_box(10, 10, 20, 20).tolist() == []
+    assert GeoGrid(np.array([np.nan]), np.array([np.nan])).rows_in_box(-90, -180, 90, 180).tolist() == []
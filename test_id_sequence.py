@@ -0,0 +1,46 @@
+"""
+Tests for the client/viewing ID sequences
+"""
+import threading
+from id_sequence import SequenceAllocator, max_id_number
+
+
+def test_max_id_number():
+    assert max_id_number(["C0001", "C0012", "Cxx", "", "V1004"], "C") == 12
+    assert max_id_number([], "V", default=1000) == 1000
+
+
+def test_seed_never_lowers_and_next_is_monotonic(tmp_path):
+    sequences = SequenceAllocator(str(tmp_path / "sequences.json"))
+    sequences.seed("client", 12)
+    sequences.seed("client", 3)
+    assert [sequences.next("client") for _ in range(3)] == [13, 14, 15]
+
+
+def test_state_survives_restart(tmp_path):
+    state = str(tmp_path / "sequences.json")
+    sequences = SequenceAllocator(state)
+    sequences.seed("viewing", 1000)
+    sequences.next("viewing")
+    sequences.next("viewing")
+
+    # Data on disk only shows V1001, but V1002 was already handed out
+    restarted = SequenceAllocator(state)
+    restarted.seed("viewing", 1001)
+    assert restarted.next("viewing") == 1003
+
+
+def test_concurrent_allocations_are_unique(tmp_path):
+    sequences = SequenceAllocator(str(tmp_path / "sequences.json"))
+    allocated = []
+
+    def allocate():
+        for _ in range(25):
+            allocated.append(sequences.next("client"))
+
+    threads = [threading.Thread(target=allocate) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(allocated) == list(range(1, 101))
@@ -0,0 +1,28 @@
+"""
+Tests for the JSON response encoder
+"""
+import json
+
+import numpy as np
+
+from json_codec import EncodedCache, dumps
+
+
+def test_compact_by_default_and_numpy_aware():
+    text = dumps({"count": np.int64(3), "rows": np.arange(2), "name": "Café"})
+    assert " " not in text.replace("Café", "")
+    assert json.loads(text) == {"count": 3, "rows": [0, 1], "name": "Café"}
+    assert json.loads(dumps({"a": [1]}, indent=True)) == {"a": [1]}
+
+
+def test_encoded_cache_reencodes_only_on_version_change():
+    cache = EncodedCache()
+    builds = []
+
+    def build():
+        builds.append(1)
+        return {"n": len(builds)}
+
+    assert cache.get("schema", 1, build) == cache.get("schema", 1, build) == '{"n":1}'
+    assert cache.get("schema", 2, build) == '{"n":2}'
+    assert len(builds) == 2
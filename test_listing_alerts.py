@@ -0,0 +1,60 @@
+"""
+Tests for incremental new-listing alerts
+"""
+from listing_alerts import AlertFeed, AlertPipeline, BuyerIndex, listing_changes
+from listings_snapshot import ListingsSnapshot
+
+BUYERS = [
+    {"client_id": "B0", "budget_max": 100000, "min_bedrooms": 2},
+    {"client_id": "B1", "budget_max": 200000, "min_bedrooms": 3},
+    {"client_id": "B2", "budget_max": 150000},
+    {"client_id": "B3", "min_bedrooms": 1},
+]
+BEFORE = [
+    {"property_id": "P0", "price_amount": 180000, "bedrooms": 3, "status": "For Sale"},
+    {"property_id": "P1", "price_amount": 90000, "bedrooms": 2, "status": "Sold Subject to Contract"},
+    {"property_id": "P2", "price_amount": 120000, "bedrooms": 2, "status": "For Sale"},
+]
+AFTER = [
+    {"property_id": "P0", "price_amount": 140000, "bedrooms": 3, "status": "For Sale"},  # price drop
+    {"property_id": "P1", "price_amount": 90000, "bedrooms": 2, "status": "For Sale"},   # back on market
+    {"property_id": "P2", "price_amount": 125000, "bedrooms": 2, "status": "For Sale"},  # price rise
+    {"property_id": "P3", "price_amount": 95000, "bedrooms": 1, "status": "For Sale"},   # new
+]
+
+
+def test_buyer_index_agrees_with_a_scan():
+    index = BuyerIndex(BUYERS)
+    for price in (50000, 100000, 150000, 250000):
+        for bedrooms in (0, 1, 2, 3):
+            expected = [
+                i for i, buyer in enumerate(BUYERS)
+                if (buyer.get("budget_max") or float("inf")) >= price and (buyer.get("min_bedrooms") or 0) <= bedrooms
+            ]
+            assert index.matching(price, bedrooms).tolist() == expected
+
+
+def test_reload_alerts_only_buyers_who_newly_match():
+    previous, current = ListingsSnapshot(1, BEFORE), ListingsSnapshot(2, AFTER)
+    assert [(row, reason) for row, _, reason in listing_changes(previous, current)] == [
+        (0, "price_drop"), (1, "back_on_market"), (3, "new_listing"),
+    ]
+
+    pipeline = AlertPipeline(lambda: BUYERS, lambda: 1)
+    assert pipeline.process(previous, current) == 6
+    alerts, next_since = pipeline.feed.query(limit=10)
+    assert [(a["property_id"], a["client_id"]) for a in alerts] == [
+        # B1 and B3 already matched P0 at 180k; B2 (150k) newly does
+        ("P0", "B2"), ("P1", "B0"), ("P1", "B2"), ("P1", "B3"), ("P3", "B2"), ("P3", "B3"),
+    ]
+    assert alerts[0]["previous_price"] == 180000 and next_since == 6
+    assert pipeline.process(current, current) == 0
+
+
+def test_feed_pages_with_since_and_filters():
+    feed = AlertFeed(max_alerts=3)
+    feed.extend([{"client_id": f"B{i % 2}", "property_id": "P0"} for i in range(4)])
+    assert len(feed) == 3
+    alerts, next_since = feed.query(since=0, limit=2)
+    assert [a["alert_id"] for a in alerts] == [2, 3] and next_since == 3
+    assert [a["alert_id"] for a in feed.query(client_id="B1", since=next_since)[0]] == [4]
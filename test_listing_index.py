@@ -0,0 +1,193 @@
+"""
+Tests for the columnar listings index
+"""
+import numpy as np
+import pytest
+from listing_index import (
+    CARD_FIELDS, ListingIndex, normalize_postcode, property_type_terms, resolve_fields,
+)
+from data_loader import get_listings_data
+from price_cube import PriceCube
+
+SAMPLE = [
+    {"property_id": "1", "price_amount": 80000, "bedrooms": 1, "bathrooms": 1, "garden": True, "parking": False,
+     "postcode": "DY4 7LG", "property_type": "Apartment - First Floor"},
+    {"property_id": "2", "price_amount": 250000, "bedrooms": 3, "bathrooms": 2, "garden": True, "parking": True,
+     "postcode": "LE65 1DA", "property_type": "House - Detached"},
+    {"property_id": "3", "price_amount": 120000, "bedrooms": 2, "bathrooms": 1, "garden": False, "parking": True,
+     "postcode": "DY4 0AB", "property_type": "Flat - Ground Floor"},
+    {"property_id": "4", "price_amount": 95000, "bedrooms": 2, "bathrooms": 1,
+     "postcode": "B79 7BG"},
+]
+
+
+def _ids(index, **filters):
+    return [l["property_id"] for l in index.rows(np.flatnonzero(index.filter_mask(**filters)))]
+
+
+def test_numeric_and_boolean_filters():
+    index = ListingIndex(SAMPLE)
+    assert _ids(index, max_price=100000) == ["1", "4"]
+    assert _ids(index, min_bedrooms=2) == ["2", "3", "4"]
+    assert _ids(index, has_parking=True) == ["2", "3"]
+    # Listings without a garden flag match neither True nor False
+    assert _ids(index, has_garden=False) == ["3"]
+
+
+def test_string_filters():
+    index = ListingIndex(SAMPLE)
+    assert _ids(index, postcode="dy4") == ["1", "3"]
+    assert _ids(index, property_type="FLOOR") == ["1", "3"]
+    assert _ids(index, property_type="apartment") == ["1", "3"]
+    assert _ids(index, postcode="DY4", property_type="ground floor") == ["3"]
+
+
+def test_normalize_postcode():
+    assert normalize_postcode(" dy4   7lg ") == "DY4 7LG"
+    assert normalize_postcode("dy47lg") == "DY4 7LG"
+    assert normalize_postcode("le65") == "LE65"
+    assert normalize_postcode("DY4 7") == "DY4 7"
+    assert normalize_postcode("le1 ") == "LE1 "
+
+
+def test_trailing_space_keeps_the_district_exact():
+    index = ListingIndex([{"postcode": "LE1 5AB"}, {"postcode": "LE10 1AA"}, {"postcode": "LE12 7XY"}])
+    assert index.postcode_rows("LE1 ").tolist() == [0]
+    assert index.postcode_rows("le1").tolist() == [0, 1, 2]
+    cube = PriceCube([{"price_amount": 100000, "postcode": "LE1 5AB"}, {"price_amount": 300000, "postcode": "LE10 1AA"}])
+    assert cube.query(postcode="LE1 ")[None].total == 100000
+
+
+def test_postcode_prefix_lookup():
+    index = ListingIndex(SAMPLE)
+    assert index.postcode_rows("DY4").tolist() == [0, 2]
+    assert index.postcode_rows("dy4 7").tolist() == [0]
+    assert index.postcode_rows("DY47LG").tolist() == [0]
+    assert index.postcode_rows("ZZ1").tolist() == []
+    assert _ids(index, postcode="dy4  0ab") == ["3"]
+
+
+def test_property_type_terms():
+    assert property_type_terms("Apartment - First Floor") == {"flat", "first", "floor"}
+    assert property_type_terms("House - Semi-Detached") == {"house", "semi"}
+    assert property_type_terms("Bungalow - Semi Detached") == {"bungalow", "semi"}
+    assert property_type_terms("House - End Terrace") == {"house", "end", "terraced"}
+    assert property_type_terms("House - End Town House") == {"house", "end", "townhouse"}
+
+
+def test_property_type_families():
+    index = ListingIndex([
+        {"property_type": "House - Detached"},
+        {"property_type": "House - Semi-Detached"},
+        {"property_type": "Bungalow - Detached"},
+        {"property_type": "House - Mid Terrace"},
+        {"property_type": "Townhouse - Semi Detached"},
+        {"property_type": "Apartment - Penthouse"},
+        {},
+    ])
+    assert index.type_rows("detached").tolist() == [0, 2]
+    assert index.type_rows("Semi-Detached").tolist() == [1, 4]
+    assert index.type_rows("detached house").tolist() == [0]
+    assert index.type_rows("terraced").tolist() == [3]
+    assert index.type_rows("house").tolist() == [0, 1, 3, 4]
+    # Partial words fall back to matching indexed terms and raw label words
+    assert index.type_rows("bung").tolist() == [2]
+    assert index.type_rows("apart").tolist() == [5]
+    assert index.type_rows("semi-det").tolist() == [1, 4]
+    assert index.type_rows("").tolist() == list(range(7))
+
+
+def test_get_by_property_id():
+    index = ListingIndex(SAMPLE)
+    assert index.get_by_property_id("3") is SAMPLE[2]
+    assert index.get_by_property_id("missing") is None
+
+
+def test_empty_index():
+    index = ListingIndex([])
+    assert index.filter_mask(postcode="DY4", property_type="flat").size == 0
+
+
+def test_matches_row_by_row_filter_on_real_data():
+    listings = get_listings_data()
+    index = ListingIndex(listings)
+    expected = [
+        l["property_id"] for l in listings
+        if l.get("price_amount", 0) <= 200000
+        and l.get("bedrooms", 0) >= 2
+        and l.get("postcode", "").upper().startswith("NG")
+        and "bungalow" in l.get("property_type", "").lower()
+    ]
+    assert _ids(index, postcode="ng", property_type="Bungalow", max_price=200000, min_bedrooms=2) == expected
+
+
+def test_partial_type_words_match_like_a_label_substring_on_real_data():
+    listings = get_listings_data()
+    index = ListingIndex(listings)
+
+    def substring_rows(query):
+        return [i for i, l in enumerate(listings) if query in (l.get("property_type") or "").lower()]
+
+    for query in ("apart", "bung", "detach", "terr", "end terr"):
+        assert index.type_rows(query).tolist() == substring_rows(query)
+    # "semi-det" also matches the "Semi Detached" spelling, which the substring misses
+    semi_rows = index.type_rows("semi-det").tolist()
+    assert substring_rows("semi-det")
+    assert semi_rows == sorted(set(substring_rows("semi-det")) | set(substring_rows("semi det")))
+
+
+def test_range_filters():
+    index = ListingIndex(SAMPLE)
+    assert _ids(index, min_price=95000, max_price=150000) == ["3", "4"]
+    assert _ids(index, max_bedrooms=2) == ["1", "3", "4"]
+
+
+def test_top_k_uses_sorted_order_and_stops_at_k():
+    index = ListingIndex(SAMPLE)
+    everything = np.ones(index.size, dtype=bool)
+    ids = lambda rows: [index.listings[i]["property_id"] for i in rows]
+    assert ids(index.top_k(everything, 2, sort_by="price_amount")) == ["1", "4"]
+    assert ids(index.top_k(everything, 2, sort_by="price_amount", descending=True)) == ["2", "3"]
+    # Ties keep file order in both directions
+    assert ids(index.top_k(everything, 4, sort_by="bedrooms")) == ["1", "3", "4", "2"]
+    assert ids(index.top_k(everything, 4, sort_by="bedrooms", descending=True)) == ["2", "3", "4", "1"]
+    assert ids(index.top_k(index.filter_mask(postcode="DY4"), 5)) == ["1", "3"]
+    assert index.top_k(everything, 0).size == 0
+
+
+def test_top_k_matches_full_sort_on_real_data():
+    listings = get_listings_data()
+    index = ListingIndex(listings)
+    mask = index.filter_mask(min_bedrooms=3, max_price=400000)
+    expected = sorted(
+        (l for l in listings if l["bedrooms"] >= 3 and l["price_amount"] <= 400000),
+        key=lambda l: l["price_amount"],
+    )[:7]
+    assert index.rows(index.top_k(mask, 7, sort_by="price_amount")) == expected
+
+
+def test_scan_resumes_without_duplicates():
+    index = ListingIndex(get_listings_data())
+    mask = index.filter_mask(postcode="NG")
+    pages, start = [], 0
+    while start < index.size:
+        rows, start = index.scan(mask, 25, sort_by="price_amount", descending=True, start=start)
+        pages.extend(rows.tolist())
+    assert pages == index.top_k(mask, index.size, sort_by="price_amount", descending=True).tolist()
+
+
+def test_projection_profiles_and_fields():
+    index = ListingIndex(SAMPLE)
+    rows = np.array([0, 3])
+    cards = index.project(rows)
+    assert cards[0] == {k: v for k, v in SAMPLE[0].items() if k in CARD_FIELDS}
+    assert "garden" not in cards[1]
+    # Card projections are built once and reused
+    assert index.project(rows)[0] is cards[0]
+    assert index.project(rows, resolve_fields("full"))[0] is SAMPLE[0]
+    assert index.project(rows, resolve_fields(fields=["price_amount"])) == [
+        {"property_id": "1", "price_amount": 80000},
+        {"property_id": "4", "price_amount": 95000},
+    ]
+    with pytest.raises(ValueError):
+        resolve_fields("compact")
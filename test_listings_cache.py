@@ -0,0 +1,81 @@
+"""
+Tests for the compiled listings cache
+"""
+import json
+import os
+
+import numpy as np
+
+from listings_cache import intern_strings, load_listings_cache, write_listings_cache
+from listings_snapshot import ListingsSnapshot, file_signature
+
+LISTINGS = [
+    {"property_id": "P1", "postcode": "DY4 7LG", "price_amount": 100000, "bedrooms": 2, "property_type": "Flat",
+     "description": "Ground floor flat with no upward chain"},
+    {"property_id": "P2", "postcode": "LE65 1DA", "price_amount": 250000, "bedrooms": 3, "property_type": "House - Detached"},
+]
+
+
+def _write_source(path, listings):
+    path.write_text("".join(json.dumps(listing) + "\n" for listing in listings))
+    return file_signature(str(path))
+
+
+def test_round_trip_matches_a_fresh_build(tmp_path):
+    source = tmp_path / "listings.jsonl"
+    cache_dir = str(tmp_path / "cache")
+    signature = _write_source(source, LISTINGS)
+    built = ListingsSnapshot(1, intern_strings(LISTINGS), signature)
+    assert write_listings_cache(cache_dir, str(source), signature,
+        built.listings, built.index, built.cube, built.text_index
+    )
+
+    listings, index, cube, text = load_listings_cache(cache_dir, str(source), signature)
+    assert listings == LISTINGS
+    assert isinstance(index.price, np.memmap)
+    assert index.filter_mask(postcode="le65", property_type="detached").tolist() == [False, True]
+    assert index.scan(index.filter_mask(), 1, sort_by="price_amount", descending=True)[0].tolist() == [1]
+    assert cube.query(postcode="DY4")[None].total == 100000
+    assert text.search("upward chain", 5)[0].tolist() == [0]
+
+
+def test_edited_source_misses(tmp_path):
+    source = tmp_path / "listings.jsonl"
+    cache_dir = str(tmp_path / "cache")
+    signature = _write_source(source, LISTINGS)
+    built = ListingsSnapshot(1, LISTINGS, signature)
+    write_listings_cache(cache_dir, str(source), signature,
+        built.listings, built.index, built.cube, built.text_index
+    )
+
+    signature = _write_source(source, LISTINGS[:1])
+    assert load_listings_cache(cache_dir, str(source), signature) is None
+
+
+def test_cleanup_keeps_other_writers_staging_dirs(tmp_path):
+    source = tmp_path / "listings.jsonl"
+    cache = tmp_path / "cache"
+    signature = _write_source(source, LISTINGS)
+    built = ListingsSnapshot(1, LISTINGS, signature)
+    write_listings_cache(str(cache), str(source), signature,
+        built.listings, built.index, built.cube, built.text_index
+    )
+    (stale_key,) = [p.name for p in cache.iterdir() if p.is_dir()]
+
+    # Another worker is mid-write, and one died long ago
+    in_progress = cache / ".tmp-other"
+    in_progress.mkdir()
+    (in_progress / "0.npy").write_bytes(b"")
+    abandoned = cache / ".tmp-dead"
+    abandoned.mkdir()
+    os.utime(abandoned, (0, 0))
+
+    signature = _write_source(source, LISTINGS[:1])
+    built = ListingsSnapshot(2, LISTINGS[:1], signature)
+    write_listings_cache(str(cache), str(source), signature,
+        built.listings, built.index, built.cube, built.text_index
+    )
+    names = {p.name for p in cache.iterdir() if p.is_dir()}
+    assert in_progress.name in names
+    assert stale_key not in names and abandoned.name not in names
+    assert len(names) == 2
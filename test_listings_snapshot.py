@@ -0,0 +1,39 @@
+"""
+Tests for listings snapshots and the hot-reload file watcher
+"""
+import os
+
+from listings_snapshot import ListingsSnapshot, FileWatcher, file_signature
+
+
+def test_snapshot_bundles_indexes():
+    snapshot = ListingsSnapshot(3, [
+        {"property_id": "P1", "postcode": "DY4 7LG", "price_amount": 100000, "property_type": "Flat"},
+    ])
+    assert snapshot.version == 3
+    assert snapshot.index.get_by_property_id("P1")["postcode"] == "DY4 7LG"
+    assert snapshot.cube.query(postcode="DY4")[None].count == 1
+
+
+def test_watcher_waits_for_file_to_settle(tmp_path):
+    path = tmp_path / "listings.jsonl"
+    path.write_text("{}\n")
+    changes = []
+    watcher = FileWatcher(str(path), lambda: changes.append(1), signature=file_signature(str(path)))
+
+    assert not watcher.poll_once()
+    path.write_text("{}\n{}\n")
+    # First sighting of a change only marks it pending
+    assert not watcher.poll_once()
+    assert watcher.poll_once()
+    assert changes == [1]
+    assert not watcher.poll_once()
+
+
+def test_watcher_ignores_missing_file(tmp_path):
+    path = tmp_path / "listings.jsonl"
+    path.write_text("{}\n")
+    watcher = FileWatcher(str(path), lambda: None, signature=file_signature(str(path)))
+    os.remove(path)
+    assert not watcher.poll_once()
+    assert not watcher.poll_once()
@@ -0,0 +1,41 @@
+"""
+Tests for map cluster aggregation
+"""
+import numpy as np
+
+from listing_index import ListingIndex
+from map_clusters import MapClusters, geohash_codes, geohash_string, zoom_to_precision
+
+LISTINGS = [
+    {"property_id": "P0", "lat": "52.5278", "lng": "-2.0472", "price_amount": 100000},
+    {"property_id": "P1", "lat": "52.5279", "lng": "-2.0473", "price_amount": 300000},
+    {"property_id": "P2", "lat": "52.5280", "lng": "-2.0470", "price_amount": 200000},
+    {"property_id": "P3", "lat": "52.5281", "lng": "-2.0471", "price_amount": 900000},
+    {"property_id": "P4", "lat": "52.7450", "lng": "-1.4740"},
+    {"property_id": "P5", "price_amount": 50000},
+]
+
+
+def test_geohash_matches_reference_encoding():
+    codes, _, _ = geohash_codes(np.array([57.64911]), np.array([10.40744]), 8)
+    assert geohash_string(int(codes[0]), 8) == "u4pruydq"
+    assert zoom_to_precision(0) == 1 and zoom_to_precision(12) == 5 and zoom_to_precision(40) == 8
+
+
+def test_clusters_count_centroid_and_price_stats():
+    clusters = MapClusters(ListingIndex(LISTINGS))
+    precision, records = clusters.query(12)
+    assert precision == 5
+    tipton, ashby = records
+    assert tipton["count"] == 4 and abs(tipton["lat"] - 52.52795) < 1e-6
+    assert (tipton["price_min"], tipton["price_median"], tipton["price_max"]) == (100000, 250000, 900000)
+    assert "property_id" not in tipton
+    assert ashby["count"] == 1 and ashby["property_id"] == "P4" and ashby["price_min"] is None
+    assert clusters.level(5) is clusters.level(5)
+
+
+def test_bbox_selects_overlapping_cells():
+    clusters = MapClusters(ListingIndex(LISTINGS))
+    _, records = clusters.query(12, (52.7, -1.5, 52.8, -1.4))
+    assert [r["count"] for r in records] == [1]
+    assert clusters.query(12, (10.0, 10.0, 11.0, 11.0))[1] == []
@@ -0,0 +1,55 @@
+"""
+Tests for ranked buyer match scoring
+"""
+import numpy as np
+
+from listing_index import ListingIndex
+from match_scoring import BuyerProfile, candidate_mask, score_rows, top_matches
+
+LISTINGS = [
+    {"property_id": "L0", "price_amount": 60000, "bedrooms": 2, "postcode": "NG1 1AA", "property_type": "Flat", "garden": False},
+    {"property_id": "L1", "price_amount": 148000, "bedrooms": 2, "postcode": "NG1 2BB", "property_type": "Flat", "garden": False},
+    {"property_id": "L2", "price_amount": 148000, "bedrooms": 2, "postcode": "DY4 7LG", "property_type": "House", "garden": True},
+    {"property_id": "L3", "price_amount": 149000, "bedrooms": 6, "postcode": "NG1 3CC", "property_type": "Flat", "garden": False},
+    {"property_id": "L4", "price_amount": 120000, "bedrooms": 2, "postcode": "NG1 1AA", "property_type": "Flat", "status": "Sold Subject to Contract"},
+    {"property_id": "L5", "price_amount": 250000, "bedrooms": 3, "postcode": "NG1 1AA", "property_type": "Flat"},
+]
+BUYER = {"budget_max": 150000, "min_bedrooms": 2, "interested_property_ids": ["L4"]}
+
+
+def test_candidates_exclude_sold_over_budget_and_too_small():
+    index = ListingIndex(LISTINGS)
+    assert candidate_mask(index, BuyerProfile(BUYER, index)).tolist() == [True, True, True, True, False, False]
+
+
+def test_ranking_prefers_budget_use_bedroom_fit_and_similarity():
+    index = ListingIndex(LISTINGS)
+    ranked, total = top_matches(index, BUYER, 4)
+    assert total == 4
+    scores = dict(ranked)
+    # L1 uses the budget in the liked district and type. L3 differs only by
+    # four surplus bedrooms, L0 by being far below budget, L2 by location and type
+    assert [row for row, _ in ranked][0] == 1
+    assert scores[1] > scores[3] and scores[1] > scores[0] and scores[1] > scores[2]
+    assert [score for _, score in ranked] == sorted(scores.values(), reverse=True)
+    assert all(0 <= score <= 1 for score in scores.values())
+
+
+def test_no_preferences_is_neutral_and_ties_keep_file_order():
+    index = ListingIndex(LISTINGS)
+    profile = BuyerProfile({"budget_max": None}, index)
+    scores = score_rows(index, profile, candidate_mask(index, profile).nonzero()[0])
+    assert len(set(scores.tolist())) == 1
+    assert [row for row, _ in top_matches(index, {}, 2)[0]] == [0, 1]
+    assert top_matches(index, BUYER, 0) == ([], 4)
+
+
+def test_type_similarity_uses_type_families():
+    index = ListingIndex([
+        {"property_id": "A", "price_amount": 100000, "postcode": "NG1 1AA", "property_type": "Apartment - First Floor"},
+        {"property_id": "F", "price_amount": 100000, "postcode": "DY4 7LG", "property_type": "Flat - Ground Floor"},
+        {"property_id": "H", "price_amount": 100000, "postcode": "DY4 7LG", "property_type": "House - Detached"},
+    ])
+    profile = BuyerProfile({"interested_property_ids": ["A"]}, index)
+    flat, house = score_rows(index, profile, np.array([1, 2])).tolist()
+    assert flat > house
@@ -0,0 +1,90 @@
+"""
+Tests for the precomputed price aggregates
+"""
+import numpy as np
+from data_loader import get_listings_data
+from listing_index import ListingIndex
+from price_cube import PriceCube, postcode_levels, property_type_family
+
+SAMPLE = [
+    {"price_amount": 100000, "bedrooms": 2, "postcode": "LE65 1DA", "property_type": "House - Semi-Detached"},
+    {"price_amount": 300000, "bedrooms": 3, "postcode": "LE65 2AY", "property_type": "House - Detached"},
+    {"price_amount": 200000, "bedrooms": 2, "postcode": "LE67 5AA", "property_type": "Bungalow - Detached"},
+    {"price_amount": 90000, "bedrooms": 1, "postcode": "DY4 7LG", "property_type": "Apartment - First Floor"},
+]
+
+
+def _totals(groups):
+    return {key: (stats.count, stats.total) for key, stats in groups.items()}
+
+
+def test_postcode_levels():
+    assert postcode_levels("le65 1da") == {
+        "area": "LE", "district": "LE65", "sector": "LE65 1", "postcode": "LE65 1DA",
+    }
+    assert postcode_levels("B79")["sector"] == "B79"
+
+
+def test_property_type_family():
+    assert property_type_family("House - Semi-Detached") == ("house", "semi")
+    assert property_type_family("Apartment - First Floor") == ("flat",)
+    assert property_type_family("Park home") == ()
+
+
+def test_query_by_prefix_type_and_group():
+    cube = PriceCube(SAMPLE)
+    assert _totals(cube.query(postcode="LE6")) == {None: (3, 600000)}
+    assert _totals(cube.query(postcode="le65 1")) == {None: (1, 100000)}
+    assert _totals(cube.query(postcode="DY47LG")) == {None: (1, 90000)}
+    assert _totals(cube.query(property_type="detached")) == {None: (2, 500000)}
+    assert _totals(cube.query(postcode="LE", group_by="bedrooms")) == {2: (2, 300000), 3: (1, 300000)}
+    assert _totals(cube.query(postcode="LE", group_by="district")) == {"LE65": (2, 400000), "LE67": (1, 200000)}
+    # Type words outside the family terms are left to the caller
+    assert cube.query(property_type="first floor") is None
+    assert cube.query(property_type="cottage") is None
+
+
+def test_incremental_add_and_remove():
+    cube = PriceCube(SAMPLE[:2])
+    cube.add_listing(SAMPLE[2])
+    cube.remove_listing(SAMPLE[0])
+    stats = cube.query(postcode="LE")[None]
+    assert (stats.count, stats.total, stats.total_sq) == (2, 500000, 300000 ** 2 + 200000 ** 2)
+    assert stats.summary() == {"count": 2, "average_price": 250000.0, "std_dev": 50000.0}
+
+
+def _cells(cube):
+    return (
+        {level: {key: {cell: (stats.count, stats.total, stats.total_sq) for cell, stats in cells.items()}
+                 for key, cells in level_cells.items()} for level, level_cells in cube.cells.items()},
+        cube.keys,
+        cube.term_counts,
+    )
+
+
+def test_updated_matches_a_fresh_build_and_leaves_the_original():
+    listings = get_listings_data()
+    cube = PriceCube(listings)
+    before = _cells(cube)
+    changed = [dict(listing) for listing in listings[1:]]
+    changed[0]["price_amount"] = (changed[0].get("price_amount") or 0) - 5000
+    changed[1]["postcode"] = "ZZ1 1ZZ"
+    changed.append(dict(SAMPLE[3]))
+
+    assert _cells(cube.updated(listings, changed)) == _cells(PriceCube(changed))
+    assert _cells(cube) == before
+    # Removing every listing leaves an empty cube, with no zero-count cells
+    assert _cells(cube.updated(listings, [])) == _cells(PriceCube([]))
+
+
+def test_matches_listing_index_on_real_data():
+    listings = get_listings_data()
+    index = ListingIndex(listings)
+    cube = PriceCube(listings)
+    for postcode in (None, "NG", "NG1", "B7", "de22", "LE65 1", "DY4 7LG"):
+        for property_type in (None, "house", "semi", "flat", "detached bungalow"):
+            mask = index.filter_mask(postcode=postcode, property_type=property_type) & index.has_price
+            groups = cube.query(postcode=postcode, property_type=property_type)
+            count = sum(stats.count for stats in groups.values())
+            total = sum(stats.total for stats in groups.values())
+            assert (count, total) == (int(mask.sum()), int(index.price[mask].sum()))
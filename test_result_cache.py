@@ -0,0 +1,49 @@
+"""
+Tests for the versioned result cache
+"""
+from result_cache import ResultCache, cached
+
+
+def _counting_tool(cache, versions):
+    calls = []
+
+    @cached(cache, lambda client_id, **_: versions[client_id])
+    def tool(client_id, limit=10):
+        calls.append((client_id, limit))
+        return {"client_id": client_id, "limit": limit}
+
+    return tool, calls
+
+
+def test_equivalent_calls_share_an_entry():
+    cache = ResultCache()
+    tool, calls = _counting_tool(cache, {"C0001": (1,)})
+    assert tool("C0001") == tool("C0001", 10) == tool(client_id="C0001", limit=10)
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+
+def test_version_change_only_invalidates_dependent_entries():
+    cache = ResultCache()
+    versions = {"C0001": (1,), "C0002": (1,)}
+    tool, calls = _counting_tool(cache, versions)
+    tool("C0001")
+    tool("C0002")
+    versions["C0001"] = (2,)
+    tool("C0001")
+    tool("C0002")
+    assert calls == [("C0001", 10), ("C0002", 10), ("C0001", 10)]
+
+
+def test_size_and_ttl_eviction():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", (1,), 1)
+    cache.put("b", (1,), 2)
+    cache.get("a", (1,))
+    cache.put("c", (1,), 3)
+    assert cache.get("b", (1,)) == (False, None)
+    assert cache.get("a", (1,)) == (True, 1)
+
+    expired = ResultCache(ttl_seconds=0)
+    expired.put("a", (1,), 1)
+    assert expired.get("a", (1,)) == (False, None)
@@ -0,0 +1,38 @@
+"""
+Tests for the full-text listing index
+"""
+import numpy as np
+
+from text_index import TextIndex, tokenize
+
+LISTINGS = [
+    {"description": "A spacious family house with a large garden and garage.", "overview": ["Garage", "Garden"]},
+    {"description": "Second floor apartment offered with no upward chain.", "overview": ["NO UPWARD CHAIN"]},
+    {"description": "Bungalow with a conservatory, garden and no chain.", "overview": ["Conservatory"]},
+    {"description": "Town centre flat, ideal first time buy.", "overview": None},
+]
+
+
+def test_tokenize_drops_stopwords_and_folds_plurals():
+    assert tokenize("The Bedrooms, and a GARAGE!") == ["bedroom", "garage"]
+    assert tokenize("glass") == ["glass"]
+
+
+def test_ranks_by_bm25_and_respects_mask():
+    index = TextIndex(LISTINGS)
+    rows, scores, total = index.search("upward chain", 5)
+    assert rows.tolist() == [1, 2] and total == 2
+    assert scores[0] > scores[1] > 0
+
+    rows, _, total = index.search("garden", 5, mask=np.array([False, True, True, True]))
+    assert rows.tolist() == [2] and total == 1
+    assert index.search("swimming pool", 5)[2] == 0
+
+
+def test_top_k_keeps_row_order_for_ties_and_round_trips():
+    index = TextIndex([{"description": "cellar"}] * 5)
+    assert index.search("cellars", 3)[0].tolist() == [0, 1, 2]
+
+    index = TextIndex(LISTINGS)
+    restored = TextIndex.from_state(*index.to_state())
+    assert restored.search("garage garden", 2)[0].tolist() == index.search("garage garden", 2)[0].tolist()
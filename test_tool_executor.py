@@ -0,0 +1,121 @@
+"""
+Tests for the tool execution layer
+"""
+import asyncio
+import contextlib
+import json
+import threading
+import time
+
+import pytest
+
+from tool_executor import ToolExecutor
+
+
+async def test_reads_run_off_the_event_loop():
+    executor = ToolExecutor(read_workers=2)
+    loop_thread = threading.current_thread().name
+    name = await executor.read("query_listings", lambda: threading.current_thread().name)
+    assert name != loop_thread and name.startswith("tool-read")
+
+
+async def test_per_tool_limit_caps_concurrency():
+    executor = ToolExecutor(read_workers=4, limits={"slow": 1})
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def slow():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+
+    await asyncio.gather(*(executor.read("slow", slow) for _ in range(4)))
+    assert peak[0] == 1
+
+
+async def test_writes_are_serialized_in_order_and_raise():
+    executor = ToolExecutor()
+    order = []
+
+    def write(n):
+        time.sleep(0.005 * (3 - n))
+        order.append(n)
+        return n
+
+    assert await asyncio.gather(*(executor.write("capture_lead", write, n) for n in range(3))) == [0, 1, 2]
+    assert order == [0, 1, 2]
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        await executor.write("capture_lead", fail)
+
+
+async def test_burst_of_writes_is_group_committed():
+    commits = []
+
+    @contextlib.contextmanager
+    def write_batch():
+        yield
+        commits.append(1)
+
+    executor = ToolExecutor(
+        limits={"capture_lead": 16}, write_batch=write_batch, write_batch_size=8, write_batch_window=0.01
+    )
+    results = await asyncio.gather(*(executor.write("capture_lead", lambda n=n: n) for n in range(16)))
+    assert results == list(range(16))
+    assert len(commits) == executor.write_batches == 2
+
+
+async def test_failed_commit_fails_every_write_in_the_batch():
+    @contextlib.contextmanager
+    def write_batch():
+        yield
+        raise OSError("disk full")
+
+    executor = ToolExecutor(write_batch=write_batch)
+    results = await asyncio.gather(
+        *(executor.write("capture_lead", lambda: "ok") for _ in range(3)), return_exceptions=True
+    )
+    assert all(isinstance(result, OSError) for result in results)
+
+
+async def test_failed_commit_rolls_back_client_state(tmp_path, monkeypatch):
+    import data_loader
+    import tools
+
+    # Rollback reloads from disk: give it a snapshot of the current clients
+    # (including any journaled by other tests) and an empty journal
+    snapshot = tmp_path / "clients.jsonl"
+    snapshot.write_text("".join(json.dumps(c) + "\n" for c in data_loader.get_clients_data()))
+    monkeypatch.setattr(data_loader, "CLIENTS_FILE", str(snapshot))
+    monkeypatch.setattr(data_loader.client_journal, "snapshot_path", str(snapshot))
+    monkeypatch.setattr(data_loader.client_journal, "journal_path", str(tmp_path / "clients.journal.jsonl"))
+    monkeypatch.setattr(data_loader.client_journal, "compacting_path", str(tmp_path / "clients.journal.jsonl.compacting"))
+    monkeypatch.setattr(data_loader.id_sequences, "state_path", str(tmp_path / "sequences.json"))
+
+    def fail(data):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(data_loader.client_journal, "_write", fail)
+    clients = list(data_loader.get_clients_data())
+    sequences = data_loader.id_sequences.snapshot()
+    version = data_loader.get_clients_version()
+
+    executor = ToolExecutor(write_batch=data_loader.write_batch)
+    with pytest.raises(OSError, match="disk full"):
+        await executor.write(
+            "capture_lead", tools.capture_lead, "Rolled Back", "rollback@example.com", "+44 7700 900999", "buyer",
+            budget_max=100000
+        )
+
+    # The failed lead is gone from every in-memory view, and its ID is reissued
+    assert data_loader.get_clients_data() == clients
+    assert not any(c.get("email") == "rollback@example.com" for c in data_loader.get_clients_by_recency())
+    assert data_loader.id_sequences.snapshot() == sequences
+    assert data_loader.get_client_by_id(f"C{sequences['client'] + 1:04d}") is None
+    assert data_loader.get_clients_version() > version
@@ -0,0 +1,35 @@
+"""
+Tests for the viewing calendar index
+"""
+from viewing_calendar import ViewingCalendar, parse_viewing_datetime
+
+
+def _viewing(viewing_id, when, property_id="P1"):
+    return {"viewing_id": viewing_id, "property_id": property_id, "datetime": when, "status": "booked"}
+
+
+def test_parse_viewing_datetime():
+    assert parse_viewing_datetime("2025-11-20T14:00:00Z") == parse_viewing_datetime("2025-11-20T14:00:00")
+    assert parse_viewing_datetime("not a date") is None
+
+
+def test_conflict_within_one_hour_window():
+    calendar = ViewingCalendar()
+    calendar.add("P1", _viewing("V1", "2025-11-20T14:00:00Z"))
+    calendar.add("P1", _viewing("V2", "2025-11-20T10:00:00Z"))
+
+    assert calendar.find_conflict("P1", parse_viewing_datetime("2025-11-20T14:59:00Z"))["viewing_id"] == "V1"
+    assert calendar.find_conflict("P1", parse_viewing_datetime("2025-11-20T09:01:00Z"))["viewing_id"] == "V2"
+    # Exactly one hour apart is allowed
+    assert calendar.find_conflict("P1", parse_viewing_datetime("2025-11-20T15:00:00Z")) is None
+    assert calendar.find_conflict("P1", parse_viewing_datetime("2025-11-20T12:00:00Z")) is None
+    assert calendar.find_conflict("P2", parse_viewing_datetime("2025-11-20T14:00:00Z")) is None
+
+
+def test_add_skips_duplicates_and_undated_viewings():
+    calendar = ViewingCalendar()
+    assert calendar.add("P1", _viewing("V1", "2025-11-20T14:00:00Z"))
+    assert not calendar.add("P1", _viewing("V1", "2025-11-20T14:00:00Z"))
+    assert not calendar.add("P1", _viewing("V2", "soon"))
+    # Same viewing may be indexed under another key (e.g. the buyer)
+    assert calendar.add("C0001", _viewing("V1", "2025-11-20T14:00:00Z"))
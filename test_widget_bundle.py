@@ -0,0 +1,28 @@
+"""
+Tests for the precompressed widget bundle
+"""
+import gzip
+
+from widget_bundle import WidgetBundle, load_widget_bundle
+
+
+def test_bundle_inlines_assets_and_hashes_content(tmp_path):
+    (tmp_path / "component.js").write_text("console.log({a: 1});")
+    (tmp_path / "component.css").write_text("body { margin: 0 }")
+    bundle = load_widget_bundle(tmp_path / "component.js", tmp_path / "component.css")
+    assert "console.log({a: 1});" in bundle.html and "body { margin: 0 }" in bundle.html
+    assert bundle.etag == f'"{bundle.content_hash}"'
+    assert WidgetBundle(bundle.html).content_hash == bundle.content_hash
+    assert load_widget_bundle(tmp_path / "missing.js", tmp_path / "component.css") is None
+
+
+def test_conditional_get_and_negotiation():
+    bundle = WidgetBundle("<html>" + "x" * 1000 + "</html>")
+    assert bundle.matches(bundle.etag)
+    assert bundle.matches(f'"other", W/{bundle.etag}')
+    assert not bundle.matches('"other"') and not bundle.matches(None)
+
+    body, encoding = bundle.negotiate("gzip, deflate")
+    assert encoding == "gzip" and gzip.decompress(body) == bundle.body
+    assert bundle.negotiate("gzip;q=0, identity") == (bundle.body, None)
+    assert bundle.negotiate(None) == (bundle.body, None)
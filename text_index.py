@@ -0,0 +1,146 @@
+"""
+Full-text index over listing descriptions and overview bullets.
+
+Built once per listings snapshot. Each listing's description and overview
+are tokenized, and every term keeps a postings list of (row id, term
+frequency) pairs. The postings for all terms are stored back to back in
+NumPy arrays, with an offsets array marking where each term starts. A query
+reads only the postings of its own terms and ranks the rows with BM25, so
+search time depends on how common the query terms are and never on the
+length of the descriptions.
+"""
+import math
+import re
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+# BM25 parameters: term-frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Words too common in estate-agent copy to say anything about a listing
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or our "
+    "that the this to which with would".split()
+)
+
+_ARRAY_COLUMNS = ("offsets", "rows", "freqs", "lengths")
+
+
+def _stem(token: str) -> str:
+    """Fold simple plurals ("bedrooms" -> "bedroom") so both forms match."""
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric terms of ``text``, without stopwords."""
+    return [_stem(token) for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def listing_text(listing: Dict[str, Any]) -> str:
+    """The searchable text of a listing: its description and overview bullets."""
+    parts = [listing.get("description") or ""]
+    overview = listing.get("overview")
+    if isinstance(overview, list):
+        parts.extend(str(item) for item in overview)
+    return "\n".join(parts)
+
+
+class TextIndex:
+    """Inverted index with BM25 ranking over ``listing_text`` of each listing."""
+
+    def __init__(self, listings: List[Dict[str, Any]]):
+        self.size = len(listings)
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths = np.zeros(self.size, dtype=np.float32)
+        for row, listing in enumerate(listings):
+            counts = Counter(tokenize(listing_text(listing)))
+            lengths[row] = sum(counts.values())
+            for term, count in counts.items():
+                postings.setdefault(term, []).append((row, count))
+
+        self.terms = {term: i for i, term in enumerate(sorted(postings))}
+        self.offsets = np.zeros(len(self.terms) + 1, dtype=np.int64)
+        rows: List[int] = []
+        freqs: List[int] = []
+        for term, i in self.terms.items():
+            for row, count in postings[term]:
+                rows.append(row)
+                freqs.append(count)
+            self.offsets[i + 1] = len(rows)
+        self.rows = np.array(rows, dtype=np.int32)
+        self.freqs = np.array(freqs, dtype=np.float32)
+        self.lengths = lengths
+        self.avg_length = float(lengths.mean()) if self.size and lengths.any() else 1.0
+
+    def to_state(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Split the index into named NumPy arrays and plain Python state, for caching."""
+        arrays = {name: getattr(self, name) for name in _ARRAY_COLUMNS}
+        state = {"terms": list(self.terms), "avg_length": self.avg_length}
+        return arrays, state
+
+    @classmethod
+    def from_state(cls, arrays: Dict[str, np.ndarray], state: Dict[str, Any]) -> "TextIndex":
+        """Rebuild an index from the output of ``to_state`` without re-tokenizing."""
+        index = cls.__new__(cls)
+        for name in _ARRAY_COLUMNS:
+            setattr(index, name, arrays[name])
+        index.size = len(index.lengths)
+        index.terms = {term: i for i, term in enumerate(state["terms"])}
+        index.avg_length = state["avg_length"]
+        return index
+
+    def postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(row ids, term frequencies) of an already-tokenized term."""
+        i = self.terms.get(term)
+        if i is None:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        lo, hi = self.offsets[i], self.offsets[i + 1]
+        return self.rows[lo:hi], self.freqs[lo:hi]
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every row for ``query`` (0 where no query term occurs)."""
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in dict.fromkeys(tokenize(query)):
+            rows, freqs = self.postings(term)
+            if not len(rows):
+                continue
+            df = len(rows)
+            idf = math.log(1.0 + (self.size - df + 0.5) / (df + 0.5))
+            norm = BM25_K1 * (1.0 - BM25_B + BM25_B * self.lengths[rows] / self.avg_length)
+            # Each row appears once per term, so plain fancy-index addition is safe
+            scores[rows] += idf * freqs * (BM25_K1 + 1.0) / (freqs + norm)
+        return scores
+
+    def search(
+        self,
+        query: str,
+        k: int,
+        mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Top ``k`` rows for ``query`` among those allowed by ``mask``, best
+        first (ties in row order), with their scores and the total number
+        of matching rows.
+        """
+        scores = self.scores(query)
+        hits = scores > 0
+        if mask is not None:
+            hits &= mask
+        candidates = np.flatnonzero(hits)
+        total = len(candidates)
+        if k <= 0 or not total:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32), total
+        if total > k:
+            # Partial selection first: only rows scoring at least the k-th
+            # best (ties included, so row order decides) get fully sorted
+            kth = -np.partition(-scores[candidates], k - 1)[k - 1]
+            candidates = candidates[scores[candidates] >= kth]
+        top = candidates[np.lexsort((candidates, -scores[candidates]))][:k]
+        return top, scores[top], total
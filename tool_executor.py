@@ -0,0 +1,159 @@
+"""
+Execution layer for tool calls.
+
+The tool functions are synchronous; calling them inline from an async MCP
+handler blocks the event loop for every other request on the worker. Read
+tools run on a bounded thread pool instead, and tools that mutate client
+data are queued to a single writer task, which runs them one at a time on a
+dedicated thread so journal appends and fsyncs never overlap or block the
+loop. A per-tool semaphore caps how many calls of one tool can be in flight,
+so a burst of one expensive tool cannot occupy every worker.
+
+Writes are group-committed: the writer takes everything queued (up to a
+batch size, waiting a short window for more) and applies it inside one
+``write_batch`` context, which makes the whole batch durable at once. Each
+caller's result is released only after that commit.
+"""
+import asyncio
+import contextlib
+import functools
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, ContextManager, Dict, List, Optional, Tuple
+
+# Default in-flight limit for tools without an explicit one
+DEFAULT_TOOL_LIMIT = 4
+
+
+class ToolExecutor:
+    """Runs tool functions off the event loop: reads on a pool, writes through one writer."""
+
+    def __init__(
+        self,
+        read_workers: int = 4,
+        limits: Optional[Dict[str, int]] = None,
+        default_limit: int = DEFAULT_TOOL_LIMIT,
+        write_queue_size: int = 100,
+        write_batch: Callable[[], ContextManager] = contextlib.nullcontext,
+        write_batch_size: int = 32,
+        write_batch_window: float = 0.002
+    ):
+        self.read_workers = read_workers
+        self.limits = dict(limits or {})
+        self.default_limit = default_limit
+        self.write_queue_size = write_queue_size
+        self.write_batch = write_batch
+        self.write_batch_size = write_batch_size
+        self.write_batch_window = write_batch_window
+        self.in_flight: Counter = Counter()
+        self.write_batches = 0
+        self.writes_committed = 0
+        self._read_pool = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="tool-read")
+        self._write_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tool-write")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+
+    def _bind_loop(self) -> asyncio.AbstractEventLoop:
+        """Create the loop-bound primitives on first use in the running loop."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphores = {}
+            self._write_queue = asyncio.Queue(maxsize=self.write_queue_size)
+            self._writer = loop.create_task(self._run_writer())
+        return loop
+
+    def _semaphore(self, tool_name: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(tool_name)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.limits.get(tool_name, self.default_limit))
+            self._semaphores[tool_name] = semaphore
+        return semaphore
+
+    async def read(self, tool_name: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a read-only tool function on the read pool."""
+        loop = self._bind_loop()
+        async with self._semaphore(tool_name):
+            self.in_flight[tool_name] += 1
+            try:
+                return await loop.run_in_executor(self._read_pool, functools.partial(func, *args, **kwargs))
+            finally:
+                self.in_flight[tool_name] -= 1
+
+    async def write(self, tool_name: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Queue a mutating tool function for the writer and wait for its result."""
+        loop = self._bind_loop()
+        async with self._semaphore(tool_name):
+            self.in_flight[tool_name] += 1
+            try:
+                future = loop.create_future()
+                await self._write_queue.put((functools.partial(func, *args, **kwargs), future))
+                return await future
+            finally:
+                self.in_flight[tool_name] -= 1
+
+    async def _next_batch(self, queue: asyncio.Queue) -> List[Tuple[Callable[[], Any], asyncio.Future]]:
+        """Wait for a write, then collect more until the batch is full or the window closes."""
+        loop = asyncio.get_running_loop()
+        batch = [await queue.get()]
+        deadline = loop.time() + self.write_batch_window
+        while len(batch) < self.write_batch_size:
+            try:
+                batch.append(queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _apply_batch(self, jobs: List[Callable[[], Any]]) -> List[Tuple[bool, Any]]:
+        """Run jobs in order inside one write batch; returns (ok, result or exception) per job."""
+        outcomes = []
+        with self.write_batch():
+            for job in jobs:
+                try:
+                    outcomes.append((True, job()))
+                except Exception as e:
+                    outcomes.append((False, e))
+        return outcomes
+
+    async def _run_writer(self) -> None:
+        """Apply queued writes in arrival order, one group commit per batch."""
+        loop = asyncio.get_running_loop()
+        queue = self._write_queue
+        while True:
+            batch = await self._next_batch(queue)
+            try:
+                outcomes = await loop.run_in_executor(
+                    self._write_pool, self._apply_batch, [job for job, _ in batch]
+                )
+                self.write_batches += 1
+                self.writes_committed += len(batch)
+            except Exception as e:
+                # The commit itself failed: nothing in the batch is durable
+                outcomes = [(False, e)] * len(batch)
+            for (_, future), (ok, value) in zip(batch, outcomes):
+                if not future.done():
+                    if ok:
+                        future.set_result(value)
+                    else:
+                        future.set_exception(value)
+                queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size, per-tool in-flight calls and pending writes."""
+        return {
+            "read_workers": self.read_workers,
+            "in_flight": {name: count for name, count in self.in_flight.items() if count},
+            "queued_writes": self._write_queue.qsize() if self._write_queue is not None else 0,
+            "write_batches": self.write_batches,
+            "writes_committed": self.writes_committed,
+        }
@@ -1,26 +1,72 @@
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+import numpy as np
+from viewing_calendar import parse_viewing_datetime
+from price_cube import PriceCube, PriceStats, GROUP_BY_OPTIONS
+from listing_index import SORT_FIELDS, resolve_fields
+from cursors import encode_cursor, decode_cursor
+from text_index import tokenize
+from geo_index import parse_near, parse_bbox
+from map_clusters import MAX_ZOOM
+from bulk_match import match_buyers
+from match_scoring import top_matches
+from listing_alerts import AlertPipeline
+from result_cache import ResultCache, cached
 from data_loader import (
-    get_listings_data,
+    get_listings_snapshot,
+    get_listing_index,
     get_clients_data,
+    get_clients_by_recency,
+    get_client_counts,
+    get_clients_version,
+    get_client_version,
+    get_listings_version,
     add_client,
     update_client,
     get_client_by_id,
+    get_listing_by_id,
+    get_seller_by_property_id,
+    find_viewing_conflict,
     get_next_client_id,
-    get_next_viewing_id
+    get_next_viewing_id,
+    start_listings_watcher,
+    on_listings_reload,
+    write_batch
 )
 
+# Results of the read-only tools, tagged with the data versions they were
+# computed from so a write only invalidates the entries that depended on it
+result_cache = ResultCache(max_entries=512, ttl_seconds=300)
+
+def _listings_versions(**_: Any) -> tuple:
+    return (get_listings_version(),)
+
+def _match_versions(client_id: str, **_: Any) -> tuple:
+    return (get_listings_version(), get_client_version(client_id))
+
+def _all_clients_versions(**_: Any) -> tuple:
+    return (get_listings_version(), get_clients_version())
+
+# Buyers who newly match a listing after a feed reload (new, back on the
+# market or cheaper), read back through view_alerts
+alert_pipeline = AlertPipeline(
+    lambda: [client for client in get_clients_data() if client.get("role") == "buyer"],
+    get_clients_version,
+)
+on_listings_reload(alert_pipeline.process)
+
 def get_schema() -> Dict[str, str]:
     """
     Returns the data schema (a dictionary of field names and their types) 
     to help the AI understand what can be queried.
     """
+    type_terms = ", ".join(get_listing_index().type_terms())
     return {
         "property_id": "string",
         "price_amount": "number",
         "bedrooms": "number",
         "bathrooms": "number",
-        "property_type": "string",
+        "property_type": f"string (searchable terms: {type_terms})",
         "postcode": "string",
         "garden": "boolean",
         "parking": "boolean",
@@ -29,6 +75,30 @@ def get_schema() -> Dict[str, str]:
         "description": "string"
     }
 
+def _property_list_payload(
+    properties: List[Dict[str, Any]],
+    filters_applied: Dict[str, Any],
+    total_results: int,
+    **extra: Any
+) -> Dict[str, Any]:
+    """
+    Build the property widget envelope once.
+
+    For Apps SDK, ChatGPT hydrates the component from `structuredContent`.
+    The same dict is spread at the top level for backwards-compatibility with
+    existing tests, so nothing is built or serialized twice.
+    """
+    structured = {
+        "properties": properties,
+        "filters_applied": filters_applied,
+        "total_results": total_results,
+        "showing": len(properties),
+        **extra,
+    }
+    return {**structured, "structuredContent": structured}
+
+
+@cached(result_cache, _listings_versions)
 def query_listings(
     postcode: Optional[str] = None, 
     property_type: Optional[str] = None,
@@ -36,82 +106,228 @@ def query_listings(
     min_bedrooms: Optional[int] = None,
     has_garden: Optional[bool] = None,
     has_parking: Optional[bool] = None,
-    limit: int = 5
+    limit: int = 5,
+    min_price: Optional[int] = None,
+    max_bedrooms: Optional[int] = None,
+    sort_by: Optional[str] = None,
+    order: str = "asc",
+    cursor: Optional[str] = None,
+    profile: str = "card",
+    fields: Optional[List[str]] = None,
+    near: Optional[Dict[str, float]] = None,
+    bbox: Optional[List[float]] = None
 ) -> Dict[str, Any]:
     """
     Use this when the user wants to find, search, or browse properties for sale.
     Searches 475 property listings and filters by location, price, bedrooms, garden, and parking.
-    Returns up to 5 matching properties by default.
+    Returns up to 5 matching properties by default, optionally sorted (e.g. cheapest first).
 
     Args:
-        postcode: Partial or full UK postcode (e.g., "LE65" matches "LE65 1DA", "LE65 2AY", etc. or "DY4" for all DY4 postcodes). Case-insensitive.
-        property_type: Type of property (e.g., "Flat", "House", "Cottage", "Apartment"). Partial matches work (e.g., "flat" matches "Flat - Ground Floor").
+        postcode: Partial or full UK postcode (e.g., "LE65" matches "LE65 1DA", "LE65 2AY", etc. or "DY4" for all DY4 postcodes). Case- and spacing-insensitive.
+        property_type: Type of property (e.g., "Flat", "House", "Cottage", "Semi-Detached"). Matched by word and type family (e.g., "flat" matches "Flat - Ground Floor" and "Apartment - First Floor", "terraced" matches "House - End Terrace").
         max_price: Maximum price in GBP (e.g., 200000 for £200,000). Only returns properties at or below this price.
         min_bedrooms: Minimum number of bedrooms (e.g., 2 returns properties with 2 or more bedrooms).
         has_garden: Set to True to only show properties with a garden. Set to False to only show properties without a garden. Leave None to include both.
         has_parking: Set to True to only show properties with parking. Set to False to only show properties without parking. Leave None to include both.
         limit: Maximum number of results to return (default: 5, increase for more results).
+        min_price: Minimum price in GBP (e.g., 150000). Only returns properties at or above this price.
+        max_bedrooms: Maximum number of bedrooms (e.g., 3 returns properties with 3 or fewer bedrooms).
+        sort_by: Order results by "price_amount", "bedrooms" or "scraped_at" (newest listings). Leave None for listing order.
+        order: "asc" (default) or "desc" - e.g. sort_by="price_amount", order="asc" for cheapest first.
+        cursor: `next_cursor` from a previous call with the same filters, to fetch the next page.
+        profile: "card" (default) for the fields the property widget shows, or "full" for every field
+            (description, photos, brochure, floorplan, ...).
+        fields: Explicit list of listing fields to return instead of a profile (e.g. ["property_id", "description"]).
+        near: Only properties within a radius of a point, e.g. {"lat": 52.53, "lng": -2.05, "radius_miles": 2}
+            (radius defaults to 2 miles). Results come nearest first unless sort_by is set, each with "distance_miles".
+        bbox: Only properties inside a box given as [south, west, north, east] in degrees.
     """
-    print(f"Tool: Received query with criteria: postcode={postcode}, max_price={max_price}, min_bedrooms={min_bedrooms}, garden={has_garden}, parking={has_parking}")
-    
-    # Get the full list of data
-    all_listings = get_listings_data()
-    
-    # This is our "fat server" logic. We filter the data here in Python.
-    filtered_results = []
-    for listing in all_listings:
-        # Apply filters one by one
-        if max_price is not None and listing.get('price_amount', 0) > max_price:
-            continue
-        if min_bedrooms is not None and listing.get('bedrooms', 0) < min_bedrooms:
-            continue
-        if has_garden is not None and listing.get('garden') != has_garden:
-            continue
-        if has_parking is not None and listing.get('parking') != has_parking:
-            continue
-            
-        # For string-based searches, we can check if it's 'contained'
-        # Postcode: check if listing postcode starts with the search term (e.g., "LE65" matches "LE65 1DA")
-        if postcode is not None:
-            listing_postcode = listing.get('postcode', '')
-            if not listing_postcode.upper().startswith(postcode.upper()):
-                continue
-        if property_type is not None and property_type.lower() not in listing.get('property_type', '').lower():
-            continue
-            
-        # If all checks passed, add it to the list
-        filtered_results.append(listing)
+    print(f"Tool: Received query with criteria: postcode={postcode}, min_price={min_price}, max_price={max_price}, min_bedrooms={min_bedrooms}, max_bedrooms={max_bedrooms}, garden={has_garden}, parking={has_parking}, sort_by={sort_by}, order={order}")
+    
+    if sort_by is not None and sort_by not in SORT_FIELDS:
+        return {"error": f"sort_by must be one of: {', '.join(SORT_FIELDS)}"}
+    if order not in ("asc", "desc"):
+        return {"error": "order must be 'asc' or 'desc'"}
+    if limit < 1:
+        return {"error": "limit must be at least 1"}
+    try:
+        projection = resolve_fields(profile, fields)
+        point = parse_near(near) if near is not None else None
+        box = parse_bbox(bbox) if bbox is not None else None
+    except ValueError as e:
+        return {"error": str(e)}
+    
+    filters = {
+        "postcode": postcode,
+        "property_type": property_type,
+        "max_price": max_price,
+        "min_bedrooms": min_bedrooms,
+        "has_garden": has_garden,
+        "has_parking": has_parking,
+        "min_price": min_price,
+        "max_bedrooms": max_bedrooms,
+    }
+    geo_params = {
+        **({"near": near} if near is not None else {}),
+        **({"bbox": bbox} if bbox is not None else {}),
+    }
+    page_params = {**filters, "sort_by": sort_by, "order": order, **geo_params}
+    # One snapshot for the whole call, so a hot reload mid-request cannot mix
+    # rows from one dataset with a cursor from another
+    snapshot = get_listings_snapshot()
+    start = 0
+    if cursor:
+        try:
+            start = decode_cursor(cursor, "listings", snapshot.version, page_params)
+        except ValueError as e:
+            return {"error": str(e)}
+    
+    # This is our "fat server" logic. Filters run as vectorized masks over
+    # the columnar index built at load time.
+    index = snapshot.index
+    mask = index.filter_mask(**filters)
+    if box is not None:
+        mask &= snapshot.geo.bbox_mask(*box)
+    distances = None
+    if point is not None:
+        # Distances only for the rows in grid cells around the point
+        near_rows, near_distances = snapshot.geo.near(*point, mask=mask)
+        distances = dict(zip(near_rows.tolist(), near_distances.tolist()))
+        mask = np.zeros(index.size, dtype=bool)
+        mask[near_rows] = True
+    total_results = int(mask.sum())
+    if point is not None and sort_by is None:
+        # Nearest first; the cursor is a position in distance order
+        row_ids = near_rows[start:start + limit + 1]
+        position = start + len(row_ids)
+    else:
+        # Top-k straight from the presorted index, resuming where the cursor
+        # left off; one extra match tells us whether there is a next page
+        row_ids, position = index.scan(
+            mask, limit + 1, sort_by=sort_by, descending=order == "desc", start=start
+        )
+    next_cursor = None
+    if len(row_ids) > limit:
+        row_ids = row_ids[:limit]
+        next_cursor = encode_cursor("listings", snapshot.version, page_params, position - 1)
+    filtered_results = index.project(row_ids, projection)
+    if distances is not None:
+        filtered_results = [
+            {**listing, "distance_miles": round(distances[row], 2)}
+            for listing, row in zip(filtered_results, row_ids.tolist())
+        ]
     
     # Return enhanced response structure for widget
-    payload = {
-        "properties": filtered_results[:limit],
-        "filters_applied": {
-            "postcode": postcode,
-            "property_type": property_type,
-            "max_price": max_price,
-            "min_bedrooms": min_bedrooms,
-            "has_garden": has_garden,
-            "has_parking": has_parking,
+    return _property_list_payload(
+        filtered_results,
+        {
+            **filters,
+            "sort_by": sort_by,
+            "order": order if sort_by else None,
+            **geo_params,
         },
-        "total_results": len(filtered_results),
-        "showing": min(limit, len(filtered_results)),
-    }
+        total_results,
+        next_cursor=next_cursor,
+    )
+
 
-    # For Apps SDK, ChatGPT hydrates the component from `structuredContent`.
-    # Keep top-level keys for backwards-compatibility with existing tests.
-    payload["structuredContent"] = {
-        "properties": payload["properties"],
-        "filters_applied": payload["filters_applied"],
-        "total_results": payload["total_results"],
-        "showing": payload["showing"],
+@cached(result_cache, _listings_versions)
+def search_listings_text(
+    query: str,
+    postcode: Optional[str] = None,
+    property_type: Optional[str] = None,
+    max_price: Optional[int] = None,
+    min_bedrooms: Optional[int] = None,
+    has_garden: Optional[bool] = None,
+    has_parking: Optional[bool] = None,
+    limit: int = 5,
+    min_price: Optional[int] = None,
+    max_bedrooms: Optional[int] = None,
+    profile: str = "card",
+    fields: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Use this when the user searches by what a property is like rather than by numbers,
+    e.g. "no upward chain", "conservatory", "recently refurbished kitchen".
+    Ranks listings by how well their description and overview bullets match the keywords (BM25),
+    optionally restricted by the same filters as query_listings.
+
+    Args:
+        query: Keywords to search for (e.g., "no upward chain", "log burner garage").
+        postcode, property_type, max_price, min_bedrooms, has_garden, has_parking, min_price,
+            max_bedrooms: Optional filters, with the same meaning as in query_listings.
+        limit: Maximum number of results to return (default: 5).
+        profile: "card" (default) or "full", as in query_listings.
+        fields: Explicit list of listing fields to return instead of a profile.
+    """
+    print(f"Tool: Received text search: query={query!r}, postcode={postcode}, property_type={property_type}")
+
+    if not query or not tokenize(query):
+        return {"error": "query must contain at least one searchable word"}
+    try:
+        projection = resolve_fields(profile, fields)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    filters = {
+        "postcode": postcode,
+        "property_type": property_type,
+        "max_price": max_price,
+        "min_bedrooms": min_bedrooms,
+        "has_garden": has_garden,
+        "has_parking": has_parking,
+        "min_price": min_price,
+        "max_bedrooms": max_bedrooms,
     }
+    snapshot = get_listings_snapshot()
+    # Structured filters narrow the candidates; the inverted index only
+    # touches the postings of the query's own terms
+    mask = snapshot.index.filter_mask(**filters)
+    row_ids, scores, total_results = snapshot.text_index.search(query, limit, mask)
+    properties = [
+        {**listing, "relevance": round(float(score), 3)}
+        for listing, score in zip(snapshot.index.project(row_ids, projection), scores.tolist())
+    ]
 
-    return payload
+    return _property_list_payload(properties, {"query": query, **filters}, total_results)
 
 
+@cached(result_cache, _listings_versions)
+def get_map_clusters(zoom: int, bbox: Optional[List[float]] = None) -> Dict[str, Any]:
+    """
+    Listings aggregated into map clusters for a zoomed-out map view.
+    Each cluster is one geohash cell (sized for the zoom level) with its listing count,
+    centroid and price min / median / max; single-listing cells also carry the property_id.
+
+    Args:
+        zoom: Web-map zoom level, 0 (whole world) to 22 (street level).
+        bbox: Optional visible area as [south, west, north, east] in degrees; clusters whose
+            cell overlaps it are returned. Leave None for the whole dataset.
+    """
+    if isinstance(zoom, bool) or not isinstance(zoom, int) or not 0 <= zoom <= MAX_ZOOM:
+        return {"error": f"zoom must be a whole number from 0 to {MAX_ZOOM}"}
+    try:
+        box = parse_bbox(bbox) if bbox is not None else None
+    except ValueError as e:
+        return {"error": str(e)}
+
+    # Cluster tables live on the snapshot, so they are built once per data version
+    precision, clusters = get_listings_snapshot().clusters.query(zoom, box)
+    return {
+        "zoom": zoom,
+        "precision": precision,
+        "bbox": bbox,
+        "cluster_count": len(clusters),
+        "listing_count": sum(cluster["count"] for cluster in clusters),
+        "clusters": clusters,
+    }
+
+
+@cached(result_cache, _listings_versions)
 def calculate_average_price(
     postcode: Optional[str] = None,
-    property_type: Optional[str] = None
+    property_type: Optional[str] = None,
+    group_by: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Use this when the user asks about average prices, price trends, or typical costs in an area.
@@ -119,39 +335,45 @@ def calculate_average_price(
     Provide at least one filter (postcode or property_type).
 
     Args:
-        postcode: Partial or full UK postcode (e.g., "LE65" for all LE65 postcodes, "DY4 7LG" for specific area). Case-insensitive.
-        property_type: Type of property (e.g., "Flat", "House", "Cottage"). Partial matches work.
+        postcode: Partial or full UK postcode (e.g., "LE65" for all LE65 postcodes, "DY4 7LG" for specific area). Case- and spacing-insensitive.
+        property_type: Type of property (e.g., "Flat", "House", "Cottage"). Matched by word and type family, as in query_listings.
+        group_by: Optional breakdown - "bedrooms", "property_type", "area", "district", "sector" or "postcode"
+            (e.g., group_by="bedrooms" with postcode="LE65" for average price by bedrooms in LE65).
     """
-    all_listings = get_listings_data()
-    
-    total_price = 0
-    count = 0
-
-    for listing in all_listings:
-        # Check if the listing matches our filters
-        # Postcode: check if listing postcode starts with the search term
-        if postcode is not None:
-            listing_postcode = listing.get('postcode', '')
-            if not listing_postcode.upper().startswith(postcode.upper()):
-                continue
-        if property_type is not None and property_type.lower() not in listing.get('property_type', '').lower():
-            continue
-        
-        # Add its price to the total
-        if 'price_amount' in listing:
-            total_price += listing['price_amount']
-            count += 1
+    if group_by is not None and group_by not in GROUP_BY_OPTIONS:
+        return {"error": f"group_by must be one of: {', '.join(GROUP_BY_OPTIONS)}"}
+
+    # Answer from the precomputed price cube where the filters allow it
+    snapshot = get_listings_snapshot()
+    groups = snapshot.cube.query(postcode=postcode, property_type=property_type, group_by=group_by)
+    if groups is None:
+        # Type filter the cube cannot express (e.g. a partial word):
+        # aggregate just the matching rows from the listing index instead
+        index = snapshot.index
+        mask = index.filter_mask(postcode=postcode, property_type=property_type)
+        groups = PriceCube(index.rows(np.flatnonzero(mask))).query(group_by=group_by)
+
+    overall = PriceStats()
+    for stats in groups.values():
+        overall.merge(stats)
+    count = overall.count
     
     if count == 0:
         return {"message": "No listings found matching criteria.", "average_price": None, "count": 0}
         
-    avg_price = total_price / count
+    avg_price = overall.total / count
     
-    return {
+    result = {
         "message": f"Found {count} matching listings.",
         "average_price": round(avg_price, 2),
         "count": count
     }
+    if group_by is not None:
+        result["group_by"] = group_by
+        result["breakdown"] = [
+            {group_by: key, **stats.summary()} for key, stats in sorted(groups.items())
+        ]
+    return result
 
 
 # ============================================================================
@@ -245,17 +467,24 @@ def capture_lead(
         return {"error": "Failed to save client record"}
 
 
+@cached(result_cache, _match_versions)
 def match_client(
     client_id: str,
-    limit: int = 10
+    limit: int = 10,
+    profile: str = "card",
+    fields: Optional[List[str]] = None
 ) -> Dict[str, Any]:
     """
-    Find properties matching a buyer's preferences and budget.
+    Find properties matching a buyer's preferences and budget, best match first.
+    Ranks by how well each property uses the budget, fits the bedroom requirement and
+    resembles the buyer's interested properties (postcode district, type, garden/parking).
     Returns results in the property widget format for display.
     
     Args:
         client_id: The buyer's client ID (e.g., "C0001")
         limit: Maximum number of matching properties to return (default: 10)
+        profile: "card" (default) for the fields the property widget shows, or "full" for every field
+        fields: Explicit list of listing fields to return instead of a profile
     
     Returns:
         Matching properties in widget format (reuses property widget)
@@ -269,52 +498,129 @@ def match_client(
     if client.get("role") != "buyer":
         return {"error": f"Client {client_id} is a seller, not a buyer. Only buyers can be matched to properties."}
     
-    # Extract buyer preferences
+    try:
+        projection = resolve_fields(profile, fields)
+    except ValueError as e:
+        return {"error": str(e)}
+    
     budget_max = client.get("budget_max")
     min_bedrooms = client.get("min_bedrooms")
     
-    # Get all properties
-    all_listings = get_listings_data()
-    
-    # Filter properties
-    matches = []
-    for listing in all_listings:
-        # Skip sold properties
-        status = listing.get("status", "").lower()
-        if "sold" in status:
-            continue
-        
-        # Check budget
-        if budget_max and listing.get("price_amount", 0) > budget_max:
-            continue
-        
-        # Check bedrooms
-        if min_bedrooms and listing.get("bedrooms", 0) < min_bedrooms:
-            continue
-        
-        matches.append(listing)
+    # Pre-filter to the listings the buyer can consider, then rank them by
+    # match score (budget use, bedroom fit, similarity to the listings they
+    # liked, garden/parking) keeping only the top `limit` in a heap
+    index = get_listings_snapshot().index
+    ranked, total_matches = top_matches(index, client, limit)
+    properties = [
+        {**listing, "match_score": round(score, 3)}
+        for listing, (_, score) in zip(
+            index.project(np.array([row for row, _ in ranked], dtype=np.int64), projection), ranked
+        )
+    ]
     
     # Return in property widget format (reuse existing widget)
-    payload = {
-        "properties": matches[:limit],
-        "filters_applied": {
+    return _property_list_payload(
+        properties,
+        {
             "client_id": client_id,
             "client_name": client.get("full_name"),
             "max_price": budget_max,
             "min_bedrooms": min_bedrooms,
         },
-        "total_results": len(matches),
-        "showing": min(limit, len(matches)),
+        total_matches,
+    )
+
+
+# Listing fields shown for each match in bulk results
+MATCH_SUMMARY_FIELDS = ("property_id", "ld_name", "price_amount", "bedrooms", "postcode")
+
+
+@cached(result_cache, _all_clients_versions)
+def match_all_buyers(
+    stage: Optional[str] = None,
+    per_buyer: int = 3,
+    limit: int = 50,
+    top_listings: int = 10
+) -> Dict[str, Any]:
+    """
+    Match every buyer in the CRM against the available inventory in one pass.
+    Use this for a "who should we call about what" run across all buyers.
+
+    Args:
+        stage: Only buyers at this stage - "hot", "warm", "cold", ... (optional)
+        per_buyer: Top matches to return per buyer, best match score first as in match_client (default: 3)
+        limit: Maximum number of buyers to return (default: 50)
+        top_listings: Number of listings with the most interested buyers to return (default: 10)
+
+    Returns:
+        Per-buyer match counts and top matches, and the listings most buyers match
+    """
+    buyers = [
+        client for client in get_clients_data()
+        if client.get("role") == "buyer" and (not stage or client.get("stage") == stage)
+    ]
+    snapshot = get_listings_snapshot()
+    index = snapshot.index
+    # Only the buyers returned are scored for their top matches
+    result = match_buyers(index, buyers, per_buyer=per_buyer, ranked=limit)
+
+    buyer_results = []
+    for buyer, rows, count in zip(buyers[:limit], result.top_rows, result.match_counts.tolist()):
+        buyer_results.append({
+            "client_id": buyer.get("client_id"),
+            "full_name": buyer.get("full_name"),
+            "stage": buyer.get("stage"),
+            "budget_max": buyer.get("budget_max"),
+            "min_bedrooms": buyer.get("min_bedrooms"),
+            "match_count": count,
+            "top_matches": index.project(rows, MATCH_SUMMARY_FIELDS),
+        })
+
+    interested = result.interested_counts
+    # Most interested buyers first, ties in file order
+    popular = np.lexsort((np.arange(index.size), -interested))[:max(top_listings, 0)]
+    listing_results = [
+        {**listing, "interested_buyers": int(interested[row])}
+        for listing, row in zip(index.project(popular, MATCH_SUMMARY_FIELDS), popular.tolist())
+        if interested[row] > 0
+    ]
+
+    return {
+        "message": f"Matched {len(buyers)} buyers against {int((~index.sold).sum())} available listings.",
+        "buyer_count": len(buyers),
+        "buyers_with_matches": int((result.match_counts > 0).sum()),
+        "buyers": buyer_results,
+        "listings": listing_results,
     }
-    
-    payload["structuredContent"] = {
-        "properties": payload["properties"],
-        "filters_applied": payload["filters_applied"],
-        "total_results": payload["total_results"],
-        "showing": payload["showing"],
+
+
+def view_alerts(
+    client_id: Optional[str] = None,
+    property_id: Optional[str] = None,
+    since: int = 0,
+    limit: int = 20
+) -> Dict[str, Any]:
+    """
+    New-listing alerts: buyers who newly match a listing after the listings feed was updated
+    (a new listing, a price drop, or a listing back on the market). Internal tool for agents.
+
+    Args:
+        client_id: Only alerts for this buyer (optional)
+        property_id: Only alerts for this property (optional)
+        since: `next_since` from a previous call, to fetch only newer alerts (default: 0 for all)
+        limit: Maximum number of alerts to return (default: 20)
+
+    Returns:
+        Alerts oldest first, with the `next_since` value to poll from
+    """
+    alerts, next_since = alert_pipeline.feed.query(
+        client_id=client_id, property_id=property_id, since=since or 0, limit=limit
+    )
+    return {
+        "message": f"Found {len(alerts)} new match alerts.",
+        "alerts": alerts,
+        "next_since": next_since,
     }
-    
-    return payload
 
 
 def schedule_viewing(
@@ -325,7 +631,7 @@ def schedule_viewing(
 ) -> Dict[str, Any]:
     """
     Schedule a property viewing for a buyer. Updates both buyer and seller records.
-    Validates property availability and datetime conflicts.
+    Validates property availability and datetime conflicts (per property and per buyer).
     
     Args:
         property_id: Property ID to view (e.g., "32926983")
@@ -345,12 +651,7 @@ def schedule_viewing(
         return {"error": f"Client {buyer_client_id} is not a buyer"}
     
     # Find property
-    all_listings = get_listings_data()
-    property_listing = None
-    for listing in all_listings:
-        if listing.get("property_id") == property_id:
-            property_listing = listing
-            break
+    property_listing = get_listing_by_id(property_id)
     
     if not property_listing:
         return {"error": f"Property {property_id} not found"}
@@ -361,34 +662,23 @@ def schedule_viewing(
         return {"error": f"Cannot schedule viewing - property {property_id} is already sold"}
     
     # Find seller for this property
-    seller = None
-    all_clients = get_clients_data()
-    for client in all_clients:
-        if client.get("role") == "seller" and client.get("selling_property_id") == property_id:
-            seller = client
-            break
+    seller = get_seller_by_property_id(property_id)
     
     # Parse datetime
-    try:
-        viewing_datetime = datetime.fromisoformat(datetime_iso.replace("Z", "+00:00"))
-    except ValueError:
+    viewing_datetime = parse_viewing_datetime(datetime_iso)
+    if viewing_datetime is None:
         return {"error": "Invalid datetime format. Use ISO format like '2025-11-20T14:00:00Z'"}
     
-    # Check for datetime conflicts on this property
-    if seller:
-        for viewing in seller.get("viewings", []):
-            if viewing.get("property_id") == property_id:
-                existing_dt_str = viewing.get("datetime", "")
-                try:
-                    existing_dt = datetime.fromisoformat(existing_dt_str.replace("Z", "+00:00"))
-                    # Check if within 1 hour window
-                    time_diff = abs((viewing_datetime - existing_dt).total_seconds())
-                    if time_diff < 3600:  # 1 hour = 3600 seconds
-                        return {
-                            "error": f"Viewing conflict - another viewing scheduled at {existing_dt_str}. Please choose a different time."
-                        }
-                except ValueError:
-                    continue
+    # Check for datetime conflicts on this property and for this buyer
+    conflict = find_viewing_conflict(property_id, buyer_client_id, viewing_datetime)
+    if conflict:
+        if conflict["conflict_with"] == "property":
+            return {
+                "error": f"Viewing conflict - another viewing scheduled at {conflict['datetime']}. Please choose a different time."
+            }
+        return {
+            "error": f"Viewing conflict - {buyer.get('full_name')} already has a viewing of property {conflict['property_id']} at {conflict['datetime']}. Please choose a different time."
+        }
     
     # Generate viewing ID
     viewing_id = get_next_viewing_id()
@@ -437,7 +727,8 @@ def schedule_viewing(
 def view_leads(
     role: Optional[str] = None,
     stage: Optional[str] = None,
-    limit: int = 20
+    limit: int = 20,
+    cursor: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     View and filter client leads. Internal tool for estate agents.
@@ -447,15 +738,28 @@ def view_leads(
         role: Filter by role - "buyer" or "seller" (optional, shows all if not specified)
         stage: Filter by stage - "hot", "warm", "cold", "instructed", "completed" (optional)
         limit: Maximum number of leads to return (default: 20)
+        cursor: `next_cursor` from a previous call with the same filters, to fetch the next page
     
     Returns:
         Filtered list of client records
     """
-    all_clients = get_clients_data()
-    
-    # Filter clients
+    if limit < 1:
+        return {"error": "limit must be at least 1"}
+    # Clients are kept newest-first; a cursor is a position in that order
+    all_clients = get_clients_by_recency()
+    params = {"role": role, "stage": stage}
+    start = 0
+    if cursor:
+        try:
+            start = decode_cursor(cursor, "leads", get_clients_version(), params)
+        except ValueError as e:
+            return {"error": str(e)}
+    
+    # Filter clients, stopping once the page is full
     filtered = []
-    for client in all_clients:
+    position = len(all_clients)
+    for i in range(start, len(all_clients)):
+        client = all_clients[i]
         # Apply role filter
         if role and client.get("role") != role:
             continue
@@ -464,21 +768,30 @@ def view_leads(
         if stage and client.get("stage") != stage:
             continue
         
+        if len(filtered) == limit:
+            position = i
+            break
         filtered.append(client)
-    
-    # Sort by created_at (newest first)
-    filtered.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-    
-    # Build summary stats
-    total_buyers = sum(1 for c in all_clients if c.get("role") == "buyer")
-    total_sellers = sum(1 for c in all_clients if c.get("role") == "seller")
-    hot_leads = sum(1 for c in all_clients if c.get("stage") == "hot")
+    next_cursor = None
+    if position < len(all_clients):
+        next_cursor = encode_cursor("leads", get_clients_version(), params, position)
+    
+    # Build summary stats from the maintained (role, stage) counts
+    counts = get_client_counts()
+    total_results = sum(
+        n for (client_role, client_stage), n in counts.items()
+        if (not role or client_role == role) and (not stage or client_stage == stage)
+    )
+    total_buyers = sum(n for (client_role, _), n in counts.items() if client_role == "buyer")
+    total_sellers = sum(n for (client_role, _), n in counts.items() if client_role == "seller")
+    hot_leads = sum(n for (_, client_stage), n in counts.items() if client_stage == "hot")
     
     return {
-        "message": f"Found {len(filtered)} leads matching criteria",
-        "leads": filtered[:limit],
-        "total_results": len(filtered),
-        "showing": min(limit, len(filtered)),
+        "message": f"Found {total_results} leads matching criteria",
+        "leads": filtered,
+        "total_results": total_results,
+        "showing": len(filtered),
+        "next_cursor": next_cursor,
         "summary": {
             "total_buyers": total_buyers,
             "total_sellers": total_sellers,
@@ -486,9 +799,10 @@ def view_leads(
             "total_clients": len(all_clients)
         },
         "structuredContent": {
-            "leads": filtered[:limit],
-            "total_results": len(filtered),
-            "showing": min(limit, len(filtered)),
+            "leads": filtered,
+            "total_results": total_results,
+            "showing": len(filtered),
+            "next_cursor": next_cursor,
             "summary": {
                 "total_buyers": total_buyers,
                 "total_sellers": total_sellers,
@@ -496,4 +810,4 @@ def view_leads(
                 "total_clients": len(all_clients)
             }
         }
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,62 @@
+"""
+Viewing calendar index for conflict detection.
+
+Viewing datetimes are parsed once when they are indexed and kept as sorted
+start times per key (a property ID or a buyer's client ID). A conflict check
+is then a bisect on the key's calendar rather than a re-parse of every
+viewing on the record.
+"""
+import bisect
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+# Two viewings closer together than this clash (1 hour)
+VIEWING_WINDOW_SECONDS = 3600
+
+
+def parse_viewing_datetime(value: str) -> Optional[datetime]:
+    """Parse an ISO viewing datetime ("2025-11-20T14:00:00Z"); naive values are taken as UTC."""
+    try:
+        parsed = datetime.fromisoformat((value or "").replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+class ViewingCalendar:
+    """Sorted viewing start times per key, with O(log n) conflict lookup."""
+
+    def __init__(self, window_seconds: int = VIEWING_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        self._starts: Dict[str, List[float]] = {}
+        self._viewings: Dict[str, List[Dict[str, Any]]] = {}
+        self._seen: Set[Tuple[str, str]] = set()
+
+    def add(self, key: str, viewing: Dict[str, Any]) -> bool:
+        """Index a viewing under ``key``; returns False if already indexed or undated."""
+        seen_key = (key, viewing.get("viewing_id"))
+        if seen_key in self._seen:
+            return False
+        start = parse_viewing_datetime(viewing.get("datetime", ""))
+        if start is None:
+            return False
+        self._seen.add(seen_key)
+
+        starts = self._starts.setdefault(key, [])
+        position = bisect.bisect_right(starts, start.timestamp())
+        starts.insert(position, start.timestamp())
+        self._viewings.setdefault(key, []).insert(position, viewing)
+        return True
+
+    def find_conflict(self, key: str, when: datetime) -> Optional[Dict[str, Any]]:
+        """Return an indexed viewing under ``key`` within the window of ``when``, if any."""
+        starts = self._starts.get(key)
+        if not starts:
+            return None
+        timestamp = when.timestamp()
+        position = bisect.bisect_right(starts, timestamp - self.window_seconds)
+        if position < len(starts) and starts[position] < timestamp + self.window_seconds:
+            return self._viewings[key][position]
+        return None
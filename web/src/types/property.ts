@@ -19,20 +19,31 @@ export interface Property {
   detail_url: string;
   lat?: string;
   lng?: string;
+  relevance?: number;
+  distance_miles?: number;
+  match_score?: number;
 }
 
 export interface ToolOutput {
   properties: Property[];
   filters_applied?: {
+    query?: string;
     postcode?: string;
     property_type?: string;
     max_price?: number;
     min_bedrooms?: number;
     has_garden?: boolean;
     has_parking?: boolean;
+    min_price?: number;
+    max_bedrooms?: number;
+    sort_by?: 'price_amount' | 'bedrooms' | 'scraped_at';
+    order?: 'asc' | 'desc';
+    near?: { lat: number; lng: number; radius_miles?: number };
+    bbox?: [number, number, number, number];
   };
   total_results?: number;
   showing?: number;
+  next_cursor?: string | null;
 }
 
 export interface WidgetState {
@@ -0,0 +1,73 @@
+"""
+Widget bundle assembled once at startup.
+
+The built JS and CSS are inlined into a single HTML document, hashed, and
+precompressed (gzip, plus brotli when the ``brotli`` package is installed),
+so serving the widget is a header check and a byte copy. The content hash is
+used as the HTTP ETag and exposed to clients in the resource metadata.
+"""
+import gzip
+import hashlib
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <style>{css}</style>
+</head>
+<body>
+    <div id="root"></div>
+    <script type="module">{js}</script>
+</body>
+</html>"""
+
+
+class WidgetBundle:
+    """The widget HTML with its content hash and precompressed variants."""
+
+    def __init__(self, html: str):
+        self.html = html
+        self.body = html.encode("utf-8")
+        self.content_hash = hashlib.sha256(self.body).hexdigest()[:16]
+        self.etag = f'"{self.content_hash}"'
+        # Content-Encoding -> body, in order of preference
+        self.encodings: Dict[str, bytes] = {}
+        if brotli is not None:
+            self.encodings["br"] = brotli.compress(self.body, quality=11)
+        self.encodings["gzip"] = gzip.compress(self.body, compresslevel=9, mtime=0)
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """True if an If-None-Match header already names this bundle."""
+        if not if_none_match:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or self.etag in tags
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """Pick the smallest variant the client accepts: (body, Content-Encoding or None)."""
+        accepted = set()
+        for part in (accept_encoding or "").split(","):
+            coding, _, params = part.strip().partition(";")
+            if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                continue
+            accepted.add(coding.strip().lower())
+        for coding, body in self.encodings.items():
+            if coding in accepted or "*" in accepted:
+                return body, coding
+        return self.body, None
+
+
+def load_widget_bundle(js_path: Path, css_path: Path) -> Optional[WidgetBundle]:
+    """Build the bundle from the built widget files, or None if the JS is missing."""
+    if not js_path.exists():
+        return None
+    css = css_path.read_text(encoding="utf-8") if css_path.exists() else ""
+    return WidgetBundle(HTML_TEMPLATE.format(css=css, js=js_path.read_text(encoding="utf-8")))